@@ -0,0 +1,70 @@
+# Benchmark: orders/second through OrderIntake versus calling create_order directly
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order_intake import OrderIntake
+
+ORDERS = 100_000
+PRODUCERS = 500  # Concurrent "connections" submitting orders
+
+
+def make_requests(seed=0):
+    rng = random.Random(seed)
+    customers = [Customer(f"c{i}") for i in range(1_000)]
+    coffees = [Coffee(f"coffee{i}") for i in range(20)]
+    return [(rng.choice(customers), rng.choice(coffees), round(rng.uniform(1.0, 10.0), 2))
+            for _ in range(ORDERS)]
+
+
+def run_direct(requests):
+    start = time.perf_counter()
+    for customer, coffee, price in requests:
+        customer.create_order(coffee, price)
+    return time.perf_counter() - start
+
+
+async def run_intake(requests, **options):
+    async def producer(chunk):
+        for customer, coffee, price in chunk:
+            await intake.submit_order(customer, coffee, price)
+    
+    chunks = [requests[i::PRODUCERS] for i in range(PRODUCERS)]
+    async with OrderIntake(**options) as intake:
+        start = time.perf_counter()
+        await asyncio.gather(*(producer(chunk) for chunk in chunks))
+        return time.perf_counter() - start
+
+
+async def run_unbatched(requests):
+    """Each coroutine calls create_order inline: the baseline async front end"""
+    async def producer(chunk):
+        for customer, coffee, price in chunk:
+            customer.create_order(coffee, price)
+            await asyncio.sleep(0)  # Yield like a request handler would
+    
+    chunks = [requests[i::PRODUCERS] for i in range(PRODUCERS)]
+    start = time.perf_counter()
+    await asyncio.gather(*(producer(chunk) for chunk in chunks))
+    return time.perf_counter() - start
+
+
+def main():
+    results = [
+        ("create_order (sync loop)", run_direct(make_requests())),
+        ("create_order per coroutine", asyncio.run(run_unbatched(make_requests()))),
+        ("OrderIntake batch=64", asyncio.run(run_intake(make_requests(), batch_size=64))),
+        ("OrderIntake batch=256", asyncio.run(run_intake(make_requests(), batch_size=256))),
+    ]
+    for name, seconds in results:
+        print(f"{name:<28}{ORDERS / seconds:>12,.0f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Microbenchmark: per-order construction time and per-object memory
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+
+ORDERS = 100_000
+
+
+def construction_time(repeat=5):
+    """Return the best per-order construction time in microseconds"""
+    customer = Customer("Alice")
+    coffee = Coffee("Espresso")
+    timer = timeit.Timer(lambda: Order(customer, coffee, 3.5))
+    best = min(timer.repeat(repeat=repeat, number=ORDERS))
+    return best / ORDERS * 1e6
+
+
+def memory_per_order():
+    """Return bytes allocated per Order object, excluding the order lists"""
+    customer = Customer("Alice")
+    coffee = Coffee("Espresso")
+    orders = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(ORDERS):
+        orders.append(Order(customer, coffee, 3.5))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Three list slots per order: ours, the customer's and the coffee's
+    return (after - before) / ORDERS - 3 * 8
+
+
+def main():
+    print(f"Order construction: {construction_time():.2f} us/order")
+    print(f"Order memory:       {memory_per_order():.1f} bytes/order")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Benchmark: allocation and time of orders() views versus copying the history
+#
+#   python benchmarks/order_views.py
+#
+# "copy" is what orders() used to do: a list copy (plain orders) or a list of
+# Order views (OrderStore rows) on every call.
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from order_store import OrderStore
+from store import Store
+
+ORDERS = 100_000
+CALLS = 20
+
+
+def build(store):
+    if store is not None:
+        store.activate()
+    customers = [Customer(f"c{i}") for i in range(100)]
+    coffee = Coffee("Espresso")
+    Order._attach_many([customers[i % 100] for i in range(ORDERS)], [coffee] * ORDERS,
+                       [3.5] * ORDERS, notify=False)
+    Store.deactivate()
+    return coffee
+
+
+def copied(coffee):
+    if coffee._store is None:
+        return coffee._orders.copy()
+    return coffee._store.orders(coffee._orders)
+
+
+def measure(label, call):
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        call()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()  # Traced separately, since tracing slows every allocation
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  {label:28s} {elapsed / CALLS * 1e6:10.1f} us/call  {peak:>12,} bytes peak")
+
+
+def main():
+    for mode, store in (("plain", None), ("OrderStore", OrderStore())):
+        coffee = build(store)
+        print(f"{mode}, {ORDERS:,} orders:")
+        measure("copy: len(orders())", lambda: len(copied(coffee)))
+        measure("view: len(orders())", lambda: len(coffee.orders()))
+        measure("copy: orders()[-10:]", lambda: copied(coffee)[-10:])
+        measure("view: orders()[-10:]", lambda: list(coffee.orders()[-10:]))
+        measure("copy: sum over orders()", lambda: sum(o.price for o in copied(coffee)))
+        measure("view: sum over orders()", lambda: sum(o.price for o in coffee.orders()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Benchmark: ShopReport from maintained aggregates, and recomputed from history with
+# 1..N worker processes, versus the serial per-coffee methods
+#
+#   python benchmarks/report.py --orders 10000000 --processes 1 2 4 8
+#
+# Orders are bulk-loaded into an OrderStore, the columnar backend ShopReport
+# shards from directly.
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from order_store import OrderStore
+from shop_report import ShopReport
+
+
+def build_shop(num_orders, seed=0):
+    rng = random.Random(seed)
+    OrderStore().activate()
+    customers = [Customer(f"c{i}") for i in range(max(10, num_orders // 100))]
+    coffees = [Coffee(f"coffee{i}") for i in range(50)]
+    chunk = 100_000
+    for start in range(0, num_orders, chunk):
+        size = min(chunk, num_orders - start)
+        Order._attach_many(rng.choices(customers, k=size), rng.choices(coffees, k=size),
+                           array('d', (round(rng.uniform(1.0, 10.0), 2) for _ in range(size))),
+                           notify=False)
+    return coffees
+
+
+def run_serial(coffees):
+    start = time.perf_counter()
+    for coffee in coffees:
+        coffee.num_orders()
+        coffee.average_price()
+        coffee.customers()
+        Customer.most_aficionado(coffee)
+    return time.perf_counter() - start
+
+
+def run_report(processes=None, recompute=False):
+    start = time.perf_counter()
+    ShopReport(processes=processes, recompute=recompute).run()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+    
+    coffees = build_shop(args.orders)
+    print(f"{args.orders:,} orders, {os.cpu_count()} CPUs")
+    print(f"serial methods (in-memory indexes): {run_serial(coffees):8.3f} s")
+    print(f"ShopReport from aggregates:         {run_report():8.3f} s")
+    baseline = None
+    for processes in args.processes:
+        elapsed = run_report(processes, recompute=True)
+        baseline = baseline or elapsed
+        print(f"recomputed, {processes:2d} processes:      {elapsed:8.3f} s"
+              f"  ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
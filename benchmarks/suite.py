@@ -0,0 +1,181 @@
+# Benchmark suite: times the model methods on synthetic shops of growing size
+#
+#   python benchmarks/suite.py --sizes 1e3 1e4 1e5 --output results.json
+#   python benchmarks/suite.py --compare results.json
+#
+# Shops have Zipf-skewed coffee popularity and Pareto (heavy-tailed) customer
+# activity. Results are written as JSON so runs on different commits can be
+# compared with --compare.
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+QUERY_SAMPLES = 2_000
+
+
+def generate_shop(num_orders, seed=0):
+    """Return (customers, coffees, records) for a synthetic shop"""
+    rng = random.Random(seed)
+    num_customers = max(10, num_orders // 20)
+    num_coffees = max(5, min(500, num_orders // 1_000))
+    customers = [Customer(f"c{i}") for i in range(num_customers)]
+    coffees = [Coffee(f"coffee{i}") for i in range(num_coffees)]
+    
+    # Zipf-like coffee popularity and heavy-tailed customer activity
+    coffee_weights = [1 / (rank + 1) ** 1.1 for rank in range(num_coffees)]
+    customer_weights = [rng.paretovariate(1.2) for _ in range(num_customers)]
+    records = list(zip(
+        rng.choices(customers, weights=customer_weights, k=num_orders),
+        rng.choices(coffees, weights=coffee_weights, k=num_orders),
+        (round(rng.uniform(1.0, 10.0), 2) for _ in range(num_orders)),
+    ))
+    return customers, coffees, records
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def summarize(name, num_orders, latencies_ns):
+    """Return a result row for a list of per-call latencies"""
+    latencies_ns.sort()
+    total_s = sum(latencies_ns) / 1e9
+    return {
+        "benchmark": name,
+        "orders": num_orders,
+        "calls": len(latencies_ns),
+        "total_s": total_s,
+        "ops_per_s": len(latencies_ns) / total_s if total_s else None,
+        "p50_us": percentile(latencies_ns, 0.50) / 1e3,
+        "p95_us": percentile(latencies_ns, 0.95) / 1e3,
+        "p99_us": percentile(latencies_ns, 0.99) / 1e3,
+        "max_us": latencies_ns[-1] / 1e3,
+    }
+
+
+def time_calls(func, args_list):
+    """Call func(*args) for each args tuple, returning per-call latencies in ns"""
+    clock = time.perf_counter_ns
+    latencies = []
+    for args in args_list:
+        start = clock()
+        func(*args)
+        latencies.append(clock() - start)
+    return latencies
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_size(num_orders, seed):
+    """Build one shop and time every benchmarked method on it"""
+    Customer.clear_registry()
+    Coffee.clear_registry()
+    customers, coffees, records = generate_shop(num_orders, seed)
+    rng = random.Random(seed + 1)
+    results = [summarize("Order()", num_orders, time_calls(Order, records))]
+    
+    # Sample queries the way traffic would hit them: popular coffees more often
+    sample_customers = [(c,) for c, _, _ in rng.choices(records, k=QUERY_SAMPLES)]
+    sample_coffees = [(c,) for _, c, _ in rng.choices(records, k=QUERY_SAMPLES)]
+    queries = [
+        ("Customer.orders()", Customer.orders, sample_customers),
+        ("Customer.coffees()", Customer.coffees, sample_customers),
+        ("Coffee.orders()", Coffee.orders, sample_coffees),
+        ("Coffee.customers()", Coffee.customers, sample_coffees),
+        ("Coffee.num_orders()", Coffee.num_orders, sample_coffees),
+        ("Coffee.average_price()", Coffee.average_price, sample_coffees),
+        ("Customer.most_aficionado()", Customer.most_aficionado, sample_coffees),
+    ]
+    for name, func, args_list in queries:
+        results.append(summarize(name, num_orders, time_calls(func, args_list)))
+    
+    rss = peak_rss_kb()
+    for row in results:
+        row["peak_rss_kb"] = rss
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    previous = {}
+    if baseline:
+        previous = {(row["benchmark"], row["orders"]): row for row in baseline["results"]}
+    header = f"{'benchmark':<28}{'orders':>10}{'ops/s':>14}{'p50 us':>10}{'p99 us':>10}"
+    if previous:
+        header += f"{'vs base':>10}"
+    print(header)
+    for row in results:
+        line = (f"{row['benchmark']:<28}{row['orders']:>10}{row['ops_per_s'] or 0:>14,.0f}"
+                f"{row['p50_us']:>10.2f}{row['p99_us']:>10.2f}")
+        base = previous.get((row["benchmark"], row["orders"]))
+        if base and base["ops_per_s"] and row["ops_per_s"]:
+            line += f"{row['ops_per_s'] / base['ops_per_s']:>9.2f}x"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the coffee shop models")
+    parser.add_argument("--sizes", nargs="+", type=float, default=DEFAULT_SIZES,
+                        help="order counts to benchmark, e.g. 1e3 1e5 1e7")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results to this path")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    args = parser.parse_args(argv)
+    
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(int(size), args.seed))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
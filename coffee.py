@@ -1,40 +1,302 @@
+import itertools
+from itertools import islice
+
+from leaderboard import Leaderboard
+from locks import LockStripes
+from order_view import OrderView
+from price_index import PriceIndex
+from price_stats import PriceStats
+from query_cache import memoized
+from registry import Registry, WeakRegistry
+from sales_window import SalesWindows
+from sketches import OrderSketches, Sketches
+
+SKETCH_PAGE_SIZE = 10_000  # Store rows read per step when catching sketches up
+
+
 class Coffee:
-    def __init__(self, name):
+    # Class variable to keep track of all coffees, indexed by name
+    all_coffees = Registry()
+    _ids = itertools.count(1)  # Creation-order ids, used by OrderStore columns
+    _locks = LockStripes()  # Guards each coffee's orders and aggregates, striped by id
+    __slots__ = ('_name', '_id', '_store', '_orders', '_tombstones', '_stats',
+                 '_customer_counts', '_leaderboard', '_sales', '_price_index', '_sketches',
+                 '_version', '__weakref__')
+    
+    def __init__(self, name, store=None):
         if not isinstance(name, str):
             raise TypeError("Name must be a string")
         if len(name) < 3:
             raise ValueError("Name must be at least 3 characters long")
         self._name = name  # Private attribute since it's immutable
-        self._orders = []  # Private list to store orders
+        self._id = next(Coffee._ids)
+        # Private list to store orders (row numbers when backed by a Store)
+        self._store, self._orders = Store.new_order_list(store)
+        self._tombstones = 0  # Cancelled orders still in _orders, until it is compacted
+        self._stats = PriceStats()  # Running price totals, kept in sync by Order
+        self._customer_counts = {}  # Distinct customers in first-order order -> order count
+        self._leaderboard = Leaderboard()  # Customer spend ranking for this coffee
+        self._sales = SalesWindows()  # Rolling per-time-bucket order counts and revenue
+        self._price_index = None  # Sorted prices, built on the first price-range query
+        self._sketches = None  # Approximate counts and quantiles, built on first use
+        self._version = 0  # Bumped on every change, so cached query results go stale
+        self._home_registry().append(self)
     
     @property
     def name(self):
         """Getter for coffee name (immutable once set)"""
         return self._name
     
+    @property
+    def id(self):
+        """Getter for the coffee's creation-order id (immutable)"""
+        return self._id
+    
+    @property
+    def _lock(self):
+        return Coffee._locks(self._id)
+    
+    @classmethod
+    def _registry(cls):
+        """Return all_coffees, re-indexing it if it was replaced by a plain list"""
+        registry = Coffee.all_coffees
+        if not isinstance(registry, Registry):
+            registry = Coffee.all_coffees = Registry(registry)
+        return registry
+    
+    def _home_registry(self):
+        """Return the registry this coffee joined: its store's own, or all_coffees"""
+        if self._store is not None and self._store.coffee_registry is not None:
+            return self._store.coffee_registry
+        return Coffee._registry()
+    
+    @classmethod
+    def use_weak_registry(cls, enabled=True):
+        """Hold registered coffees by weak reference (or strongly again if not enabled)"""
+        registry_class = WeakRegistry if enabled else Registry
+        Coffee.all_coffees = registry_class(cls._registry())
+    
+    @classmethod
+    def clear_registry(cls):
+        """Forget every registered coffee"""
+        cls._registry().clear()
+    
+    @classmethod
+    def find(cls, name):
+        """Return the first coffee registered with the given name, or None"""
+        return cls._registry().find(name)
+    
+    @property
+    def _pushdown(self):
+        """Whether queries go to the store because it keeps no in-memory indexes"""
+        return self._store is not None and not self._store.indexes_in_memory
+    
     def orders(self):
-        """Return all orders for this coffee"""
-        return self._orders.copy()  # Return a copy to prevent external modification
+        """Return all orders for this coffee, as a read-only live view"""
+        if self._pushdown:
+            return self._store.coffee_orders(self)
+        # Wraps the history without copying it; stored rows become Orders as read
+        return OrderView(self)
+    
+    def _compact(self):
+        """Drop cancelled orders from the history (call with the lock held)"""
+        if self._tombstones:
+            # A new list, so iterators still walking the old one aren't disturbed
+            self._orders = Order._live_items(self._orders, self._store)
+            self._tombstones = 0
+            self._price_index = None  # Its positions were into the old history
     
+    @memoized
     def customers(self):
         """Return unique list of customers who have ordered this coffee"""
-        unique_customers = []
-        for order in self._orders:
-            if order.customer not in unique_customers:
-                unique_customers.append(order.customer)
-        return unique_customers
+        if self._pushdown:
+            return self._store.coffee_customers(self)
+        with self._lock:
+            return list(self._customer_counts)
     
+    @memoized
+    def num_customers(self):
+        """Return count of distinct customers who have ordered this coffee"""
+        if self._pushdown:
+            return self._store.count_coffee_customers(self)
+        return len(self._customer_counts)
+    
+    @memoized
     def num_orders(self):
         """Return total count of orders for this coffee"""
-        return len(self._orders)
+        if self._pushdown:
+            return self._store.coffee_stats(self).count
+        return self._stats.count
     
+    @memoized
     def average_price(self):
         """Return average price of all orders for this coffee"""
-        if not self._orders:
-            return 0
+        if self._pushdown:
+            return self._store.coffee_stats(self).mean()
+        with self._lock:
+            return self._stats.mean()
+    
+    @memoized
+    def min_price(self):
+        """Return the lowest price paid for this coffee, or 0 if no orders"""
+        if self._pushdown:
+            return self._store.coffee_stats(self).min or 0
+        with self._lock:
+            if not self._stats.count:
+                return 0
+            self._refresh_bounds()
+            return self._stats.min
+    
+    @memoized
+    def max_price(self):
+        """Return the highest price paid for this coffee, or 0 if no orders"""
+        if self._pushdown:
+            return self._store.coffee_stats(self).max or 0
+        with self._lock:
+            if not self._stats.count:
+                return 0
+            self._refresh_bounds()
+            return self._stats.max
+    
+    @memoized
+    def price_stddev(self):
+        """Return the population standard deviation of order prices"""
+        if self._pushdown:
+            return self._store.coffee_stats(self).stddev()
+        with self._lock:
+            return self._stats.stddev()
+    
+    @memoized
+    def top_customers(self, k):
+        """Return up to k (customer, total spent) pairs, biggest spenders first"""
+        if not isinstance(k, int):
+            raise TypeError("k must be an integer")
+        if k < 0:
+            raise ValueError("k must not be negative")
+        if self._pushdown:
+            return self._store.top_customers(self, k)
+        with self._lock:
+            return self._leaderboard.top(k)
+    
+    def _refresh_bounds(self):
+        """Recompute min/max after cancelling the cheapest or dearest order (lock held)"""
+        if self._stats.bounds_stale:
+            self._compact()
+            self._stats.reset_bounds(self._prices_since(0))
+    
+    def _priced_orders(self, low=None, high=None):
+        """Return the orders priced in [low, high], in history order"""
+        with self._lock:
+            index = self._price_index
+            if index is None:
+                index = self._price_index = PriceIndex()
+            if len(index) < len(self._orders):
+                index.extend(self._prices_since(len(index)))
+            items = [self._orders[position] for position in index.between(low, high)]
+            if self._tombstones:
+                items = Order._live_items(items, self._store)
+        return items if self._store is None else self._store.orders(items)
+    
+    def _prices_since(self, position):
+        """Return the prices of the orders from history position onwards"""
+        new = self._orders[position:]
+        if self._store is None:
+            return [order._price for order in new]
+        return [self._store.price(row) for row in new]
+    
+    def _caught_up_sketches(self):
+        """Return this coffee's OrderSketches, with every order so far folded in"""
+        with self._lock:
+            sketches = self._sketches
+            if sketches is None:
+                sketches = self._sketches = OrderSketches()
+            if not self._pushdown:
+                self._compact()  # Sketches are rebuilt after a cancel, from live orders only
+                if sketches.orders_seen < len(self._orders):
+                    sketches.prices.add_many(self._prices_since(sketches.orders_seen))
+                    sketches.orders_seen = len(self._orders)
+                if sketches.customers_seen < len(self._customer_counts):
+                    new = islice(self._customer_counts, sketches.customers_seen, None)
+                    sketches.customers.add_many(customer.id for customer in new)
+                    sketches.customers_seen = len(self._customer_counts)
+                return sketches
+        # Read the store a page at a time, so orders aren't held up for the whole backlog
+        while True:
+            with self._lock:
+                page = self._store.coffee_orders_after(self, sketches.last_row, SKETCH_PAGE_SIZE)
+                if page:
+                    sketches.customers.add_many(customer.id for _, customer, _ in page)
+                    sketches.prices.add_many(price for _, _, price in page)
+                    sketches.last_row = page[-1][0]
+            if len(page) < SKETCH_PAGE_SIZE:
+                return sketches
+    
+    def approx_num_customers(self):
+        """Return an estimate of how many distinct customers ordered this coffee
+        
+        Uses a HyperLogLog sketch: within about 3.3% of num_customers() 95%
+        of the time, in 4 KB however many customers there are.
+        """
+        sketches = self._caught_up_sketches()
+        with self._lock:
+            return sketches.customers.count()
+    
+    def price_quantiles(self, fractions):
+        """Return approximate order prices at each fraction (0 to 1), e.g. [0.5, 0.95]
         
-        total_price = sum(order.price for order in self._orders)
-        return total_price / len(self._orders)
+        Uses a quantile sketch: each price's rank is within about 1.7% of
+        the order count of the one asked for, and min/max are exact.
+        Returns 0 for each fraction if there are no orders.
+        """
+        fractions = list(fractions)
+        sketches = self._caught_up_sketches()
+        with self._lock:
+            return sketches.prices.quantiles(fractions)
+    
+    def price_quantile(self, fraction):
+        """Return the approximate order price at fraction (0 to 1), e.g. 0.5 for the median"""
+        return self.price_quantiles([fraction])[0]
+    
+    def sketches(self):
+        """Return a copy of this coffee's Sketches, to merge with other coffees or shards
+        
+        The customer sketch is keyed by Customer.id, so only merge it with
+        sketches from the same process; price sketches merge anywhere.
+        """
+        sketches = self._caught_up_sketches()
+        with self._lock:
+            return Sketches(sketches.customers.copy(), sketches.prices.copy())
+    
+    def _recent_totals(self, seconds):
+        if not isinstance(seconds, (int, float)):
+            raise TypeError("Window must be a number of seconds")
+        now = Order.clock()
+        if self._pushdown:
+            if seconds <= 0:
+                raise ValueError("Window must be a positive number of seconds")
+            return self._store.coffee_recent_totals(self, now - seconds)
+        with self._lock:
+            return self._sales.totals(now, seconds)
+    
+    def num_recent_orders(self, seconds):
+        """Return how many orders for this coffee were placed in the last seconds"""
+        return self._recent_totals(seconds)[0]
+    
+    def recent_revenue(self, seconds):
+        """Return the revenue from this coffee in the last seconds"""
+        return self._recent_totals(seconds)[1]
+    
+    def recent_average_price(self, seconds):
+        """Return the average price paid in the last seconds, or 0 if no orders"""
+        count, revenue = self._recent_totals(seconds)
+        if not count:
+            return 0
+        return revenue / count
     
     def __repr__(self):
-        return f"Coffee(name='{self.name}')"
\ No newline at end of file
+        return f"Coffee(name='{self.name}')"
+
+
+# Imported at the bottom to avoid circular imports
+from order import Order  # noqa: E402
+from store import Store  # noqa: E402
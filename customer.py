@@ -1,11 +1,29 @@
+import itertools
+
+from locks import LockStripes
+from order_view import OrderView
+from query_cache import memoized
+from registry import Registry, WeakRegistry
+
+
 class Customer:
-    # Class variable to keep track of all customers for the bonus method
-    all_customers = []
+    # Class variable to keep track of all customers, indexed by name
+    all_customers = Registry()
+    _ids = itertools.count(1)  # Creation-order ids, used to break spend ties
+    _locks = LockStripes()  # Guards each customer's orders and indexes, striped by id
+    __slots__ = ('_name', '_id', '_store', '_orders', '_tombstones', '_coffee_counts',
+                 '_retired', '_version', '__weakref__')
     
-    def __init__(self, name):
+    def __init__(self, name, store=None):
+        self._version = 0  # Bumped on every change, so cached query results go stale
         self.name = name  # This will use the setter for validation
-        Customer.all_customers.append(self)
-        self._orders = []  # Private list to store orders
+        self._id = next(Customer._ids)
+        # Private list to store orders (row numbers when backed by a Store)
+        self._store, self._orders = Store.new_order_list(store)
+        self._tombstones = 0  # Cancelled orders still in _orders, until it is compacted
+        self._coffee_counts = {}  # Distinct coffees in first-order order -> order count
+        self._retired = False
+        self._home_registry().append(self)  # Last, so other threads never see it half-built
     
     @property
     def name(self):
@@ -19,45 +37,146 @@ class Customer:
             raise TypeError("Name must be a string")
         if not (1 <= len(value) <= 15):
             raise ValueError("Name must be between 1 and 15 characters")
+        old_name = getattr(self, '_name', None)
         self._name = value
+        if old_name is not None:
+            self._home_registry().rename(self, old_name)  # Keep the name index in step
+            self._version += 1
+    
+    @property
+    def id(self):
+        """Getter for the customer's creation-order id (immutable)"""
+        return self._id
+    
+    @property
+    def _lock(self):
+        return Customer._locks(self._id)
+    
+    @property
+    def _pushdown(self):
+        """Whether queries go to the store because it keeps no in-memory indexes"""
+        return self._store is not None and not self._store.indexes_in_memory
     
     def orders(self):
-        """Return all orders for this customer"""
-        return self._orders.copy()  # Return a copy to prevent external modification
+        """Return all orders for this customer, as a read-only live view"""
+        if self._pushdown:
+            return self._store.customer_orders(self)
+        # Wraps the history without copying it; stored rows become Orders as read
+        return OrderView(self)
+    
+    def _compact(self):
+        """Drop cancelled orders from the history (call with the lock held)"""
+        if self._tombstones:
+            # A new list, so iterators still walking the old one aren't disturbed
+            self._orders = Order._live_items(self._orders, self._store)
+            self._tombstones = 0
     
+    @memoized
     def coffees(self):
         """Return unique list of coffees this customer has ordered"""
-        unique_coffees = []
-        for order in self._orders:
-            if order.coffee not in unique_coffees:
-                unique_coffees.append(order.coffee)
-        return unique_coffees
+        if self._pushdown:
+            return self._store.customer_coffees(self)
+        with self._lock:
+            return list(self._coffee_counts)
+    
+    @memoized
+    def num_coffees(self):
+        """Return count of distinct coffees this customer has ordered"""
+        if self._pushdown:
+            return self._store.count_customer_coffees(self)
+        return len(self._coffee_counts)
     
     def create_order(self, coffee, price):
         """Create a new order for this customer"""
-        from order import Order  # Import here to avoid circular imports
         new_order = Order(self, coffee, price)
         return new_order
     
+    def create_orders(self, items):
+        """Create one order per (coffee, price) pair for this customer, all or nothing"""
+        return Order.bulk_create((self, coffee, price) for coffee, price in items)
+    
     @classmethod
-    def most_aficionado(cls, coffee):
-        """Return the customer who has spent the most on the given coffee"""
-        customer_totals = {}
+    def _registry(cls):
+        """Return all_customers, re-indexing it if it was replaced by a plain list"""
+        registry = Customer.all_customers
+        if not isinstance(registry, Registry):
+            registry = Customer.all_customers = Registry(registry)
+        return registry
+    
+    def _home_registry(self):
+        """Return the registry this customer joined: its store's own, or all_customers"""
+        if self._store is not None and self._store.customer_registry is not None:
+            return self._store.customer_registry
+        return Customer._registry()
+    
+    @classmethod
+    def use_weak_registry(cls, enabled=True):
+        """Hold registered customers by weak reference (or strongly again if not enabled)
         
-        # Calculate total spent by each customer on this coffee
-        for customer in cls.all_customers:
-            total_spent = 0
-            for order in customer.orders():
-                if order.coffee == coffee:
-                    total_spent += order.price
-            if total_spent > 0:
-                customer_totals[customer] = total_spent
+        In weak mode, customers nobody else refers to (e.g. ones who never
+        ordered) are garbage collected instead of living in all_customers
+        forever.
+        """
+        registry_class = WeakRegistry if enabled else Registry
+        Customer.all_customers = registry_class(cls._registry())
+    
+    @classmethod
+    def clear_registry(cls):
+        """Forget every registered customer"""
+        cls._registry().clear()
+    
+    def retire(self):
+        """Remove this customer from the registry and every aficionado ranking
         
-        # Return customer with highest total, or None if no orders
-        if not customer_totals:
+        A retired customer can no longer place orders. Their past orders stay
+        in each coffee's history, so the customer is only reclaimed once
+        those coffees are gone too.
+        """
+        # A store without in-memory indexes knows which coffees to notify
+        coffees = self._store.customer_coffees(self) if self._pushdown else None
+        with self._lock:
+            if self._retired:
+                return
+            self._retired = True
+            self._version += 1
+            registry = self._home_registry()
+            if self in registry:
+                registry.remove(self)
+            # Always customer lock then coffee lock, the same order Order uses
+            for coffee in self._coffee_counts if coffees is None else coffees:
+                with coffee._lock:
+                    coffee._leaderboard.remove(self)
+                    coffee._version += 1  # Its aficionado ranking just changed
+    
+    @property
+    def retired(self):
+        """Whether this customer has been retired"""
+        return self._retired
+    
+    @classmethod
+    def find(cls, name):
+        """Return the first customer registered with the given name, or None"""
+        return cls._registry().find(name)
+    
+    @classmethod
+    @memoized(entity=1)
+    def most_aficionado(cls, coffee):
+        """Return the customer who has spent the most on the given coffee"""
+        if not isinstance(coffee, Coffee):
             return None
         
-        return max(customer_totals, key=customer_totals.get)
+        if coffee._pushdown:
+            return coffee._store.most_aficionado(coffee)
+        
+        # Each coffee keeps its spenders ranked, so the leader is at the front
+        with coffee._lock:
+            return coffee._leaderboard.leader()
     
     def __repr__(self):
-        return f"Customer(name='{self.name}')"
\ No newline at end of file
+        return f"Customer(name='{self.name}')"
+
+
+# Imported at the bottom to avoid circular imports
+from coffee import Coffee  # noqa: E402
+from order import Order  # noqa: E402
+from store import Store  # noqa: E402
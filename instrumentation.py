@@ -0,0 +1,205 @@
+import functools
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+
+LATENCY_SAMPLES = 10_000  # Percentiles cover this many most recent calls per operation
+
+
+def _one(args, result):
+    return 1
+
+
+def _length(args, result):
+    return len(result)
+
+
+def _zero(args, result):
+    return 0
+
+
+def _found(args, result):
+    return 0 if result is None else 1
+
+
+# (class, method, label, items scanned for a call given its args and result)
+# Items are the orders or index entries a call reads: creating an order
+# touches one, customers() copies one entry per distinct customer,
+# average_price() reads running totals, and most_aficionado() reads the
+# front of the spend ranking.
+OPERATIONS = (
+    (Order, '__init__', 'Order.__init__', _one),
+    (Customer, 'create_order', 'Customer.create_order', _one),
+    (Coffee, 'customers', 'Coffee.customers', _length),
+    (Coffee, 'average_price', 'Coffee.average_price', _zero),
+    (Customer, 'most_aficionado', 'Customer.most_aficionado', _found),
+)
+
+
+class OperationStats:
+    """Call count, latency and items scanned for one instrumented operation"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget every recorded call"""
+        with self._lock:
+            self.calls = 0
+            self.total_ns = 0
+            self.max_ns = 0
+            self.items = 0
+            self.latencies = deque(maxlen=LATENCY_SAMPLES)  # Most recent call times, in ns
+
+    def record(self, elapsed_ns, items):
+        with self._lock:
+            self.calls += 1
+            self.total_ns += elapsed_ns
+            self.items += items
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+            self.latencies.append(elapsed_ns)
+
+    def summary(self):
+        """Return a dict of this operation's counters, with times in microseconds"""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            calls, total_ns, max_ns, items = self.calls, self.total_ns, self.max_ns, self.items
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] / 1e3
+
+        return {
+            'calls': calls,
+            'total_us': total_ns / 1e3,
+            'mean_us': total_ns / calls / 1e3 if calls else 0.0,
+            'p50_us': percentile(0.50),
+            'p95_us': percentile(0.95),
+            'p99_us': percentile(0.99),
+            'max_us': max_ns / 1e3,
+            'items': items,
+        }
+
+
+_stats = {label: OperationStats(label) for _, _, label, _ in OPERATIONS}
+_originals = {}  # (class, method) -> original class attribute while enabled
+_state_lock = threading.Lock()
+
+
+def _timed(function, operation, items):
+    clock = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        result = function(*args, **kwargs)
+        operation.record(clock() - start, items(args, result))
+        return result
+    return wrapper
+
+
+def enable():
+    """Start timing the instrumented operations
+
+    The methods are swapped for timing wrappers on their classes, so while
+    instrumentation is disabled the models run their original, untouched
+    code and it costs nothing.
+    """
+    with _state_lock:
+        if _originals:
+            return
+        for cls, method, label, items in OPERATIONS:
+            original = cls.__dict__[method]
+            if isinstance(original, classmethod):
+                wrapped = classmethod(_timed(original.__func__, _stats[label], items))
+            else:
+                wrapped = _timed(original, _stats[label], items)
+            _originals[(cls, method)] = original
+            setattr(cls, method, wrapped)
+
+
+def disable():
+    """Stop timing and put the original methods back"""
+    with _state_lock:
+        for (cls, method), original in _originals.items():
+            setattr(cls, method, original)
+        _originals.clear()
+
+
+def is_enabled():
+    """Whether the instrumented operations are currently being timed"""
+    return bool(_originals)
+
+
+def reset():
+    """Forget everything recorded so far"""
+    for operation in _stats.values():
+        operation.clear()
+
+
+def stats():
+    """Return {operation: summary dict} for every instrumented operation"""
+    return {label: operation.summary() for label, operation in _stats.items()}
+
+
+def format_stats(summaries=None):
+    """Return summaries (default: the current stats) as a text table, slowest total first"""
+    summaries = stats() if summaries is None else summaries
+    lines = [f"{'operation':26s} {'calls':>9s} {'total ms':>10s} {'mean us':>9s} "
+             f"{'p50 us':>9s} {'p95 us':>9s} {'p99 us':>9s} {'max us':>9s} {'items':>10s}"]
+    for label, row in sorted(summaries.items(), key=lambda item: -item[1]['total_us']):
+        lines.append(f"{label:26s} {row['calls']:9d} {row['total_us'] / 1e3:10.2f} "
+                     f"{row['mean_us']:9.2f} {row['p50_us']:9.2f} {row['p95_us']:9.2f} "
+                     f"{row['p99_us']:9.2f} {row['max_us']:9.2f} {row['items']:10d}")
+    return "\n".join(lines)
+
+
+class Profile:
+    """Result of a profile() block; stats is filled in when the block exits"""
+
+    def __init__(self):
+        self.stats = None
+
+
+@contextmanager
+def profile(output=None):
+    """Record the instrumented operations for the duration of a with block
+
+    Counters are reset on entry. On exit the summaries are stored on the
+    yielded Profile and a table is written to output (a path or a text
+    file, stderr by default; False to skip). Instrumentation is left
+    enabled afterwards only if it was already enabled before.
+
+        with instrumentation.profile("loyalty-page.txt") as run:
+            render_loyalty_page()
+        slowest = max(run.stats, key=lambda name: run.stats[name]['total_us'])
+    """
+    result = Profile()
+    was_enabled = is_enabled()
+    reset()
+    enable()
+    try:
+        yield result
+    finally:
+        result.stats = stats()
+        if not was_enabled:
+            disable()
+        if output is not False:
+            table = format_stats(result.stats) + "\n"
+            if output is None:
+                sys.stderr.write(table)
+            elif isinstance(output, str):
+                with open(output, 'w', encoding='utf-8') as f:
+                    f.write(table)
+            else:
+                output.write(table)
@@ -0,0 +1,139 @@
+import heapq
+
+TOP_SIZE = 10  # Biggest spenders each Leaderboard keeps ranked to begin with
+MAX_TOP_SIZE = 100  # top(k) beyond this many customers scans instead of tracking them
+
+
+def _rank(item):
+    """Sort key for a (customer, total) pair: biggest total, then earliest customer"""
+    customer, total = item
+    return total, -customer.id
+
+
+class Leaderboard:
+    """Per-coffee customer spend totals, with the biggest spenders kept at hand
+
+    Besides every customer's total, the board tracks the set of its biggest
+    spenders (TOP_SIZE of them, or the largest k top() has been asked for,
+    up to MAX_TOP_SIZE). Spending only grows as orders arrive, so each add
+    just checks the one customer whose total changed against the smallest
+    member of that set: O(1) per order, and leader() is O(1). top(k) sorts
+    the tracked set rather than every customer. Only a cancel or removal
+    that touches a tracked customer forces a rescan, done once on the next
+    leader() or top() call. Ties go to the customer created earliest.
+    """
+
+    def __init__(self):
+        self._totals = {}  # customer -> total spent
+        self._size = TOP_SIZE  # How many biggest spenders to track
+        self._top = set()  # The _size biggest spenders (everyone, if fewer), unless _stale
+        self._floor = None  # Smallest spender in a full _top, or None to look it up again
+        self._leader = None  # Biggest spender, unless _stale
+        self._stale = False  # A tracked spender lost spend, so rescan before reading
+
+    def add(self, customer, amount):
+        """Add amount (negative for a cancelled order) to customer's total"""
+        total = self._totals.get(customer, 0) + amount
+        self._totals[customer] = total
+        if amount < 0:
+            if customer in self._top:
+                self._stale = True
+        elif not self._stale:
+            self._challenge(customer, total)
+
+    def add_many(self, amounts):
+        """Add many (customer, amount) pairs with non-negative amounts, one per customer"""
+        totals = self._totals
+        if not totals:
+            # Nothing to add to, so take the amounts as they are and rank on the next read
+            self._totals = dict(amounts)
+            self._stale = bool(self._totals)
+            return
+        amounts = list(amounts)
+        if self._stale or len(amounts) <= self._size:
+            for customer, amount in amounts:
+                total = totals.get(customer, 0) + amount
+                totals[customer] = total
+                if not self._stale:
+                    self._challenge(customer, total)
+            return
+        for customer, amount in amounts:
+            totals[customer] = totals.get(customer, 0) + amount
+        if len(amounts) * 2 >= len(totals):
+            # About as many customers as a rescan would rank, so rescan on the next read
+            self._stale = True
+            return
+        # Totals only grew, so the biggest spenders are now among the tracked
+        # ones and the customers in this batch
+        candidates = self._top.union(customer for customer, _ in amounts)
+        ranked = heapq.nlargest(self._size, ((customer, totals[customer])
+                                             for customer in candidates), key=_rank)
+        self._top = {customer for customer, _ in ranked}
+        self._floor = None
+        self._leader = ranked[0][0]
+
+    def _challenge(self, customer, total):
+        """Let customer, whose total just grew, into the tracked set if it now belongs there"""
+        top = self._top
+        if customer in top:
+            if customer is self._floor:
+                self._floor = None  # It may no longer be the smallest
+        elif len(top) < self._size:
+            top.add(customer)
+        else:
+            floor = self._floor
+            if floor is None:
+                floor = self._floor = min(top, key=self._member_rank)
+            if _rank((customer, total)) < self._member_rank(floor):
+                return
+            top.remove(floor)
+            top.add(customer)
+            self._floor = None
+        leader = self._leader
+        if leader is None or _rank((customer, total)) > self._member_rank(leader):
+            self._leader = customer
+
+    def _member_rank(self, customer):
+        return _rank((customer, self._totals[customer]))
+
+    def _rebuild(self):
+        """Find the biggest spenders again with one pass over every total"""
+        ranked = heapq.nlargest(self._size, self._totals.items(), key=_rank)
+        self._top = {customer for customer, _ in ranked}
+        self._floor = None
+        self._leader = ranked[0][0] if ranked else None
+        self._stale = False
+
+    def remove(self, customer):
+        """Drop customer from the ranking entirely"""
+        if self._totals.pop(customer, None) is not None and customer in self._top:
+            self._stale = True
+
+    def total(self, customer):
+        """Return the total customer has spent, or 0 if they never ordered"""
+        return self._totals.get(customer, 0)
+
+    def leader(self):
+        """Return the customer who has spent the most, or None if empty"""
+        if self._stale:
+            self._rebuild()
+        return self._leader
+
+    def top(self, k):
+        """Return up to k (customer, total) pairs, biggest spenders first"""
+        if k > MAX_TOP_SIZE:
+            return heapq.nlargest(k, self._totals.items(), key=_rank)
+        if k > self._size:
+            self._size = k  # Track enough spenders to answer this from now on
+            self._stale = True
+        if self._stale:
+            self._rebuild()
+        totals = self._totals
+        return sorted(((customer, totals[customer]) for customer in self._top),
+                      key=_rank, reverse=True)[:k]
+
+    def __len__(self):
+        return len(self._totals)
+
+    def __repr__(self):
+        return f"Leaderboard(customers={len(self._totals)})"
@@ -0,0 +1,35 @@
+import threading
+
+
+class LockStripes:
+    """A fixed pool of locks handed out by integer key
+
+    Customers and coffees each get a lock from their class's pool by id, so
+    threads working on different coffees rarely contend, without paying for
+    a lock object per coffee. Objects whose ids land on the same stripe
+    simply share a lock.
+    """
+
+    def __init__(self, count=64):
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        self._locks = tuple(threading.Lock() for _ in range(count))
+
+    def __call__(self, key):
+        """Return the lock guarding key"""
+        return self._locks[key % len(self._locks)]
+
+    def many(self, keys):
+        """Return the distinct locks guarding keys, in the order to take them
+
+        Threads that hold several stripes at once all take them in stripe
+        order, so they can't deadlock with each other.
+        """
+        count = len(self._locks)
+        return [self._locks[index] for index in sorted({key % count for key in keys})]
+
+    def __len__(self):
+        return len(self._locks)
+
+    def __repr__(self):
+        return f"LockStripes(count={len(self._locks)})"
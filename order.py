@@ -1,42 +1,460 @@
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from itertools import filterfalse
+
+COMPACT_RATIO = 4  # Adding an order compacts a history over 1/COMPACT_RATIO cancelled
+
+
+class BulkOrderError(ValueError):
+    """Raised when one or more records in a bulk order batch are invalid"""
+    
+    def __init__(self, errors):
+        self.errors = errors  # List of (record index, exception) pairs
+        details = "; ".join(f"record {index}: {error}" for index, error in errors)
+        super().__init__(f"{len(errors)} invalid order record(s): {details}")
+
+
 class Order:
+    # Plain orders use _customer/_coffee/_price/_cancelled, store-backed views use _row
+    __slots__ = ('_store', '_row', '_customer', '_coffee', '_price', '_created_at',
+                 '_cancelled')
+    clock = time.time  # Source of order creation times, replaceable in tests
+    # Callables run with each batch of newly attached orders (see add_listener)
+    _listeners = ()
+    # Callables run with each order as it is cancelled (see add_cancel_listener)
+    _cancel_listeners = ()
+    
     def __init__(self, customer, coffee, price):
-        # Validate and set customer
-        from customer import Customer
+        price = Order._validate(customer, coffee, price)
+        self._attach(customer, coffee, price, Order.clock())
+    
+    @staticmethod
+    def _validate(customer, coffee, price):
+        """Check one order's fields and return the price as a float"""
+        # Validate customer
         if not isinstance(customer, Customer):
             raise TypeError("Customer must be an instance of Customer class")
-        self._customer = customer
         
-        # Validate and set coffee
-        from coffee import Coffee
+        if customer._retired:
+            raise ValueError("Customer has been retired")
+        
+        # Validate coffee
         if not isinstance(coffee, Coffee):
             raise TypeError("Coffee must be an instance of Coffee class")
-        self._coffee = coffee
         
-        # Validate and set price
+        # Validate price
         if not isinstance(price, (int, float)):
             raise TypeError("Price must be a number")
         if not (1.0 <= price <= 10.0):
             raise ValueError("Price must be between 1.0 and 10.0")
-        self._price = float(price)
         
-        # Add this order to both customer and coffee order lists
-        customer._orders.append(self)
-        coffee._orders.append(self)
+        if customer._store is not coffee._store:
+            raise ValueError("Customer and coffee must share the same order store")
+        return float(price)
+    
+    def _attach(self, customer, coffee, price, created_at):
+        """Store a validated order and update the customer and coffee indexes"""
+        # Always customer lock then coffee lock, so threads can't deadlock
+        with customer._lock, coffee._lock:
+            # Checked again under the lock, as retire() may have run since _validate
+            if customer._retired:
+                raise ValueError("Customer has been retired")
+            store = customer._store
+            self._store = store
+            if store is None:
+                self._customer = customer
+                self._coffee = coffee
+                self._price = price
+                self._created_at = created_at
+                self._cancelled = False
+                
+                # Add this order to both customer and coffee order lists
+                customer._orders.append(self)
+                coffee._orders.append(self)
+            else:
+                # Store mode: the store holds the data, this object is just a view
+                self._row = store.append(customer, coffee, price, created_at)
+                if store.indexes_in_memory:
+                    customer._orders.append(self._row)
+                    coffee._orders.append(self._row)
+            
+            customer._version += 1
+            coffee._version += 1
+            if customer._tombstones or coffee._tombstones:
+                Order._compact_if_due(customer)
+                Order._compact_if_due(coffee)
+            if store is None or store.indexes_in_memory:
+                coffee._stats.add(price)
+                coffee._sales.add(created_at, price)
+                customer._coffee_counts[coffee] = customer._coffee_counts.get(coffee, 0) + 1
+                coffee._customer_counts[customer] = coffee._customer_counts.get(customer, 0) + 1
+                coffee._leaderboard.add(customer, price)
+        
+        for listener in Order._listeners:
+            listener((self,))
+    
+    @classmethod
+    def _attach_many(cls, customers, coffees, prices, created_ats=None, notify=True):
+        """Attach many validated orders given as parallel columns
+        
+        created_ats defaults to the current time for every order.
+        The batch is grouped by customer and coffee first, so each entity's
+        lists and aggregates are updated once per batch rather than once per
+        order. Returns the new orders, or None when notify is False (no
+        Order objects are needed then for store-backed rows).
+        """
+        if not prices:
+            return [] if notify else None
+        if created_ats is None:
+            created_ats = [Order.clock()] * len(prices)
+        # Hold every customer's lock for the whole batch, so none of them can
+        # be retired between the check below and their orders being indexed
+        distinct = set(customers)
+        with ExitStack() as held:
+            for lock in Customer._locks.many(customer._id for customer in distinct):
+                held.enter_context(lock)
+            if any(customer._retired for customer in distinct):
+                raise BulkOrderError([(index, ValueError("Customer has been retired"))
+                                      for index, customer in enumerate(customers)
+                                      if customer._retired])
+            store = customers[0]._store
+            if store is None:
+                items = []
+                for customer, coffee, price, created_at in zip(customers, coffees, prices,
+                                                               created_ats):
+                    order = cls.__new__(cls)
+                    order._store = None
+                    order._customer = customer
+                    order._coffee = coffee
+                    order._price = price
+                    order._created_at = created_at
+                    order._cancelled = False
+                    items.append(order)
+                orders = items
+            else:
+                items = store.extend(customers, coffees, prices, created_ats)
+                orders = [cls._view(store, row) for row in items] if notify else None
+            
+            # Stores that answer queries themselves need no in-memory indexes
+            if store is None or store.indexes_in_memory:
+                cls._index_many(customers, coffees, prices, created_ats, items)
+            else:
+                for customer in distinct:
+                    customer._version += 1
+                for coffee in set(coffees):
+                    with coffee._lock:
+                        coffee._version += 1
+        
+        if notify:
+            for listener in Order._listeners:
+                listener(orders)
+        return orders
+    
+    @classmethod
+    def _load_many(cls, store, customers, coffees, customer_ids, coffee_ids, prices,
+                   created_ats):
+        """Bulk-load orders given as id columns into an OrderStore and index them
+        
+        customers and coffees list every entity the id columns refer to.
+        The columns are copied into the store whole and the entity lists and
+        aggregates are then built from them in grouped passes, rather than
+        from per-order lists of entities as in _attach_many. No listeners
+        are notified. Returns the new rows.
+        """
+        with ExitStack() as held:
+            for lock in Customer._locks.many(customer._id for customer in customers):
+                held.enter_context(lock)
+            if any(customer._retired for customer in customers):
+                raise ValueError("Customer has been retired")
+            rows = store.load(customers, coffees, customer_ids, coffee_ids, prices, created_ats)
+            cls._index_rows(store, rows)
+        return rows
+    
+    @staticmethod
+    def _index_many(customers, coffees, prices, created_ats, items):
+        """Fold a batch of attached orders (or rows) into the entity lists and aggregates
+        
+        Call with every customer's lock held, as _attach_many does.
+        """
+        # Group by entity, in first-seen order so customers()/coffees() match
+        by_customer = {}  # customer -> (items, {coffee: count})
+        by_coffee = {}  # coffee -> (items, prices, {customer: [count, spend]}, created_ats)
+        for customer, coffee, price, created_at, item in zip(customers, coffees, prices,
+                                                             created_ats, items):
+            entry = by_customer.get(customer)
+            if entry is None:
+                entry = by_customer[customer] = ([], {})
+            entry[0].append(item)
+            entry[1][coffee] = entry[1].get(coffee, 0) + 1
+            
+            entry = by_coffee.get(coffee)
+            if entry is None:
+                entry = by_coffee[coffee] = ([], [], {}, [])
+            entry[0].append(item)
+            entry[1].append(price)
+            entry[3].append(created_at)
+            spend = entry[2].get(customer)
+            if spend is None:
+                entry[2][customer] = [1, price]
+            else:
+                spend[0] += 1
+                spend[1] += price
+        
+        # The caller holds every customer's lock; coffee locks are taken one at
+        # a time after them, the same customer-then-coffee order as _attach
+        for customer, (customer_items, counts) in by_customer.items():
+            customer._version += 1
+            customer._orders.extend(customer_items)
+            Order._compact_if_due(customer)
+            for coffee, count in counts.items():
+                coffee_counts = customer._coffee_counts
+                coffee_counts[coffee] = coffee_counts.get(coffee, 0) + count
+        for coffee, (coffee_items, coffee_prices, spends, times) in by_coffee.items():
+            with coffee._lock:
+                coffee._version += 1
+                coffee._orders.extend(coffee_items)
+                Order._compact_if_due(coffee)
+                coffee._stats.add_many(coffee_prices)
+                for created_at, price in zip(times, coffee_prices):
+                    coffee._sales.add(created_at, price)
+                customer_counts = coffee._customer_counts
+                for customer, (count, _) in spends.items():
+                    customer_counts[customer] = customer_counts.get(customer, 0) + count
+                coffee._leaderboard.add_many(
+                    (customer, total) for customer, (_, total) in spends.items())
+    
+    @staticmethod
+    def _index_rows(store, rows):
+        """Fold a range of store rows into the entity lists and aggregates
+        
+        The same as _index_many, but the batch is read from the store's
+        columns and grouped in a few passes over them, rather than order by
+        order. Call with every customer's lock held.
+        """
+        customer_ids, coffee_ids = store.customer_ids, store.coffee_ids
+        prices, created_ats = store.prices, store.created_ats
+        customers, coffees = store._customers, store._coffees
+        # Each entity's rows, in row order
+        customer_rows = defaultdict(list)
+        coffee_rows = defaultdict(list)
+        for row, customer_id, coffee_id in zip(rows, customer_ids[rows.start:rows.stop],
+                                               coffee_ids[rows.start:rows.stop]):
+            customer_rows[customer_id].append(row)
+            coffee_rows[coffee_id].append(row)
+        
+        for customer_id, items in customer_rows.items():
+            customer = customers[customer_id]
+            customer._version += 1
+            customer._orders.extend(items)
+            Order._compact_if_due(customer)
+            _add_counts(customer._coffee_counts, Counter(map(coffee_ids.__getitem__, items)),
+                        coffees)
+        for coffee_id, items in coffee_rows.items():
+            coffee = coffees[coffee_id]
+            buyers = list(map(customer_ids.__getitem__, items))
+            coffee_prices = list(map(prices.__getitem__, items))
+            counts = Counter(buyers)  # In first-order order
+            spends = dict.fromkeys(counts, 0)
+            for customer_id, price in zip(buyers, coffee_prices):
+                spends[customer_id] += price
+            with coffee._lock:
+                coffee._version += 1
+                coffee._orders.extend(items)
+                Order._compact_if_due(coffee)
+                coffee._stats.add_many(coffee_prices)
+                coffee._sales.add_many(map(created_ats.__getitem__, items), coffee_prices)
+                _add_counts(coffee._customer_counts, counts, customers)
+                coffee._leaderboard.add_many(zip(map(customers.__getitem__, spends),
+                                                 spends.values()))
+    
+    def cancel(self):
+        """Cancel this order, taking it out of every history and aggregate
+        
+        The order disappears from orders(), num_orders(), average_price(),
+        customers(), coffees(), most_aficionado() and the recent-sales
+        windows straight away, each updated in O(1) (plus a re-rank of one
+        spend leaderboard entry). In memory the order is only marked as a
+        tombstone; each history drops its tombstones in one pass on the next
+        positional read, or on the next order added once over 1/COMPACT_RATIO
+        of it is cancelled. Cancelling never compacts, so it is safe while
+        iterating over orders(), e.g. to refund every order in a loop.
+        A customer whose first order is cancelled keeps their place in
+        customers() (and a coffee its place in coffees()) while they have
+        other orders. Raises ValueError if the order was already cancelled.
+        """
+        customer, coffee = self.customer, self.coffee
+        price, created_at = self.price, self.created_at
+        with customer._lock, coffee._lock:
+            store = self._store
+            if self.cancelled:
+                raise ValueError("Order has already been cancelled")
+            if store is None:
+                self._cancelled = True
+            else:
+                store.cancel(self._row)
+            
+            customer._version += 1
+            coffee._version += 1
+            coffee._sketches = None  # Sketches can't forget an order, so rebuild them on demand
+            if store is None or store.indexes_in_memory:
+                coffee._stats.remove(price)
+                coffee._sales.remove(created_at, price)
+                count = customer._coffee_counts[coffee] - 1
+                if count:
+                    customer._coffee_counts[coffee] = count
+                else:
+                    del customer._coffee_counts[coffee]
+                count = coffee._customer_counts[customer] - 1
+                if count:
+                    coffee._customer_counts[customer] = count
+                    if not customer._retired:  # Retired customers are already off the leaderboard
+                        coffee._leaderboard.add(customer, -price)
+                else:
+                    del coffee._customer_counts[customer]
+                    coffee._leaderboard.remove(customer)
+                customer._tombstones += 1
+                coffee._tombstones += 1
+        
+        for listener in Order._cancel_listeners:
+            listener(self)
+    
+    @staticmethod
+    def _compact_if_due(entity):
+        """Compact entity's history if over 1/COMPACT_RATIO of it is cancelled (lock held)"""
+        if entity._tombstones * COMPACT_RATIO > len(entity._orders):
+            entity._compact()
+    
+    @property
+    def cancelled(self):
+        """Whether this order has been cancelled"""
+        if self._store is not None:
+            return self._store.is_cancelled(self._row)
+        return self._cancelled
+    
+    @staticmethod
+    def _live_items(items, store):
+        """Return a copy of a history (orders or store rows) without its cancelled orders"""
+        if store is None:
+            return [order for order in items if not order._cancelled]
+        live = store.new_rows()
+        live.extend(filterfalse(store.is_cancelled, items))
+        return live
+    
+    @classmethod
+    def add_listener(cls, listener):
+        """Call listener(orders) with every batch of orders created from now on"""
+        Order._listeners = Order._listeners + (listener,)
+    
+    @classmethod
+    def remove_listener(cls, listener):
+        """Stop calling a listener registered with add_listener"""
+        Order._listeners = tuple(l for l in Order._listeners if l != listener)
+    
+    @classmethod
+    def add_cancel_listener(cls, listener):
+        """Call listener(order) with every order cancelled from now on"""
+        Order._cancel_listeners = Order._cancel_listeners + (listener,)
+    
+    @classmethod
+    def remove_cancel_listener(cls, listener):
+        """Stop calling a listener registered with add_cancel_listener"""
+        Order._cancel_listeners = tuple(l for l in Order._cancel_listeners if l != listener)
+    
+    @classmethod
+    def bulk_create(cls, records):
+        """Create orders from (customer, coffee, price) records, all or nothing
+        
+        Every record is validated before any order is attached; if any are
+        invalid a BulkOrderError listing all of them is raised and nothing
+        is created.
+        """
+        records = list(records)
+        prices = []
+        errors = []
+        for index, record in enumerate(records):
+            try:
+                if not isinstance(record, tuple) or len(record) != 3:
+                    raise TypeError("Record must be a (customer, coffee, price) tuple")
+                prices.append(cls._validate(*record))
+            except (TypeError, ValueError) as error:
+                errors.append((index, error))
+        if not errors and records:
+            # The batch is attached in one go, so it must all use one store
+            store = records[0][0]._store
+            for index, record in enumerate(records):
+                if record[0]._store is not store:
+                    errors.append((index, ValueError("All orders in a batch must share one order store")))
+        if errors:
+            raise BulkOrderError(errors)
+        
+        customers = [record[0] for record in records]
+        coffees = [record[1] for record in records]
+        return cls._attach_many(customers, coffees, prices)
+    
+    @classmethod
+    def _view(cls, store, row):
+        """Return an Order view over an existing OrderStore row"""
+        order = cls.__new__(cls)
+        order._store = store
+        order._row = row
+        return order
     
     @property
     def customer(self):
         """Getter for customer (immutable once set)"""
+        if self._store is not None:
+            return self._store.customer(self._row)
         return self._customer
     
     @property
     def coffee(self):
         """Getter for coffee (immutable once set)"""
+        if self._store is not None:
+            return self._store.coffee(self._row)
         return self._coffee
     
     @property
     def price(self):
         """Getter for price (immutable once set)"""
+        if self._store is not None:
+            return self._store.price(self._row)
         return self._price
     
+    @property
+    def created_at(self):
+        """Getter for the order's creation time, in seconds since the epoch"""
+        if self._store is not None:
+            return self._store.created_at(self._row)
+        return self._created_at
+    
+    def __eq__(self, other):
+        if not isinstance(other, Order):
+            return NotImplemented
+        if self._store is None:
+            return self is other
+        # Views over the same stored row are the same order
+        return self._store is other._store and self._row == other._row
+    
+    def __hash__(self):
+        if self._store is None:
+            return object.__hash__(self)
+        return hash((id(self._store), self._row))
+    
     def __repr__(self):
-        return f"Order(customer={self.customer.name}, coffee={self.coffee.name}, price={self.price})"
\ No newline at end of file
+        return f"Order(customer={self.customer.name}, coffee={self.coffee.name}, price={self.price})"
+
+
+def _add_counts(totals, counts, entities):
+    """Add counts keyed by entity id into totals keyed by entity, keeping first-seen order"""
+    if not totals:
+        totals.update(zip(map(entities.__getitem__, counts), counts.values()))
+        return
+    for entity_id, count in counts.items():
+        entity = entities[entity_id]
+        totals[entity] = totals.get(entity, 0) + count
+
+
+# Imported at the bottom to avoid circular imports
+from coffee import Coffee  # noqa: E402
+from customer import Customer  # noqa: E402
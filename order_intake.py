@@ -0,0 +1,159 @@
+import asyncio
+from itertools import compress
+
+from order import BulkOrderError, Order
+
+_STOP = object()  # Queue sentinel telling the worker to finish up
+
+
+class OrderIntake:
+    """Asynchronous order intake that micro-batches orders into the models
+
+    Callers await submit_order(); orders are queued on a bounded queue (so
+    producers wait when the model layer falls behind) and a single worker
+    task drains whatever is queued, up to batch_size orders, and attaches the
+    valid ones in one Order bulk pass. Each caller gets back its own Order,
+    or its own validation error - one bad order never fails the others.
+
+    Once stop() is called, new submissions raise RuntimeError. Orders that
+    were already waiting for room in the queue are still processed; any
+    that reach it after the worker has finished fail with RuntimeError
+    instead of waiting forever.
+
+        async with OrderIntake() as intake:
+            order = await intake.submit_order(customer, coffee, 3.5)
+    """
+
+    def __init__(self, max_pending=1000, batch_size=256, linger=0.0):
+        if max_pending < 1 or batch_size < 1:
+            raise ValueError("max_pending and batch_size must be at least 1")
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.linger = linger  # Seconds to wait for a batch to fill up
+        self._queue = None
+        self._worker = None
+        self._stopping = False
+
+    async def start(self):
+        """Start the batching worker on the running event loop"""
+        if self._worker is not None:
+            raise RuntimeError("Intake is already running")
+        self._stopping = False
+        self._queue = asyncio.Queue(self.max_pending)
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        """Process everything already submitted, then stop the worker"""
+        if self._worker is None:
+            return
+        if self._stopping:
+            await self._worker  # Another caller is already stopping it
+            return
+        self._stopping = True  # Before the sentinel goes in, so nothing can follow it unseen
+        queue = self._queue
+        await queue.put(_STOP)
+        try:
+            await self._worker
+        finally:
+            self._worker = None
+            self._fail_queued(queue)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def submit_order(self, customer, coffee, price):
+        """Queue an order and return the created Order once it is attached
+
+        Raises the same TypeError/ValueError as Order(customer, coffee, price)
+        would for invalid input.
+        """
+        if self._worker is None or self._stopping:
+            raise RuntimeError("Intake is not running")
+        queue, worker = self._queue, self._worker
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((customer, coffee, price, future))  # Waits while the queue is full
+        if worker.done():  # Nobody will read the queue again
+            self._fail_queued(queue)
+        return await future
+
+    @staticmethod
+    def _fail_queued(queue):
+        """Fail every order left in a queue whose worker has finished"""
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if item is not _STOP and not item[3].done():
+                item[3].set_exception(RuntimeError("Intake stopped before the order was processed"))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._process(batch)
+
+    @staticmethod
+    def _process(batch):
+        """Validate each queued order, attach the valid ones in bulk, resolve futures"""
+        by_store = {}  # Store -> parallel columns; a bulk attach needs a single store
+        for customer, coffee, price, future in batch:
+            if future.cancelled():
+                continue
+            try:
+                price = Order._validate(customer, coffee, price)
+            except (TypeError, ValueError) as error:
+                future.set_exception(error)
+                continue
+            columns = by_store.setdefault(customer._store, ([], [], [], []))
+            for column, value in zip(columns, (customer, coffee, price, future)):
+                column.append(value)
+        
+        for customers, coffees, prices, futures in by_store.values():
+            try:
+                while True:
+                    try:
+                        orders = Order._attach_many(customers, coffees, prices)
+                        break
+                    except BulkOrderError as error:
+                        # Customers retired since validation: fail just their orders
+                        failed = dict(error.errors)
+                        for index, reason in failed.items():
+                            if not futures[index].done():
+                                futures[index].set_exception(reason)
+                        keep = [index not in failed for index in range(len(futures))]
+                        customers, coffees, prices, futures = (
+                            list(compress(column, keep))
+                            for column in (customers, coffees, prices, futures))
+            except Exception as error:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for future, order in zip(futures, orders):
+                if not future.done():  # The caller may have given up meanwhile
+                    future.set_result(order)
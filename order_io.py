@@ -0,0 +1,173 @@
+import csv
+import json
+import os
+from contextlib import contextmanager
+
+from coffee import Coffee
+from customer import Customer
+from order import BulkOrderError, Order
+
+FIELDS = ('customer', 'coffee', 'price')
+IMPORT_CHUNK = 10_000  # Orders created per bulk_create call
+
+
+@contextmanager
+def _opened(target, mode):
+    """Open target if it is a path, or use it as-is if it is already a file"""
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, mode, encoding='utf-8', newline='') as f:
+            yield f
+    else:
+        yield target
+
+
+def _format(target, format):
+    if format is None:
+        name = os.fspath(target) if isinstance(target, (str, os.PathLike)) else ''
+        format = 'jsonl' if name.endswith(('.jsonl', '.ndjson')) else 'csv'
+    if format not in ('csv', 'jsonl'):
+        raise ValueError(f"Unknown format {format!r}, expected 'csv' or 'jsonl'")
+    return format
+
+
+def read_records(source, format=None):
+    """Yield (line number, customer name, coffee name, price text) from source
+
+    source is a path or an open text file. CSV rows are customer,coffee,price
+    with an optional header row naming those columns (in any order, among
+    others); JSONL lines are objects with customer, coffee and price keys.
+    Rows are read one at a time, so memory does not grow with the file.
+    """
+    format = _format(source, format)
+    with _opened(source, 'r') as f:
+        if format == 'jsonl':
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict):
+                    yield line_number, None, None, None  # Rejected as malformed
+                    continue
+                yield (line_number, record.get('customer'), record.get('coffee'),
+                       record.get('price'))
+            return
+        reader = csv.reader(f)
+        columns = (0, 1, 2)
+        for row in reader:
+            if not row:
+                continue
+            if reader.line_num == 1:
+                names = [value.strip().lower() for value in row]
+                if set(FIELDS) <= set(names):
+                    columns = tuple(names.index(field) for field in FIELDS)
+                    continue
+            if len(row) <= max(columns):
+                yield reader.line_num, None, None, None  # Rejected as a short row
+                continue
+            yield (reader.line_num, row[columns[0]], row[columns[1]], row[columns[2]])
+
+
+def import_orders(source, format=None, chunk_size=IMPORT_CHUNK):
+    """Create orders from a CSV or JSONL file and return how many were created
+
+    Customers and coffees are looked up by name and created if missing.
+    Orders are created chunk_size at a time with Order.bulk_create, so each
+    chunk is all or nothing: a chunk with bad rows raises BulkOrderError
+    whose indexes are the file's line numbers, and earlier chunks stay
+    imported. Entities named in a rejected chunk are still created.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    customers = {}  # name -> Customer, so each name is resolved once
+    coffees = {}  # name -> Coffee
+    created = 0
+    chunk = []
+    line_numbers = []
+    errors = []
+    for line_number, customer_name, coffee_name, price in read_records(source, format):
+        try:
+            if customer_name is None or coffee_name is None or price is None:
+                raise ValueError("Record must have a customer, coffee and price")
+            customer = customers.get(customer_name)
+            if customer is None:
+                customer = Customer.find(customer_name) or Customer(customer_name)
+                customers[customer_name] = customer
+            coffee = coffees.get(coffee_name)
+            if coffee is None:
+                coffee = Coffee.find(coffee_name) or Coffee(coffee_name)
+                coffees[coffee_name] = coffee
+            if isinstance(price, str):
+                price = float(price)
+        except (TypeError, ValueError) as error:
+            errors.append((line_number, error))
+            continue
+        chunk.append((customer, coffee, price))
+        line_numbers.append(line_number)
+        if len(chunk) + len(errors) >= chunk_size:
+            created += _create_chunk(chunk, line_numbers, errors)
+            chunk, line_numbers, errors = [], [], []
+    if chunk or errors:
+        created += _create_chunk(chunk, line_numbers, errors)
+    return created
+
+
+def _create_chunk(chunk, line_numbers, unparsed):
+    """Create one chunk of orders, or raise BulkOrderError keyed by line number"""
+    if not unparsed:
+        try:
+            Order.bulk_create(chunk)
+            return len(chunk)
+        except BulkOrderError as error:
+            invalid = error.errors
+    else:
+        # Unparseable rows sink the chunk, but report the other bad rows too
+        invalid = []
+        for index, record in enumerate(chunk):
+            try:
+                Order._validate(*record)
+            except (TypeError, ValueError) as error:
+                invalid.append((index, error))
+    errors = unparsed + [(line_numbers[index], error) for index, error in invalid]
+    raise BulkOrderError(sorted(errors, key=lambda item: item[0]))
+
+
+def iter_records(coffees=None):
+    """Yield (customer name, coffee name, price) for every order, coffee by coffee
+
+    Each coffee's history is read through its orders() view, so nothing is
+    copied; orders created after a coffee's turn starts are not included.
+    """
+    for coffee in list(Coffee._registry() if coffees is None else coffees):
+        name = coffee.name
+        if coffee._pushdown:
+            for customer, price in coffee._store.iter_coffee_orders(coffee):
+                yield customer.name, name, price
+            continue
+        for order in coffee.orders():
+            yield order.customer.name, name, order.price
+
+
+def export_orders(destination, coffees=None, format=None):
+    """Write every order to a CSV or JSONL file and return how many were written
+
+    The CSV has a customer,coffee,price header, so the file can be read
+    back with import_orders().
+    """
+    format = _format(destination, format)
+    written = 0
+    with _opened(destination, 'w') as f:
+        if format == 'csv':
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(FIELDS)
+            for record in iter_records(coffees):
+                writer.writerow(record)
+                written += 1
+        else:
+            for customer_name, coffee_name, price in iter_records(coffees):
+                f.write(json.dumps({'customer': customer_name, 'coffee': coffee_name,
+                                    'price': price}) + '\n')
+                written += 1
+    return written
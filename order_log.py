@@ -0,0 +1,384 @@
+import gc
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import Counter
+from itertools import compress, count
+from operator import and_
+
+RECORD = struct.Struct('=qqdd')  # customer id, coffee id, price, timestamp
+# magic, order count, then the bytes of the log and of the cancels file it covers
+SNAPSHOT_HEADER = struct.Struct('=8sqqq')
+SNAPSHOT_MAGIC = b'CSHOPSN2'
+COVERED = struct.Struct('=qq')  # The covered byte counts, at the end of SNAPSHOT_HEADER
+OLD_SNAPSHOT_HEADER = struct.Struct('=8sq')  # Earlier snapshots: magic, order count
+OLD_SNAPSHOT_MAGIC = b'CSHOPSN1'
+RESTORE_CHUNK = 1 << 20  # Orders attached per batch while restoring
+
+
+class OrderLog:
+    """Append-only binary order log with snapshots for fast restarts
+
+    Four files live next to path:
+
+    - path: fixed-width RECORD entries, appended as orders are created
+    - path.cancels: a RECORD for each cancelled order, repeating its fields
+    - path.names: one JSON line per customer/coffee the log has seen,
+      mapping the log's own id to a kind and name
+    - path.snapshot: SNAPSHOT_HEADER followed by four contiguous columns
+      (customer ids, coffee ids, prices, timestamps) written by checkpoint()
+
+    The snapshot header records how many bytes of the log and of the
+    cancels file it already covers, and reads skip that much of each.
+    checkpoint() truncates both files only after the new snapshot is on
+    disk, so a crash at any point neither loses orders nor counts them or
+    their cancellations twice.
+
+    Ids are assigned by the log rather than taken from Customer.id/Coffee.id,
+    so they stay stable across restarts. Names are recorded when an entity
+    is first logged; later renames are not tracked. A cancel record removes
+    one logged order with the same fields when the log is read, so restore()
+    and checkpoint() leave cancelled orders out; orders with identical
+    fields are interchangeable, so it doesn't matter which one. Files use
+    native byte order, so logs are not portable between big- and
+    little-endian machines.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids = {}  # customer or coffee -> log id
+        self._known = {}  # log id -> (kind, name), read from the names file
+        if os.path.exists(self._names_path):
+            with open(self._names_path, 'r+b') as f:
+                good = 0  # Bytes of complete lines
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    self._known[entry['id']] = (entry['kind'], entry['name'])
+                    good += len(line)
+                f.truncate(good)  # Drop a torn last line, from a crash mid-write
+        self._next_id = max(self._known, default=0) + 1
+        for records_path in (path, self._cancels_path):
+            if os.path.exists(records_path):
+                size = os.path.getsize(records_path)
+                if size % RECORD.size:
+                    # Drop a torn last record, so records appended now line up
+                    os.truncate(records_path, size - size % RECORD.size)
+        self._log = open(path, 'ab')
+        self._cancels = open(self._cancels_path, 'ab')
+        self._names = open(self._names_path, 'a', encoding='utf-8')
+        self._forget_truncated()
+        self._attached = False
+
+    @property
+    def _names_path(self):
+        return self.path + '.names'
+
+    @property
+    def _cancels_path(self):
+        return self.path + '.cancels'
+
+    @property
+    def _snapshot_path(self):
+        return self.path + '.snapshot'
+
+    def attach(self):
+        """Start logging every order created or cancelled from now on"""
+        if not self._attached:
+            Order.add_listener(self._record)
+            Order.add_cancel_listener(self._record_cancel)
+            self._attached = True
+        return self
+
+    def detach(self):
+        """Stop logging new orders and cancellations"""
+        if self._attached:
+            Order.remove_listener(self._record)
+            Order.remove_cancel_listener(self._record_cancel)
+            self._attached = False
+
+    def _log_id(self, entity, kind):
+        log_id = self._ids.get(entity)
+        if log_id is None:
+            log_id = self._ids[entity] = self._next_id
+            self._next_id += 1
+            self._known[log_id] = (kind, entity.name)
+            self._names.write(json.dumps({'id': log_id, 'kind': kind, 'name': entity.name}) + '\n')
+            # Reach the OS before any record using the id can, so a crash
+            # never leaves records whose names are lost
+            self._names.flush()
+        return log_id
+
+    def _record(self, orders):
+        with self._lock:
+            records = [RECORD.pack(self._log_id(order.customer, 'customer'),
+                                   self._log_id(order.coffee, 'coffee'), order.price,
+                                   order.created_at)
+                       for order in orders]
+            self._log.write(b''.join(records))
+
+    def _record_cancel(self, order):
+        with self._lock:
+            customer_id = self._ids.get(order.customer)
+            coffee_id = self._ids.get(order.coffee)
+            if customer_id is None or coffee_id is None:
+                return  # Its customer or coffee was never logged, so neither was the order
+            self._cancels.write(RECORD.pack(customer_id, coffee_id, order.price,
+                                            order.created_at))
+
+    def flush(self, fsync=False):
+        """Push buffered records to the OS (and to disk if fsync is true)"""
+        with self._lock:
+            for f in (self._names, self._log, self._cancels):
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+
+    def close(self):
+        """Stop logging and close the log files"""
+        self.detach()
+        self.flush()
+        self._names.close()
+        self._log.close()
+        self._cancels.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read_header(self):
+        """Return (order count, header size, log bytes covered, cancel bytes covered)"""
+        if not os.path.exists(self._snapshot_path):
+            return 0, 0, 0, 0
+        with open(self._snapshot_path, 'rb') as f:
+            header = f.read(SNAPSHOT_HEADER.size)
+        if header[:8] == SNAPSHOT_MAGIC and len(header) == SNAPSHOT_HEADER.size:
+            _, count, log_covered, cancels_covered = SNAPSHOT_HEADER.unpack(header)
+            return count, SNAPSHOT_HEADER.size, log_covered, cancels_covered
+        if header[:8] == OLD_SNAPSHOT_MAGIC:
+            return OLD_SNAPSHOT_HEADER.unpack_from(header)[1], OLD_SNAPSHOT_HEADER.size, 0, 0
+        raise ValueError(f"{self._snapshot_path} is not an order snapshot")
+
+    def _covered(self):
+        """Return how many bytes at the start of the log and the cancels file to skip
+
+        A file shorter than the snapshot says it covers was truncated after
+        the snapshot was written, so none of what it holds now is covered.
+        """
+        _, _, log_covered, cancels_covered = self._read_header()
+        self._log.flush()
+        self._cancels.flush()
+        if os.path.getsize(self.path) < log_covered:
+            log_covered = 0
+        if os.path.getsize(self._cancels_path) < cancels_covered:
+            cancels_covered = 0
+        return log_covered, cancels_covered
+
+    def _forget_truncated(self):
+        """Reset covered byte counts left behind by a crash during checkpoint()
+
+        Otherwise records appended from now on would be skipped as covered
+        once the truncated file grew back past the old count.
+        """
+        recorded = self._read_header()[2:]
+        if recorded != (0, 0):
+            covered = self._covered()
+            if covered != recorded:
+                self._write_covered(*covered)
+
+    def _write_covered(self, log_covered, cancels_covered):
+        with open(self._snapshot_path, 'r+b') as f:
+            f.seek(SNAPSHOT_HEADER.size - COVERED.size)
+            f.write(COVERED.pack(log_covered, cancels_covered))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_snapshot(self):
+        customer_ids, coffee_ids = array('q'), array('q')
+        prices, timestamps = array('d'), array('d')
+        count, offset, _, _ = self._read_header()
+        if count:
+            with open(self._snapshot_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                view = memoryview(data)
+                for column in (customer_ids, coffee_ids, prices, timestamps):
+                    end = offset + count * column.itemsize
+                    column.frombytes(view[offset:end])
+                    offset = end
+                view.release()
+        return customer_ids, coffee_ids, prices, timestamps
+
+    def _read_records(self, log, start=0):
+        log.flush()
+        with open(log.name, 'rb') as f:
+            f.seek(start)
+            data = f.read()
+        # Ignore a torn record at the end, e.g. from a crash mid-write
+        data = data[:len(data) - len(data) % RECORD.size]
+        fields = 4  # Every RECORD field is 8 bytes wide
+        as_ints = memoryview(data).cast('q')
+        as_floats = memoryview(data).cast('d')
+        return (array('q', as_ints[0::fields]), array('q', as_ints[1::fields]),
+                array('d', as_floats[2::fields]), array('d', as_floats[3::fields]))
+
+    def _read_all(self):
+        log_covered, cancels_covered = self._covered()
+        columns = self._read_snapshot()
+        for column, more in zip(columns, self._read_records(self._log, log_covered)):
+            column.extend(more)
+        columns = self._drop_unknown(columns)
+        cancels = self._read_records(self._cancels, cancels_covered)
+        if cancels[2]:
+            columns = _drop_cancelled(columns, cancels)
+        return columns
+
+    def _drop_unknown(self, columns):
+        """Return the columns without orders whose customer or coffee has no name
+
+        Names are flushed before any record using them, so this only trims
+        records left behind by a lost or damaged names file.
+        """
+        customers = {i for i, (kind, _) in self._known.items() if kind == 'customer'}
+        coffees = {i for i, (kind, _) in self._known.items() if kind == 'coffee'}
+        customer_ids, coffee_ids = columns[:2]
+        if customers.issuperset(customer_ids) and coffees.issuperset(coffee_ids):
+            return columns
+        keep = bytes(map(and_, map(customers.__contains__, customer_ids),
+                         map(coffees.__contains__, coffee_ids)))
+        return tuple(array(column.typecode, compress(column, keep)) for column in columns)
+
+    def restore(self):
+        """Rebuild customers, coffees and orders from the snapshot and log
+
+        Call this at start-up, before any new orders are logged. Returns
+        (customers, coffees) as lists in the order the log first saw them.
+        Records naming an id the names file doesn't have are skipped.
+
+        Reading the files is quick; rebuilding every entity's history and
+        aggregates dominates. With an OrderStore active, the columns are
+        copied into the store whole and indexed in grouped passes, at about
+        5 s per million orders on one core; otherwise every order becomes an
+        Order object, at about 6 s per million.
+        """
+        with self._lock:
+            if self._ids:
+                raise RuntimeError("restore() must run before any new orders are logged")
+            entities = {}
+            for log_id, (kind, name) in sorted(self._known.items()):
+                entity = Customer(name) if kind == 'customer' else Coffee(name)
+                entities[log_id] = entity
+                self._ids[entity] = log_id
+            customer_ids, coffee_ids, prices, created_ats = self._read_all()
+        customers = [e for e in entities.values() if isinstance(e, Customer)]
+        coffees = [e for e in entities.values() if isinstance(e, Coffee)]
+        store = customers[0]._store if customers else None
+        
+        # Restoring allocates millions of objects and no garbage, so the
+        # cyclic collector would only rescan the growing heap over and over
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if isinstance(store, OrderStore):
+                # Columns of the store's own entity ids, indexed by log id
+                entity_ids = [0] * self._next_id
+                for log_id, entity in entities.items():
+                    entity_ids[log_id] = entity.id
+                for start in range(0, len(prices), RESTORE_CHUNK):
+                    end = start + RESTORE_CHUNK
+                    Order._load_many(store, customers, coffees,
+                                     array('q', map(entity_ids.__getitem__,
+                                                    customer_ids[start:end])),
+                                     array('q', map(entity_ids.__getitem__,
+                                                    coffee_ids[start:end])),
+                                     prices[start:end], created_ats[start:end])
+            else:
+                for start in range(0, len(prices), RESTORE_CHUNK):
+                    end = start + RESTORE_CHUNK
+                    Order._attach_many([entities[i] for i in customer_ids[start:end]],
+                                       [entities[i] for i in coffee_ids[start:end]],
+                                       prices[start:end], created_ats[start:end],
+                                       notify=False)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return customers, coffees
+
+    def checkpoint(self):
+        """Fold the log into a fresh snapshot and truncate the log
+
+        The snapshot is on disk, recording which bytes of the log and
+        cancels file it covers, before either is truncated.
+        """
+        with self._lock:
+            self._names.flush()
+            columns = self._read_all()
+            log_size = os.path.getsize(self.path)
+            cancels_size = os.path.getsize(self._cancels_path)
+            temp_path = self._snapshot_path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(columns[2]), log_size,
+                                             cancels_size))
+                for column in columns:
+                    f.write(column.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._snapshot_path)
+            _fsync_directory(self._snapshot_path)
+            for records in (self._log, self._cancels):
+                records.truncate(0)
+                os.fsync(records.fileno())
+            self._write_covered(0, 0)
+
+    def __len__(self):
+        """Return the number of orders logged, less the cancel records"""
+        with self._lock:
+            log_covered, cancels_covered = self._covered()
+            logged = (os.path.getsize(self.path) - log_covered) // RECORD.size
+            logged -= (os.path.getsize(self._cancels_path) - cancels_covered) // RECORD.size
+            return logged + self._read_header()[0]
+
+    def __repr__(self):
+        return f"OrderLog(path='{self.path}')"
+
+
+def _fsync_directory(path):
+    """Make a rename into path's directory durable (a no-op where unsupported)"""
+    if os.name != 'posix':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _drop_cancelled(columns, cancels):
+    """Return the columns without one matching order per cancel record"""
+    pending = Counter(zip(*cancels))
+    timestamps = {key[3] for key in pending}
+    customer_ids, coffee_ids, prices, created_ats = columns
+    keep = bytearray(b'\x01') * len(prices)
+    # Only orders placed at a cancelled order's timestamp need a closer look
+    for index in compress(count(), map(timestamps.__contains__, created_ats)):
+        key = (customer_ids[index], coffee_ids[index], prices[index], created_ats[index])
+        if pending[key]:
+            pending[key] -= 1
+            keep[index] = 0
+    return tuple(array(column.typecode, compress(column, keep)) for column in columns)
+
+
+# Imported at the bottom to avoid circular imports
+from coffee import Coffee  # noqa: E402
+from customer import Customer  # noqa: E402
+from order import Order  # noqa: E402
+from order_store import OrderStore  # noqa: E402
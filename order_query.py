@@ -0,0 +1,161 @@
+from collections import namedtuple
+
+from coffee import Coffee
+from customer import Customer
+
+
+class GroupStats(namedtuple('GroupStats', ['count', 'total'])):
+    """Order count and total spent for one group of an OrderQuery"""
+
+    __slots__ = ()
+
+    @property
+    def average(self):
+        """Mean order price in the group, or 0 if it is empty"""
+        return self.total / self.count if self.count else 0
+
+
+class OrderQuery:
+    """Filter and aggregate orders by customer, coffee and price range
+
+        latte_spend = OrderQuery(coffee=latte).group_by('customer')
+        big_spenders = [c for c, stats in latte_spend.items() if stats.total > 50]
+        cheap = OrderQuery(coffee=espresso, min_price=3, max_price=4).orders()
+
+    Queries are answered coffee by coffee from the models' own indexes
+    instead of scanning every order:
+
+    - without a price filter, per-customer counts and spend come straight
+      from each coffee's distinct-customer counts and spend leaderboard
+    - a price filter looks positions up in the coffee's sorted price index
+    - a customer filter limits the coffees visited to those the customer
+      has ordered
+    - coffees in a store without in-memory indexes run the query in SQL
+
+    Results list coffees in registry order (or the customer's first-order
+    order) and each coffee's orders in history order. Price bounds are
+    inclusive.
+    """
+
+    def __init__(self, customer=None, coffee=None, min_price=None, max_price=None):
+        if customer is not None and not isinstance(customer, Customer):
+            raise TypeError("customer must be a Customer instance")
+        if coffee is not None and not isinstance(coffee, Coffee):
+            raise TypeError("coffee must be a Coffee instance")
+        for bound in (min_price, max_price):
+            if bound is not None and not isinstance(bound, (int, float)):
+                raise TypeError("Price bounds must be numbers")
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValueError("min_price must not be greater than max_price")
+        self.customer = customer
+        self.coffee = coffee
+        self.min_price = min_price
+        self.max_price = max_price
+
+    def where(self, **filters):
+        """Return a new query with some filters replaced"""
+        current = {'customer': self.customer, 'coffee': self.coffee,
+                   'min_price': self.min_price, 'max_price': self.max_price}
+        unknown = set(filters) - set(current)
+        if unknown:
+            raise TypeError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+        current.update(filters)
+        return OrderQuery(**current)
+
+    @property
+    def _price_filtered(self):
+        return self.min_price is not None or self.max_price is not None
+
+    def _coffees(self):
+        if self.coffee is not None:
+            return [self.coffee]
+        if self.customer is not None:
+            return self.customer.coffees()
+        return list(Coffee._registry())
+
+    def orders(self):
+        """Return the matching orders as a list"""
+        matches = []
+        for coffee in self._coffees():
+            matches.extend(self._coffee_orders(coffee))
+        return matches
+
+    def group_by(self, key):
+        """Return {customer or coffee: GroupStats} for the matching orders
+
+        Groups are listed as they are first met: coffees in result order,
+        customers in each coffee's first-order order.
+        """
+        if key not in ('customer', 'coffee'):
+            raise ValueError("Can only group by 'customer' or 'coffee'")
+        groups = {}
+        for coffee in self._coffees():
+            for customer, (count, total) in self._coffee_totals(coffee).items():
+                group = groups.setdefault(customer if key == 'customer' else coffee, [0, 0.0])
+                group[0] += count
+                group[1] += total
+        return {group: GroupStats(count, total) for group, (count, total) in groups.items()}
+
+    def stats(self):
+        """Return GroupStats over all matching orders"""
+        groups = self.group_by('coffee').values()
+        return GroupStats(sum(group.count for group in groups),
+                          sum(group.total for group in groups))
+
+    def count(self):
+        """Return how many orders match"""
+        return self.stats().count
+
+    def total(self):
+        """Return the total price of the matching orders"""
+        return self.stats().total
+
+    def average(self):
+        """Return the mean price of the matching orders, or 0 if none match"""
+        return self.stats().average
+
+    def _coffee_orders(self, coffee):
+        """Return coffee's matching orders in history order"""
+        customer = self.customer
+        if coffee._pushdown:
+            return coffee._store.query_orders(coffee, customer, self.min_price, self.max_price)
+        if self._price_filtered:
+            candidates = coffee._priced_orders(self.min_price, self.max_price)
+            if customer is None:
+                return candidates
+            return [order for order in candidates if order.customer is customer]
+        if customer is None:
+            return list(coffee.orders())
+        # The customer's own history is usually far shorter than the coffee's
+        return [order for order in customer.orders() if order.coffee is coffee]
+
+    def _coffee_totals(self, coffee):
+        """Return {customer: (count, total)} for coffee's matching orders"""
+        if coffee._pushdown:
+            return coffee._store.query_totals(coffee, self.customer, self.min_price,
+                                              self.max_price)
+        if not self._price_filtered:
+            return self._indexed_totals(coffee)
+        totals = {}
+        for order in self._coffee_orders(coffee):
+            entry = totals.setdefault(order.customer, [0, 0.0])
+            entry[0] += 1
+            entry[1] += order.price
+        return totals
+
+    def _indexed_totals(self, coffee):
+        """Return per-customer totals from the coffee's count and spend indexes"""
+        with coffee._lock:
+            counts = coffee._customer_counts
+            if self.customer is not None:
+                counts = {self.customer: counts[self.customer]} if self.customer in counts else {}
+            totals = {}
+            for customer, count in counts.items():
+                if customer.retired:
+                    # Retired customers leave the leaderboard, so add up their own orders
+                    spent = sum(order.price for order in customer.orders()
+                                if order.coffee is coffee)
+                else:
+                    spent = coffee._leaderboard.total(customer)
+                totals[customer] = (count, spent)
+            return totals
@@ -0,0 +1,112 @@
+from collections.abc import Sequence
+from itertools import filterfalse, islice
+from operator import attrgetter
+
+_is_cancelled = attrgetter('_cancelled')
+
+
+class OrderView(Sequence):
+    """Read-only, copy-free view of a customer's or coffee's order history
+
+    The view wraps the owner's own order list (or array of OrderStore row
+    numbers) instead of copying it, and builds Order views for stored rows
+    only as they are read. It is live: orders attached later show up in
+    len() and indexing, and cancelled ones drop out. Iteration covers the
+    orders present when it starts. Slicing returns another view over a
+    fixed range of positions, so view[-10:] costs O(1) no matter how long
+    the history is; cancelling an order shifts the positions after it.
+
+    Cancelled orders stay in the owner's history as tombstones until it is
+    compacted. Iteration, len() and `in` skip them; indexing and slicing
+    compact the history first, so positions always count live orders only.
+    Compaction swaps in a new list rather than editing the old one, so the
+    view reads the owner's current history each time and a running
+    iteration keeps walking the list it started on.
+
+    Views compare equal to any sequence of the same orders, lists included.
+    """
+
+    __slots__ = ('_owner', '_store', '_positions')
+
+    def __init__(self, owner, positions=None):
+        self._owner = owner  # The Customer or Coffee whose history this is
+        self._store = owner._store
+        self._positions = positions  # range of positions in orders, or None for all
+
+    @property
+    def _orders(self):
+        return self._owner._orders
+
+    def _compacted(self):
+        """Return the owner's history with any cancelled orders dropped"""
+        owner = self._owner
+        if owner._tombstones:
+            with owner._lock:
+                owner._compact()
+        return owner._orders
+
+    def _range(self):
+        orders = self._compacted()
+        if self._positions is None:
+            return range(len(orders))
+        return _clip(self._positions, len(orders))
+
+    def _resolve(self, item):
+        return item if self._store is None else self._store.order(item)
+
+    def __len__(self):
+        if self._positions is None:
+            owner = self._owner
+            return len(owner._orders) - owner._tombstones
+        return len(self._range())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return OrderView(self._owner, self._range()[index])
+        orders = self._compacted()
+        if self._positions is not None:
+            index = _clip(self._positions, len(orders))[index]
+        return self._resolve(orders[index])
+
+    def __iter__(self):
+        # Fix the extent now, and let C iterators do the walking
+        if self._positions is None:
+            orders = self._owner._orders
+            items = islice(orders, len(orders))
+            if self._owner._tombstones:
+                cancelled = _is_cancelled if self._store is None else self._store.is_cancelled
+                items = filterfalse(cancelled, items)
+        else:
+            orders = self._compacted()
+            items = map(orders.__getitem__, _clip(self._positions, len(orders)))
+        return items if self._store is None else map(self._store.order, items)
+
+    def __contains__(self, order):
+        if self._positions is None and self._store is None:
+            # Scans at C speed, no per-item yield
+            return order in self._orders and not order._cancelled
+        return any(item == order for item in self)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        return all(mine == theirs for mine, theirs in zip(self, other))
+
+    __hash__ = None  # Live, so unhashable like the list it stands in for
+
+    def __repr__(self):
+        return f"OrderView({list(self)!r})"
+
+
+def _clip(positions, length):
+    """Return the part of a range of positions that is below length"""
+    if positions.step > 0:
+        return range(positions.start, min(positions.stop, length), positions.step)
+    excess = positions.start - (length - 1)
+    if excess <= 0:
+        return positions
+    step = -positions.step
+    start = positions.start - (excess + step - 1) // step * step
+    return range(start, positions.stop, positions.step)
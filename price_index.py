@@ -0,0 +1,42 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class PriceIndex:
+    """A coffee's order prices kept sorted, for price-range lookups
+
+    Maps price ranges to positions in the coffee's order history. The index
+    is caught up from the history when it is queried rather than on every
+    order, so creating orders costs nothing extra: a few new prices are
+    inserted in place, and a large backlog is merged with one sort.
+    """
+
+    def __init__(self):
+        self._prices = array('d')  # Sorted prices
+        self._positions = array('q')  # History position of each price above
+        self.indexed = 0  # How many history positions have been indexed
+
+    def extend(self, prices):
+        """Index prices for the next len(prices) history positions"""
+        first = self.indexed
+        self.indexed += len(prices)
+        if len(prices) <= len(self._prices) // 16:
+            for position, price in enumerate(prices, first):
+                index = bisect_right(self._prices, price)
+                self._prices.insert(index, price)
+                self._positions.insert(index, position)
+            return
+        entries = list(zip(self._prices, self._positions))
+        entries.extend(zip(prices, range(first, self.indexed)))
+        entries.sort()  # Timsort keeps the sorted run and merges the new tail into it
+        self._prices = array('d', [price for price, _ in entries])
+        self._positions = array('q', [position for _, position in entries])
+
+    def between(self, low=None, high=None):
+        """Return the history positions of prices in [low, high], in history order"""
+        start = 0 if low is None else bisect_left(self._prices, low)
+        end = len(self._prices) if high is None else bisect_right(self._prices, high)
+        return sorted(self._positions[start:end])
+
+    def __len__(self):
+        return self.indexed
@@ -0,0 +1,78 @@
+import math
+from operator import mul
+
+
+class PriceStats:
+    """Running price aggregates, updated as each order is attached"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.min = None
+        self.max = None
+        self.bounds_stale = False  # Set when a removed price was the min or max
+
+    def add(self, price):
+        """Fold a single order price into the running totals"""
+        self.count += 1
+        self.total += price
+        self.total_squares += price * price
+        if self.min is None or price < self.min:
+            self.min = price
+        if self.max is None or price > self.max:
+            self.max = price
+
+    def add_many(self, prices):
+        """Fold a batch of order prices into the running totals"""
+        if not prices:
+            return
+        self.count += len(prices)
+        self.total += sum(prices)
+        self.total_squares += sum(map(mul, prices, prices))
+        low, high = min(prices), max(prices)
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+
+    def remove(self, price):
+        """Take a cancelled order's price back out of the running totals
+        
+        If it was the min or max, the bounds are marked stale for the
+        owner to recompute with reset_bounds().
+        """
+        self.count -= 1
+        if not self.count:
+            self.total = self.total_squares = 0.0
+            self.min = self.max = None
+            self.bounds_stale = False
+            return
+        self.total -= price
+        self.total_squares -= price * price
+        if price <= self.min or price >= self.max:
+            self.bounds_stale = True
+
+    def reset_bounds(self, prices):
+        """Recompute min and max from every remaining price"""
+        self.min = min(prices, default=None)
+        self.max = max(prices, default=None)
+        self.bounds_stale = False
+
+    def mean(self):
+        """Return the mean price, or 0 when there are no prices"""
+        if not self.count:
+            return 0
+        return self.total / self.count
+
+    def stddev(self):
+        """Return the population standard deviation, or 0 when empty"""
+        if not self.count:
+            return 0
+        mean = self.total / self.count
+        variance = self.total_squares / self.count - mean * mean
+        # Guard against tiny negative values from floating point rounding
+        return math.sqrt(max(variance, 0.0))
+
+    def __repr__(self):
+        return f"PriceStats(count={self.count}, total={self.total})"
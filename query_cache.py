@@ -0,0 +1,125 @@
+import functools
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 4096
+
+
+class QueryCache:
+    """Bounded LRU cache of derived query results, keyed per customer or coffee
+
+    Every Customer and Coffee carries a _version that Order bumps whenever
+    it attaches an order to them (and that renaming or retiring a customer
+    bumps too). Entries remember the version they were computed at, so a
+    write invalidates exactly that entity's results with one integer
+    increment, and a stale entry is recomputed and replaced the next time
+    it is asked for.
+
+    The cache is off by default. The methods most worth caching are the
+    ones a store answers with SQL; in-memory aggregates are already O(1)
+    or a single list copy.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (entity, method, args) -> (version, result)
+        self.resize(maxsize)
+        self.hits = self.misses = self.evictions = 0
+
+    def resize(self, maxsize):
+        """Change how many results are kept, evicting the least recently used"""
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def enable(self, maxsize=None):
+        """Start caching derived query results"""
+        if maxsize is not None:
+            self.resize(maxsize)
+        self.enabled = True
+
+    def disable(self):
+        """Stop caching and drop every cached result"""
+        self.enabled = False
+        self.clear()
+
+    def clear(self):
+        """Drop every cached result and zero the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, version):
+        """Return (True, result) for a fresh entry, or (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, version, result):
+        """Remember result as computed at version"""
+        with self._lock:
+            self._entries[key] = (version, result)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current size"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = QueryCache()  # Shared by every memoized Customer and Coffee method
+
+
+def memoized(function=None, *, entity=0):
+    """Cache a derived method's results in the shared QueryCache
+
+    entity is the position of the argument the result belongs to (0 for
+    self; 1 for the coffee of a classmethod taking (cls, coffee)). Only
+    calls with positional, hashable arguments are cached: calls with
+    keyword arguments, with unhashable ones, or with no argument at the
+    entity position go straight to the method, as do calls for entities
+    without a _version. Lists are copied on the way in and out, so callers
+    can't change what is cached.
+    """
+    if function is None:
+        return functools.partial(memoized, entity=entity)
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not cache.enabled or kwargs or len(args) <= entity:
+            return function(*args, **kwargs)
+        owner = args[entity]
+        version = getattr(owner, '_version', None)
+        if version is None:
+            return function(*args)
+        key = (owner, name, args[entity + 1:])
+        try:
+            hash(key)
+        except TypeError:
+            return function(*args)
+        hit, result = cache.get(key, version)
+        if not hit:
+            # The version is read first, so a write during the call leaves this entry stale
+            result = function(*args)
+            cache.put(key, version, list(result) if isinstance(result, list) else result)
+        return list(result) if isinstance(result, list) else result
+    return wrapper
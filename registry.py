@@ -0,0 +1,152 @@
+import threading
+import weakref
+
+
+class Registry:
+    """Insertion-ordered collection of model objects with a hash index on name
+
+    Behaves like the list it replaces for iteration, len(), `in`, indexing
+    and append(), while membership, removal and find(name) are O(1).
+    Indexing reads a parallel list in O(1); removals leave stale entries in
+    it, which are dropped in one pass by the next index (or once they
+    outnumber the live items), so indexing stays O(1) amortized.
+    """
+
+    def __init__(self, items=()):
+        self._items = self._new_map()  # item -> None, keeps registration order
+        self._order = []  # Entries for the items in registration order, plus stale ones
+        self._by_name = {}  # name -> {item: None} in the order they took the name
+        self._lock = threading.RLock()
+        for item in items:
+            self.append(item)
+
+    def _new_map(self):
+        return {}
+
+    def _entry(self, item):
+        """Return what _order holds for item"""
+        return item
+
+    def _reorder(self):
+        """Rebuild _order from the registered items, dropping stale entries"""
+        self._order = [self._entry(item) for item in list(self._items)]
+
+    def append(self, item):
+        """Register item (registering the same item twice is a no-op)"""
+        with self._lock:
+            if item in self._items:
+                return
+            self._items[item] = None
+            self._order.append(self._entry(item))
+            self._index(item)
+            if len(self._order) > 2 * len(self._items) + 8:
+                self._reorder()  # Amortized, so stale entries can't pile up
+
+    def remove(self, item):
+        """Unregister item, raising ValueError if it is not registered"""
+        with self._lock:
+            if item not in self._items:
+                raise ValueError(f"{item!r} is not registered")
+            del self._items[item]
+            self._unindex(item, item.name)
+            if len(self._order) > 2 * len(self._items) + 8:
+                self._reorder()
+
+    def clear(self):
+        """Unregister everything"""
+        with self._lock:
+            self._items.clear()
+            self._order = []
+            self._by_name.clear()
+
+    def rename(self, item, old_name):
+        """Move item from old_name to its current name in the index"""
+        with self._lock:
+            if item not in self._items:
+                return
+            self._unindex(item, old_name)
+            self._index(item)
+
+    def _index(self, item):
+        bucket = self._by_name.get(item.name)
+        if bucket is None:
+            bucket = self._by_name[item.name] = self._new_map()
+        bucket[item] = None
+
+    def _unindex(self, item, name):
+        bucket = self._by_name.get(name)
+        if bucket is None:
+            return
+        bucket.pop(item, None)
+        if not bucket:
+            del self._by_name[name]
+
+    def find(self, name):
+        """Return the first registered item called name, or None"""
+        with self._lock:
+            bucket = self._by_name.get(name)
+            if not bucket:
+                return None
+            return next(iter(bucket))
+
+    def find_all(self, name):
+        """Return every registered item called name, in registration order"""
+        with self._lock:
+            return list(self._by_name.get(name, ()))
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._items))  # Snapshot, safe against concurrent appends
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __getitem__(self, index):
+        with self._lock:
+            # Every removal leaves one stale entry, so equal lengths mean none
+            if len(self._order) != len(self._items):
+                self._reorder()
+            return self._order[index]
+
+    def __repr__(self):
+        return f"Registry({list(self._items)!r})"
+
+
+class WeakRegistry(Registry):
+    """Registry that holds its items by weak reference
+
+    Items disappear from the registry (and its name index) once nothing
+    else refers to them, so transient objects can be garbage collected.
+    """
+
+    def _new_map(self):
+        return weakref.WeakKeyDictionary()
+
+    def _entry(self, item):
+        return weakref.ref(item)
+
+    def __getitem__(self, index):
+        with self._lock:
+            if len(self._order) != len(self._items):
+                self._reorder()
+            refs = self._order[index]
+            items = [ref() for ref in refs] if isinstance(index, slice) else refs()
+            if items is None or (isinstance(index, slice) and any(i is None for i in items)):
+                # Collected since the length check, so read the live items instead
+                return list(self._items)[index]
+            return items
+
+    def find(self, name):
+        """Return the first live item called name, or None"""
+        with self._lock:
+            bucket = self._by_name.get(name)
+            if not bucket:
+                self._by_name.pop(name, None)  # Drop buckets emptied by collection
+                return None
+            return next(iter(bucket))
+
+    def __repr__(self):
+        return f"WeakRegistry({list(self._items)!r})"
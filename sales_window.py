@@ -0,0 +1,167 @@
+from itertools import groupby, islice, repeat
+from operator import floordiv
+
+FINE_RESOLUTION = (10, 360)  # One hour of 10-second buckets
+COARSE_RESOLUTION = (300, 288)  # One day of 5-minute buckets
+
+
+class RollingWindow:
+    """Order counts and revenue in fixed-width time buckets over a ring buffer
+
+    Each slot remembers which bucket it currently holds, so stale slots are
+    reset lazily when the ring wraps round instead of by a timer.
+    """
+
+    def __init__(self, bucket_seconds, num_buckets):
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = num_buckets
+        self._buckets = [-1] * num_buckets  # Bucket number held by each slot
+        self._counts = [0] * num_buckets
+        self._revenue = [0.0] * num_buckets
+
+    @property
+    def span(self):
+        """Seconds of history the ring covers"""
+        return self.bucket_seconds * self.num_buckets
+
+    def add(self, timestamp, revenue, count=1):
+        """Record count orders totalling revenue at timestamp
+
+        Returns (start time, count, revenue) of the bucket this evicted,
+        if any, or False if timestamp is older than the ring covers.
+        """
+        bucket = int(timestamp // self.bucket_seconds)
+        slot = bucket % self.num_buckets
+        held = self._buckets[slot]
+        evicted = None
+        if held != bucket:
+            if held > bucket:
+                return False
+            if self._counts[slot]:
+                evicted = (held * self.bucket_seconds, self._counts[slot], self._revenue[slot])
+            self._buckets[slot] = bucket
+            self._counts[slot] = 0
+            self._revenue[slot] = 0.0
+        self._counts[slot] += count
+        self._revenue[slot] += revenue
+        return evicted
+
+    def remove(self, timestamp, revenue, count=1):
+        """Take count orders totalling revenue back out of timestamp's bucket
+
+        Returns False, changing nothing, if that bucket is no longer held.
+        """
+        bucket = int(timestamp // self.bucket_seconds)
+        slot = bucket % self.num_buckets
+        if self._buckets[slot] != bucket:
+            return False
+        self._counts[slot] -= count
+        self._revenue[slot] -= revenue
+        return True
+
+    def totals(self, now, seconds):
+        """Return (count, revenue) for the buckets overlapping the last seconds before now"""
+        current = int(now // self.bucket_seconds)
+        first = int((now - seconds) // self.bucket_seconds)
+        count = 0
+        revenue = 0.0
+        for bucket in range(max(first, current - self.num_buckets + 1), current + 1):
+            slot = bucket % self.num_buckets
+            if self._buckets[slot] == bucket:
+                count += self._counts[slot]
+                revenue += self._revenue[slot]
+        return count, revenue
+
+    def totals_since(self, since):
+        """Return (count, revenue) for every held bucket overlapping since onwards"""
+        first = int(since // self.bucket_seconds)
+        count = 0
+        revenue = 0.0
+        for slot, bucket in enumerate(self._buckets):
+            if bucket >= first:
+                count += self._counts[slot]
+                revenue += self._revenue[slot]
+        return count, revenue
+
+
+class SalesWindows:
+    """Rolling order counts and revenue for one coffee
+
+    New orders go into a fine ring (10-second buckets, one hour). When the
+    ring wraps, the bucket it overwrites is folded into a coarse ring
+    (5-minute buckets, one day), so each order lives in exactly one ring and
+    the write path touches only one bucket. Windows shorter than an hour read
+    just the fine ring; longer ones add the coarse ring. Either way a query costs
+    O(buckets), not O(orders).
+
+    Results are bucket-granular: the oldest bucket counts in full, so a
+    window can include up to one bucket width of extra history (10 seconds
+    for windows up to an hour, 5 minutes beyond that).
+    """
+
+    def __init__(self, fine=FINE_RESOLUTION, coarse=COARSE_RESOLUTION):
+        if coarse[0] % fine[0]:
+            raise ValueError("Coarse buckets must be a whole number of fine buckets")
+        self._fine = RollingWindow(*fine)
+        self._coarse = RollingWindow(*coarse)
+
+    @property
+    def max_seconds(self):
+        """Longest window that can be queried"""
+        return self._coarse.span
+
+    def add(self, timestamp, price):
+        """Record one order"""
+        fine = self._fine
+        bucket = int(timestamp // fine.bucket_seconds)
+        slot = bucket % fine.num_buckets
+        if fine._buckets[slot] == bucket:  # Fast path: the current bucket is already open
+            fine._counts[slot] += 1
+            fine._revenue[slot] += price
+            return
+        evicted = fine.add(timestamp, price)
+        if evicted:
+            start, count, revenue = evicted
+            self._coarse.add(start, revenue, count)
+        elif evicted is False:
+            self._coarse.add(timestamp, price)  # Too old for the fine ring
+
+    def add_many(self, timestamps, prices):
+        """Record many orders, given in the order they arrived
+
+        Each run of orders falling in the same fine bucket is added in one
+        step, with the same result as adding them one at a time.
+        """
+        timestamps = list(timestamps)
+        prices = iter(prices)
+        width = self._fine.bucket_seconds
+        start = 0
+        for _, run in groupby(map(floordiv, timestamps, repeat(width))):
+            count = len(list(run))
+            timestamp = timestamps[start]
+            start += count
+            revenue = sum(islice(prices, count))
+            evicted = self._fine.add(timestamp, revenue, count)
+            if evicted:
+                bucket_start, bucket_count, bucket_revenue = evicted
+                self._coarse.add(bucket_start, bucket_revenue, bucket_count)
+            elif evicted is False:
+                self._coarse.add(timestamp, revenue, count)  # Too old for the fine ring
+
+    def remove(self, timestamp, price):
+        """Take back a cancelled order, unless it has aged out of both rings"""
+        # While its fine bucket is held the order is there; after that it was folded into coarse
+        if not self._fine.remove(timestamp, price):
+            self._coarse.remove(timestamp, price)
+
+    def totals(self, now, seconds):
+        """Return (count, revenue) for orders in the last seconds before now"""
+        if seconds <= 0:
+            raise ValueError("Window must be a positive number of seconds")
+        if seconds <= self._fine.span - self._fine.bucket_seconds:
+            return self._fine.totals(now, seconds)  # Every overlapping bucket fits in the fine ring
+        if seconds > self._coarse.span:
+            raise ValueError(f"Window must be at most {self.max_seconds} seconds")
+        fine_count, fine_revenue = self._fine.totals_since(now - seconds)
+        coarse_count, coarse_revenue = self._coarse.totals(now, seconds)
+        return fine_count + coarse_count, fine_revenue + coarse_revenue
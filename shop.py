@@ -0,0 +1,314 @@
+import heapq
+import itertools
+import multiprocessing
+import threading
+from collections import namedtuple
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from order_store import OrderStore
+from registry import Registry
+from sketches import Sketches
+
+DEFAULT_SHARDS = 4
+
+# A shop's handle on one of its customers; id is unique within the shop
+CustomerRef = namedtuple('CustomerRef', ['id', 'name'])
+
+class ShardStore(OrderStore):
+    """OrderStore whose customers and coffees join the store's own registries"""
+
+    def __init__(self):
+        super().__init__()
+        self.customer_registry = Registry()
+        self.coffee_registry = Registry()
+
+
+class LocalShard:
+    """One shard's customers, coffees and orders, held in this process
+
+    Entities live in the shard's own ShardStore and registries, never in
+    Customer.all_customers or Coffee.all_coffees. Results are plain tuples
+    of ids, names and numbers, so a ProcessShard can send them back as is.
+    """
+
+    def __init__(self):
+        self.store = ShardStore()
+        self._customers = {}  # shop customer id -> Customer
+        self._coffees = {}  # coffee name -> Coffee
+        self._shop_ids = {}  # Customer -> shop customer id
+        self._first_orders = {}  # coffee name -> {shop customer id: shop order number}
+        self._lock = threading.Lock()  # Guards _first_orders
+
+    def add_customer(self, customer_id, name):
+        """Create the customer the shop knows as customer_id"""
+        customer = Customer(name, self.store)
+        self._customers[customer_id] = customer
+        self._shop_ids[customer] = customer_id
+
+    def add_coffee(self, name):
+        """Create this shard's copy of a coffee"""
+        self._coffees[name] = Coffee(name, self.store)
+        self._first_orders[name] = {}
+
+    def create_order(self, customer_id, coffee_name, price, number):
+        """Record order number number of the shop"""
+        Order(self._customers[customer_id], self._coffees[coffee_name], price)
+        with self._lock:
+            self._first_orders[coffee_name].setdefault(customer_id, number)
+
+    def coffee_totals(self, name):
+        """Return (order count, price sum) for a coffee's orders in this shard"""
+        coffee = self._coffees[name]
+        with coffee._lock:
+            return coffee._stats.count, coffee._stats.total
+
+    def coffee_customers(self, name):
+        """Return [(first order number, customer id, name)] in first-order order"""
+        coffee = self._coffees[name]
+        customers = []
+        with self._lock:
+            first_orders = self._first_orders[name]
+            for customer in coffee.customers():
+                customer_id = self._shop_ids[customer]
+                # Missing only while that first order is still being recorded
+                if customer_id in first_orders:
+                    customers.append((first_orders[customer_id], customer_id, customer.name))
+        return customers
+
+    def coffee_leader(self, name):
+        """Return (total spent, customer id, name) for the coffee's top spender, or None"""
+        coffee = self._coffees[name]
+        with coffee._lock:
+            leader = coffee._leaderboard.leader()
+            if leader is None:
+                return None
+            return coffee._leaderboard.total(leader), self._shop_ids[leader], leader.name
+
+    def coffee_sketches(self, name):
+        """Return a copy of the coffee's Sketches for this shard's orders"""
+        return self._coffees[name].sketches()
+
+    def close(self):
+        pass
+
+
+def _serve(conn):
+    """Run a LocalShard in a worker process, answering (method, args) requests"""
+    shard = LocalShard()
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        method, args = request
+        try:
+            reply = ('ok', getattr(shard, method)(*args))
+        except Exception as error:
+            reply = ('error', error)
+        try:
+            conn.send(reply)
+        except Exception as error:  # The exception itself would not pickle
+            conn.send(('error', RuntimeError(f"{method} failed: {reply[1]!r} ({error})")))
+    conn.close()
+
+
+class ProcessShard:
+    """A LocalShard running in its own process, driven over a pipe
+
+    Requests are answered in the order they were sent. submit() holds the
+    shard until the reply is read, so a caller can send to every shard
+    before waiting on any of them.
+    """
+
+    def __init__(self, context=None):
+        context = context or multiprocessing.get_context()
+        self._conn, child = context.Pipe()
+        self._process = context.Process(target=_serve, args=(child,), daemon=True)
+        self._process.start()
+        child.close()
+        self._lock = threading.Lock()
+
+    def submit(self, method, *args):
+        """Send a request and return a function that waits for its reply"""
+        self._lock.acquire()
+        try:
+            self._conn.send((method, args))
+        except BaseException:
+            self._lock.release()
+            raise
+
+        def result():
+            try:
+                status, value = self._conn.recv()
+            finally:
+                self._lock.release()
+            if status == 'error':
+                raise value
+            return value
+        return result
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return lambda *args: self.submit(method, *args)()
+
+    def close(self):
+        """Stop the worker process"""
+        with self._lock:
+            if self._process.is_alive():
+                self._conn.send(None)
+            self._process.join()
+            self._conn.close()
+
+
+class Shop:
+    """Customers, coffees and orders sharded by customer id
+
+    A Shop keeps its entities in its own shards instead of the class-wide
+    registries, so several shops can live side by side. Each customer and
+    all of their orders belong to shard customer.id % num_shards; every
+    shard has its own copy of each coffee. Orders go to a single shard, and
+    coffee queries scatter to every shard and merge what comes back:
+
+    - average_price() and num_orders() add up per-shard counts and sums
+    - customers() merges per-shard lists on each customer's first order
+    - most_aficionado() takes the biggest per-shard spender
+    - approx_num_customers() adds up per-shard estimates, as customer ids
+      are only unique within a process; price_quantiles() merges sketches
+
+    Exact results match what the models return serially, with ties for
+    top spender going to the customer created first.
+
+        with Shop(num_shards=4, processes=True) as shop:
+            ann = shop.add_customer("Ann")
+            shop.add_coffee("Latte")
+            shop.create_order(ann, "Latte", 4.5)
+            shop.most_aficionado("Latte")  # CustomerRef(id=1, name='Ann')
+
+    Shards are LocalShards in this process by default. With processes set
+    they are ProcessShards, one worker process each, so shards work on
+    orders and queries in parallel; each call then costs a pipe round trip.
+    """
+
+    def __init__(self, num_shards=DEFAULT_SHARDS, processes=False):
+        if not isinstance(num_shards, int):
+            raise TypeError("num_shards must be an integer")
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        self.processes = processes
+        shard_class = ProcessShard if processes else LocalShard
+        self._shards = [shard_class() for _ in range(num_shards)]
+        self._customer_ids = itertools.count(1)
+        self._order_numbers = itertools.count(1)
+        self._customers = {}  # customer id -> CustomerRef
+        self._coffees = set()
+        self._lock = threading.Lock()  # Guards _customers and _coffees
+
+    @property
+    def num_shards(self):
+        return len(self._shards)
+
+    def _shard(self, customer_id):
+        return self._shards[customer_id % len(self._shards)]
+
+    def _scatter(self, method, *args):
+        """Call method on every shard and return their results in shard order"""
+        if not self.processes:
+            return [getattr(shard, method)(*args) for shard in self._shards]
+        # Send everything before waiting, so the shards work at the same time
+        replies = [shard.submit(method, *args) for shard in self._shards]
+        results, error = [], None
+        for reply in replies:
+            try:
+                results.append(reply())
+            except Exception as exc:  # Keep reading, so every pipe stays in step
+                error = error or exc
+        if error is not None:
+            raise error
+        return results
+
+    def add_customer(self, name):
+        """Create a customer and return their CustomerRef"""
+        customer_id = next(self._customer_ids)
+        self._shard(customer_id).add_customer(customer_id, name)
+        ref = CustomerRef(customer_id, name)
+        with self._lock:
+            self._customers[customer_id] = ref
+        return ref
+
+    def add_coffee(self, name):
+        """Create a coffee in every shard"""
+        with self._lock:
+            if name in self._coffees:
+                raise ValueError(f"Coffee {name!r} already exists")
+            self._scatter('add_coffee', name)
+            self._coffees.add(name)
+
+    def _check_coffee(self, coffee):
+        if coffee not in self._coffees:
+            raise ValueError(f"Unknown coffee {coffee!r}")
+
+    def create_order(self, customer, coffee, price):
+        """Record an order by customer (a CustomerRef) for the named coffee"""
+        if not isinstance(customer, CustomerRef) or customer.id not in self._customers:
+            raise TypeError("customer must be a CustomerRef from this shop")
+        self._check_coffee(coffee)
+        self._shard(customer.id).create_order(customer.id, coffee, price,
+                                              next(self._order_numbers))
+
+    def num_orders(self, coffee):
+        """Return how many orders the coffee has across all shards"""
+        self._check_coffee(coffee)
+        return sum(count for count, _ in self._scatter('coffee_totals', coffee))
+
+    def average_price(self, coffee):
+        """Return the coffee's average order price across all shards"""
+        self._check_coffee(coffee)
+        totals = self._scatter('coffee_totals', coffee)
+        count = sum(count for count, _ in totals)
+        return sum(total for _, total in totals) / count if count else 0
+
+    def customers(self, coffee):
+        """Return CustomerRefs of everyone who ordered the coffee, in first-order order"""
+        self._check_coffee(coffee)
+        merged = heapq.merge(*self._scatter('coffee_customers', coffee))
+        return [CustomerRef(customer_id, name) for _, customer_id, name in merged]
+
+    def most_aficionado(self, coffee):
+        """Return the CustomerRef of the coffee's biggest spender, or None"""
+        self._check_coffee(coffee)
+        leaders = [leader for leader in self._scatter('coffee_leader', coffee) if leader]
+        if not leaders:
+            return None
+        _, customer_id, name = min(leaders, key=lambda leader: (-leader[0], leader[1]))
+        return CustomerRef(customer_id, name)
+
+    def approx_num_customers(self, coffee):
+        """Return an estimate of how many distinct customers ordered the coffee"""
+        self._check_coffee(coffee)
+        # Shards never share a customer, so their estimates simply add up
+        return sum(sketches.customers.count()
+                   for sketches in self._scatter('coffee_sketches', coffee))
+
+    def price_quantiles(self, coffee, fractions):
+        """Return approximate prices at each fraction (0 to 1) of the coffee's orders"""
+        self._check_coffee(coffee)
+        fractions = list(fractions)
+        merged = Sketches.merge(self._scatter('coffee_sketches', coffee))
+        return merged.prices.quantiles(fractions)
+
+    def price_quantile(self, coffee, fraction):
+        """Return the approximate price at fraction (0 to 1) of the coffee's orders"""
+        return self.price_quantiles(coffee, [fraction])[0]
+
+    def close(self):
+        """Stop any shard worker processes"""
+        for shard in self._shards:
+            shard.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
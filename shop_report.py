@@ -0,0 +1,180 @@
+import math
+import os
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from coffee import Coffee
+from customer import Customer
+
+# What the nightly report lists for each coffee
+CoffeeSummary = namedtuple('CoffeeSummary',
+                           ['num_orders', 'average_price', 'customers', 'most_aficionado'])
+
+DEFAULT_CHUNK_SIZE = 500_000  # Most orders of one coffee handled by a single task
+
+# Order columns of the source being reported on, loaded once per worker process
+_columns = None
+
+
+def _load_columns(customer_ids, prices):
+    global _columns
+    _columns = (customer_ids, prices)
+
+
+def _partial(coffee_id, rows, columns=None):
+    """Return partial aggregates for one run of a coffee's order rows
+
+    The result is (coffee id, order count, price sum, spend), where spend
+    maps customer id -> total spent, in the order customers first appear.
+    """
+    customer_ids, prices = columns or _columns
+    spend = {}
+    total = 0.0
+    for row in rows:
+        price = prices[row]
+        customer_id = customer_ids[row]
+        total += price
+        spend[customer_id] = spend.get(customer_id, 0) + price
+    return coffee_id, len(rows), total, spend
+
+
+class ShopReport:
+    """Shop-wide per-coffee summary
+
+    The summary for each coffee matches what num_orders(), average_price(),
+    customers() and Customer.most_aficionado() return serially. By default
+    it is read from the aggregates every coffee already maintains, in
+    O(distinct customers) per coffee under one lock, so a report costs
+    nothing per order. Coffees in a store that keeps no in-memory indexes
+    (SQLiteStore) are summarized by the database.
+
+    With recompute set, in-memory coffees are instead recomputed from raw
+    order history, to check the maintained aggregates. Each coffee's order
+    rows are reduced to partial aggregates (order count, price sum,
+    per-customer spend in first-order order) by a process pool. Coffees are
+    partitioned across workers, and only coffees with more than chunk_size
+    orders are split, so merging touches just those. The worker processes
+    receive the order columns once, when they start, and each task ships
+    only row numbers. Averages and spend totals agree with the serial
+    methods up to floating-point rounding, since split coffees add their
+    partial sums in a different order. Coffees backed by an OrderStore are
+    read straight from its columns; plain coffees have their orders copied
+    into columns first, one order at a time.
+    """
+
+    def __init__(self, coffees=None, processes=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 recompute=False):
+        if processes is not None and processes < 1:
+            raise ValueError("processes must be at least 1")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.coffees = list(Coffee._registry() if coffees is None else coffees)
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.recompute = recompute
+
+    def run(self):
+        """Return a dict mapping each coffee to its CoffeeSummary"""
+        if not self.recompute:
+            return {coffee: self._summarize(coffee) for coffee in self.coffees}
+        summaries = {}
+        merged = {}  # coffee id -> [count, price sums, spend]
+        customers = {}  # customer id -> Customer
+        for columns, tasks in self._sources(summaries, customers):
+            for coffee_id, count, total, spend in self._map(columns, tasks):
+                into = merged.get(coffee_id)
+                if into is None:
+                    merged[coffee_id] = [count, [total], spend]
+                    continue
+                into[0] += count
+                into[1].append(total)
+                into_spend = into[2]
+                for customer_id, amount in spend.items():
+                    into_spend[customer_id] = into_spend.get(customer_id, 0) + amount
+
+        for coffee in self.coffees:
+            if coffee in summaries:
+                continue
+            count, totals, spend = merged.get(coffee.id, (0, [], {}))
+            summaries[coffee] = CoffeeSummary(
+                num_orders=count,
+                average_price=math.fsum(totals) / count if count else 0,
+                customers=[customers[customer_id] for customer_id in spend],
+                most_aficionado=self._leader(spend, customers),
+            )
+        return summaries
+
+    @staticmethod
+    def _summarize(coffee):
+        """Return a coffee's CoffeeSummary from its maintained aggregates"""
+        if coffee._pushdown:
+            return CoffeeSummary(coffee.num_orders(), coffee.average_price(),
+                                 coffee.customers(), Customer.most_aficionado(coffee))
+        with coffee._lock:  # One lock, so the four fields agree with each other
+            return CoffeeSummary(coffee._stats.count, coffee._stats.mean(),
+                                 list(coffee._customer_counts), coffee._leaderboard.leader())
+
+    def _map(self, columns, tasks):
+        # Results come back in task order, so split coffees merge first rows first
+        if self.processes == 1 or len(tasks) <= 1:
+            return [_partial(coffee_id, rows, columns) for coffee_id, rows in tasks]
+        with ProcessPoolExecutor(self.processes, initializer=_load_columns,
+                                 initargs=columns) as pool:
+            return list(pool.map(_partial, *zip(*tasks)))
+
+    @staticmethod
+    def _leader(spend, customers):
+        # Biggest spender, ties to the customer created earliest, as in Leaderboard
+        best = None
+        for customer_id, amount in spend.items():
+            customer = customers[customer_id]
+            if customer.retired:
+                continue
+            if best is None or (-amount, customer_id) < best[0]:
+                best = ((-amount, customer_id), customer)
+        return best[1] if best else None
+
+    def _sources(self, summaries, customers):
+        """Yield ((customer ids, prices), [(coffee id, rows)]) per order source
+
+        Coffees that are summarized serially go straight into summaries.
+        """
+        by_store = {}
+        plain = []
+        for coffee in self.coffees:
+            if coffee._pushdown:
+                summaries[coffee] = self._summarize(coffee)
+            elif coffee._store is None:
+                plain.append(coffee)
+            else:
+                by_store.setdefault(coffee._store, []).append(coffee)
+
+        for store, coffees in by_store.items():
+            tasks = []
+            for coffee in coffees:
+                with coffee._lock:
+                    coffee._compact()  # Cancelled rows must not be reported
+                    rows = coffee._orders[:]
+                self._add_tasks(tasks, coffee.id, rows)
+            with store._lock:  # Columns only grow, so every row above is stable
+                customers.update(store._customers)
+            yield (store.customer_ids, store.prices), tasks
+
+        if plain:
+            tasks = []
+            customer_ids, prices = array('q'), array('d')
+            for coffee in plain:
+                first = len(prices)
+                for order in coffee.orders():  # A view, so the history is not copied twice
+                    customer = order.customer
+                    customers[customer.id] = customer
+                    customer_ids.append(customer.id)
+                    prices.append(order.price)
+                self._add_tasks(tasks, coffee.id, range(first, len(prices)))
+            yield (customer_ids, prices), tasks
+
+    def _add_tasks(self, tasks, coffee_id, rows):
+        # Split big coffees so no single task holds up the pool
+        for start in range(0, len(rows), self.chunk_size):
+            tasks.append((coffee_id, rows[start:start + self.chunk_size]))
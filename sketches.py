@@ -0,0 +1,309 @@
+import math
+import random
+from bisect import bisect_left
+from collections import namedtuple
+
+DEFAULT_PRECISION = 12  # 4,096 HyperLogLog registers: 4 KB, about 1.6% standard error
+EXACT_LIMIT = 64  # Distinct keys a HyperLogLog also keeps exactly, for tiny counts
+DEFAULT_K = 200  # QuantileSketch accuracy: rank error about 1.7% of n, holding ~600 prices
+MIN_CAPACITY = 8  # Fewest items a QuantileSketch level holds before compacting
+
+_MASK = (1 << 64) - 1
+
+
+def _mix(key):
+    """Scramble an integer key into 64 well-spread bits (splitmix64's finalizer)"""
+    key = (key + 0x9E3779B97F4A7C15) & _MASK
+    key = ((key ^ (key >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    key = ((key ^ (key >> 27)) * 0x94D049BB133111EB) & _MASK
+    return key ^ (key >> 31)
+
+
+class HyperLogLog:
+    """Approximate count of distinct integer keys in fixed memory
+
+    Each key is hashed to one of 2**precision one-byte registers, which
+    remembers the longest run of leading zero bits seen there. With the
+    default precision of 12 the sketch takes 4 KB however many keys it
+    sees, and count() has a standard error of 1.04 / sqrt(4096), about
+    1.6%: within 3.3% of the true count 95% of the time. Small counts
+    (under about 10,000) use linear counting and are usually closer, and
+    up to EXACT_LIMIT distinct keys are exact: their hashes are also kept
+    in a set until there are more.
+
+    Sketches with the same precision merge into a sketch of the union, so
+    adding a key twice, in one sketch or in two, counts it once. Keys are
+    hashed by value, so a merge is only meaningful if equal keys mean the
+    same thing in both sketches. Coffee sketches are keyed by Customer.id,
+    which is only unique within one process, so don't merge their
+    customer counts across processes.
+    """
+
+    __slots__ = ('precision', '_registers', '_exact')
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        if not isinstance(precision, int):
+            raise TypeError("precision must be an integer")
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+        self._exact = set()  # Hashes of every key added, or None once over EXACT_LIMIT
+
+    @property
+    def standard_error(self):
+        """Relative standard error of count()"""
+        return 1.04 / math.sqrt(len(self._registers))
+
+    def add(self, key):
+        """Count an integer key"""
+        hashed = _mix(key & _MASK)
+        width = 64 - self.precision
+        index = hashed >> width
+        rank = width - (hashed & ((1 << width) - 1)).bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+        if self._exact is not None:
+            self._exact.add(hashed)
+            if len(self._exact) > EXACT_LIMIT:
+                self._exact = None
+
+    def add_many(self, keys):
+        """Count every key in keys"""
+        registers = self._registers
+        exact = self._exact
+        width = 64 - self.precision
+        low = (1 << width) - 1
+        for key in keys:
+            hashed = _mix(key & _MASK)
+            index = hashed >> width
+            rank = width - (hashed & low).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+            if exact is not None:
+                exact.add(hashed)
+                if len(exact) > EXACT_LIMIT:
+                    exact = None
+        self._exact = exact
+
+    def merge(self, other):
+        """Fold other's keys into this sketch and return it"""
+        if other.precision != self.precision:
+            raise ValueError("Can only merge sketches with the same precision")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+        if self._exact is not None and other._exact is not None:
+            self._exact |= other._exact
+            if len(self._exact) > EXACT_LIMIT:
+                self._exact = None
+        else:
+            self._exact = None
+        return self
+
+    def count(self):
+        """Return the estimated number of distinct keys added"""
+        if self._exact is not None:
+            return len(self._exact)
+        registers = self._registers
+        m = len(registers)
+        # Few distinct register values, so count each in C instead of summing in Python
+        inverse = sum(registers.count(rank) * 2.0 ** -rank for rank in set(registers))
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / inverse
+        zeros = registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # Linear counting is better for small counts
+        return round(estimate)
+
+    def copy(self):
+        """Return an independent copy of this sketch"""
+        duplicate = HyperLogLog(self.precision)
+        duplicate._registers[:] = self._registers
+        duplicate._exact = None if self._exact is None else set(self._exact)
+        return duplicate
+
+    def __repr__(self):
+        return f"HyperLogLog(precision={self.precision}, count~{self.count()})"
+
+
+class QuantileSketch:
+    """Approximate quantiles of a stream of numbers in bounded memory (a KLL sketch)
+
+    Values are kept in levels where each item stands for 2**level values.
+    When the sketch fills up, the lowest full level is sorted and every
+    other item (from a random starting point) moves up a level, halving
+    that level while keeping its ranks unbiased. Level capacities shrink by
+    2/3 going down from the top, so the sketch holds about 3 * k values
+    however many it is given: about 600 floats for the default k of 200.
+
+    quantile(q) returns a value whose rank among everything added is
+    within about 1.7% of n of q * n, with 99% confidence, for k=200 (the
+    error shrinks in proportion to 1/k). The exact min and max are kept,
+    and while fewer values than the capacity have been added, answers are
+    exact.
+
+    Sketches with the same k merge into a sketch of both streams with the
+    same error bound.
+    """
+
+    __slots__ = ('k', 'count', 'min', 'max', '_levels', '_size', '_max_size')
+
+    def __init__(self, k=DEFAULT_K):
+        if not isinstance(k, int):
+            raise TypeError("k must be an integer")
+        if k < MIN_CAPACITY:
+            raise ValueError(f"k must be at least {MIN_CAPACITY}")
+        self.k = k
+        self.count = 0
+        self.min = self.max = None
+        self._levels = [[]]  # Level h holds items that each stand for 2**h values
+        self._size = 0  # Items held across all levels
+        self._max_size = k
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(MIN_CAPACITY, int(self.k * (2 / 3) ** depth))
+
+    def add(self, value):
+        """Add one number to the stream"""
+        self._levels[0].append(value)
+        self.count += 1
+        self._size += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if self._size >= self._max_size:
+            self._compress()
+
+    def add_many(self, values):
+        """Add every number in values"""
+        values = list(values)
+        if not values:
+            return
+        self._levels[0].extend(values)
+        self.count += len(values)
+        self._size += len(values)
+        low, high = min(values), max(values)
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+        self._compress()
+
+    def _compress(self):
+        """Compact the lowest full level until the sketch fits its capacity"""
+        while self._size >= self._max_size:
+            for level, items in enumerate(self._levels):
+                if len(items) >= self._capacity(level):
+                    break
+            if level + 1 == len(self._levels):
+                self._levels.append([])
+                self._max_size = sum(self._capacity(h) for h in range(len(self._levels)))
+            kept = items.pop() if len(items) % 2 else None  # Pairs only; an odd one stays
+            items.sort()
+            promoted = items[random.getrandbits(1)::2]
+            self._levels[level + 1].extend(promoted)
+            self._size -= len(items) - len(promoted)
+            items.clear()
+            if kept is not None:
+                items.append(kept)
+
+    def merge(self, other):
+        """Fold other's stream into this sketch and return it"""
+        if other.k != self.k:
+            raise ValueError("Can only merge sketches with the same k")
+        if not other.count:
+            return self
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        for items, theirs in zip(self._levels, other._levels):
+            items.extend(theirs)
+        self.count += other.count
+        self._size += other._size
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._max_size = sum(self._capacity(h) for h in range(len(self._levels)))
+        self._compress()
+        return self
+
+    def quantiles(self, fractions):
+        """Return the approximate value at each fraction (0 to 1) of the stream
+
+        The value for q is the smallest one with at least q * n values at
+        or below it. An empty sketch returns 0 for every fraction.
+        """
+        for q in fractions:
+            if not isinstance(q, (int, float)):
+                raise TypeError("Quantiles must be numbers")
+            if not 0 <= q <= 1:
+                raise ValueError("Quantiles must be between 0 and 1")
+        if not self.count:
+            return [0 for _ in fractions]
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self._levels)
+                          for value in items)
+        cumulative, ranks = 0, []
+        for value, weight in weighted:
+            cumulative += weight
+            ranks.append(cumulative)
+        total = cumulative
+        results = []
+        for q in fractions:
+            if q == 0:
+                results.append(self.min)
+            elif q == 1:
+                results.append(self.max)
+            else:
+                results.append(weighted[bisect_left(ranks, q * total)][0])
+        return results
+
+    def quantile(self, q):
+        """Return the approximate value at fraction q (0 to 1) of the stream"""
+        return self.quantiles([q])[0]
+
+    def copy(self):
+        """Return an independent copy of this sketch"""
+        duplicate = QuantileSketch(self.k)
+        duplicate.count, duplicate.min, duplicate.max = self.count, self.min, self.max
+        duplicate._levels = [list(items) for items in self._levels]
+        duplicate._size, duplicate._max_size = self._size, self._max_size
+        return duplicate
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"QuantileSketch(k={self.k}, count={self.count}, held={self._size})"
+
+
+class Sketches(namedtuple('Sketches', ['customers', 'prices'])):
+    """A coffee's distinct-customer HyperLogLog and price QuantileSketch"""
+
+    __slots__ = ()
+
+    @classmethod
+    def merge(cls, sketches):
+        """Return the union of several Sketches (e.g. from other coffees or shards)
+
+        Customer counts only merge correctly within one process (see
+        HyperLogLog); Shop adds up its shards' counts instead.
+        """
+        merged = None
+        for sketch in sketches:
+            if merged is None:
+                merged = cls(sketch.customers.copy(), sketch.prices.copy())
+            else:
+                merged.customers.merge(sketch.customers)
+                merged.prices.merge(sketch.prices)
+        return merged if merged is not None else cls(HyperLogLog(), QuantileSketch())
+
+
+class OrderSketches:
+    """Sketches of one coffee's history, with how far they have been caught up"""
+
+    __slots__ = ('customers', 'prices', 'orders_seen', 'customers_seen', 'last_row')
+
+    def __init__(self):
+        self.customers = HyperLogLog()
+        self.prices = QuantileSketch()
+        self.orders_seen = 0  # History positions folded into prices
+        self.customers_seen = 0  # Distinct customers folded into customers
+        self.last_row = -1  # Last store row read, for stores that keep no history
@@ -0,0 +1,431 @@
+import itertools
+import queue
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from operator import attrgetter, itemgetter
+
+from price_stats import PriceStats
+from store import Store
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS coffees (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    row INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL,
+    coffee_id INTEGER NOT NULL,
+    price REAL NOT NULL,
+    created_at REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cancelled_orders (
+    row INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL,
+    coffee_id INTEGER NOT NULL,
+    price REAL NOT NULL,
+    created_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS orders_by_coffee ON orders (coffee_id, customer_id, price);
+CREATE INDEX IF NOT EXISTS orders_by_customer ON orders (customer_id, coffee_id);
+"""
+# Indexes on columns added after the first release, created once migrations have run
+LATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS orders_by_coffee_time ON orders (coffee_id, created_at);
+CREATE INDEX IF NOT EXISTS orders_by_coffee_price ON orders (coffee_id, price);
+"""
+
+
+class ConnectionPool:
+    """A small fixed-size pool of SQLite connections shared between threads"""
+
+    def __init__(self, connect, size):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self._connections = queue.LifoQueue()
+        self._all = [connect() for _ in range(size)]
+        for connection in self._all:
+            self._connections.put(connection)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block"""
+        connection = self._connections.get()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    def close(self):
+        for connection in self._all:
+            connection.close()
+
+
+class SQLiteStore(Store):
+    """Order storage in a local SQLite database
+
+    Orders are written to an indexed orders table instead of being kept in
+    Python lists, and the derived queries (average_price(), customers(),
+    most_aficionado(), ...) run as SQL aggregates over the indexes. Inserts
+    are buffered and written in batches inside one transaction; any read
+    flushes the buffer first so results always include every order.
+    close() writes the buffer and releases the connections. A store that
+    is never closed still writes its buffer when it is garbage collected
+    or when the interpreter exits, but orders buffered at a hard crash are
+    lost; call flush() to make them durable sooner.
+
+    The first order naming a customer or coffee records it in the
+    customers or coffees table under an id the database owns, and orders
+    refer to it by that id. Opening an existing file recreates every
+    customer and coffee it records, bound to the store, so the reopened
+    orders keep their attribution; customers() and coffees() return them.
+    Names are recorded once; later renames and retirements are not. A
+    file with orders but no customers or coffees (written before they were
+    recorded) can't be attributed, so opening it raises ValueError.
+    Cancelled orders move to a cancelled_orders table, so the queries
+    never see them.
+    """
+
+    indexes_in_memory = False
+    _memory_ids = itertools.count(1)  # Names for private shared in-memory databases
+
+    def __init__(self, path=None, pool_size=4, batch_size=1000):
+        if path is None:
+            # A named shared-cache database, so every pooled connection sees it
+            path = f"file:coffee_shop_{next(SQLiteStore._memory_ids)}?mode=memory&cache=shared"
+        self.path = path
+        self.batch_size = batch_size
+        self._pool = ConnectionPool(self._connect, pool_size)
+        self._lock = threading.Lock()  # Guards the insert buffers, row counter and entity ids
+        self._pending = []
+        self._pending_entities = []  # (table, id, name) for customers/coffees not yet written
+        self._ids = {}  # customer or coffee -> database id
+        self._customers = {}  # database id -> Customer
+        self._coffees = {}  # database id -> Coffee
+        with self._pool.connection() as connection:
+            connection.executescript(SCHEMA)
+            columns = {info[1] for info in connection.execute("PRAGMA table_info(orders)")}
+            if 'created_at' not in columns:
+                connection.execute("ALTER TABLE orders ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+            connection.executescript(LATE_INDEXES)
+            # Cancelled rows keep their numbers, so new rows must not reuse them
+            last_row = connection.execute(
+                "SELECT MAX(row) FROM (SELECT MAX(row) AS row FROM orders "
+                "UNION ALL SELECT MAX(row) FROM cancelled_orders)").fetchone()[0]
+            customers = connection.execute("SELECT id, name FROM customers ORDER BY id").fetchall()
+            coffees = connection.execute("SELECT id, name FROM coffees ORDER BY id").fetchall()
+        if last_row is not None and not (customers and coffees):
+            self._pool.close()
+            raise ValueError(f"{path} has orders but no customers or coffees to attribute them to")
+        self._next_row = 0 if last_row is None else last_row + 1
+        self._next_ids = {'customers': customers[-1][0] + 1 if customers else 1,
+                          'coffees': coffees[-1][0] + 1 if coffees else 1}
+        # Holds no reference to self, so unclosed stores still get collected
+        self._finalizer = weakref.finalize(self, _close, self._lock, self._pool, self._pending,
+                                           self._pending_entities)
+        # In id order, so their creation-order ids break spend ties as before
+        for customer_id, name in customers:
+            customer = self._customers[customer_id] = Customer(name, self)
+            self._ids[customer] = customer_id
+        for coffee_id, name in coffees:
+            coffee = self._coffees[coffee_id] = Coffee(name, self)
+            self._ids[coffee] = coffee_id
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, uri=self.path.startswith("file:"),
+                                     check_same_thread=False, isolation_level=None)
+        # Let readers run alongside a writer: WAL for files, and no table read
+        # locks for shared-cache in-memory databases
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA read_uncommitted = 1")
+        return connection
+
+    def new_rows(self):
+        return None  # Rows live in the database, not on the customer or coffee
+
+    def _register(self, customer, coffee):
+        """Return the database ids of customer and coffee, queuing rows for new ones"""
+        return (self._entity_id(customer, 'customers', self._customers),
+                self._entity_id(coffee, 'coffees', self._coffees))
+
+    def _entity_id(self, entity, table, entities):
+        entity_id = self._ids.get(entity)
+        if entity_id is None:
+            entity_id = self._next_ids[table]
+            self._next_ids[table] += 1
+            self._pending_entities.append((table, entity_id, entity.name))
+            entities[entity_id] = entity
+            self._ids[entity] = entity_id  # Last, so readers never see an unmapped id
+        return entity_id
+
+    def _id(self, entity):
+        """Return entity's database id, or 0 (no rows) if it never ordered here"""
+        return self._ids.get(entity, 0)
+
+    def customers(self):
+        """Return every customer the database records, in the order it first saw them"""
+        return list(self._customers.values())
+
+    def coffees(self):
+        """Return every coffee the database records, in the order it first saw them"""
+        return list(self._coffees.values())
+
+    def append(self, customer, coffee, price, created_at):
+        """Buffer an order for insertion and return its row number"""
+        with self._lock:
+            customer_id, coffee_id = self._register(customer, coffee)
+            row = self._next_row
+            self._next_row += 1
+            self._pending.append((row, customer_id, coffee_id, price, created_at))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+            return row
+
+    def extend(self, customers, coffees, prices, created_ats):
+        """Insert many orders in a single transaction and return their row range"""
+        with self._lock:
+            first = self._next_row
+            columns = zip(customers, coffees, prices, created_ats)
+            for row, (customer, coffee, price, created_at) in enumerate(columns, first):
+                customer_id, coffee_id = self._register(customer, coffee)
+                self._pending.append((row, customer_id, coffee_id, price, created_at))
+            self._next_row = first + len(prices)
+            self._flush_locked()
+            return range(first, self._next_row)
+
+    def flush(self):
+        """Write any buffered orders to the database"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        _write_pending(self._pool, self._pending, self._pending_entities)
+
+    def _query(self, sql, params=()):
+        self.flush()
+        with self._pool.connection() as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def _row_field(self, column, row):
+        with self._lock:
+            for pending in self._pending:
+                if pending[0] == row:
+                    return pending[column]
+        # A cancelled order's row moved to cancelled_orders, but views can still read it
+        columns = "customer_id, coffee_id, price, created_at"
+        result = self._query(f"SELECT {columns} FROM orders WHERE row = ? UNION ALL "
+                             f"SELECT {columns} FROM cancelled_orders WHERE row = ?", (row, row))
+        if not result:
+            raise IndexError(f"No order at row {row}")
+        return result[0][column - 1]
+
+    def cancel(self, row):
+        """Move the order at row into cancelled_orders, out of every query"""
+        self.flush()
+        with self._pool.connection() as connection:
+            connection.execute("BEGIN")
+            try:
+                moved = connection.execute(
+                    "INSERT INTO cancelled_orders SELECT row, customer_id, coffee_id, price, "
+                    "created_at FROM orders WHERE row = ?", (row,)).rowcount
+                connection.execute("DELETE FROM orders WHERE row = ?", (row,))
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        if not moved:
+            raise IndexError(f"No order at row {row}")
+
+    def is_cancelled(self, row):
+        """Return whether the order at row has been cancelled"""
+        return bool(self._query("SELECT 1 FROM cancelled_orders WHERE row = ?", (row,)))
+
+    def customer(self, row):
+        """Return the customer who placed the order at row"""
+        return self._customers[self._row_field(1, row)]
+
+    def coffee(self, row):
+        """Return the coffee ordered at row"""
+        return self._coffees[self._row_field(2, row)]
+
+    def price(self, row):
+        """Return the price of the order at row"""
+        return self._row_field(3, row)
+
+    def created_at(self, row):
+        """Return the creation time of the order at row"""
+        return self._row_field(4, row)
+
+    def customer_orders(self, customer):
+        """Return Order views for every order placed by customer"""
+        rows = self._query("SELECT row FROM orders WHERE customer_id = ? ORDER BY row",
+                           (self._id(customer),))
+        return self.orders(row for row, in rows)
+
+    def coffee_orders(self, coffee):
+        """Return Order views for every order of coffee"""
+        rows = self._query("SELECT row FROM orders WHERE coffee_id = ? ORDER BY row",
+                           (self._id(coffee),))
+        return self.orders(row for row, in rows)
+
+    def iter_coffee_orders(self, coffee, page_size=10_000):
+        """Yield (customer, price) for every order of coffee, a page at a time
+
+        Pages are read by row number, so no connection is held between them
+        and memory stays constant however many orders the coffee has.
+        """
+        last_row = -1
+        while True:
+            page = self.coffee_orders_after(coffee, last_row, page_size)
+            for last_row, customer, price in page:
+                yield customer, price
+            if len(page) < page_size:
+                return
+    
+    def coffee_orders_after(self, coffee, after_row, limit):
+        """Return up to limit (row, customer, price) for coffee's orders after after_row"""
+        page = self._query("SELECT row, customer_id, price FROM orders "
+                           "WHERE coffee_id = ? AND row > ? ORDER BY row LIMIT ?",
+                           (self._id(coffee), after_row, limit))
+        customers = self._customers
+        return [(row, customers[customer_id], price) for row, customer_id, price in page]
+    
+    def customer_coffees(self, customer):
+        """Return the distinct coffees customer ordered, in first-order order"""
+        rows = self._query("SELECT coffee_id FROM orders WHERE customer_id = ? "
+                           "GROUP BY coffee_id ORDER BY MIN(row)", (self._id(customer),))
+        return [self._coffees[coffee_id] for coffee_id, in rows]
+
+    def coffee_customers(self, coffee):
+        """Return the distinct customers of coffee, in first-order order"""
+        rows = self._query("SELECT customer_id FROM orders WHERE coffee_id = ? "
+                           "GROUP BY customer_id ORDER BY MIN(row)", (self._id(coffee),))
+        return [self._customers[customer_id] for customer_id, in rows]
+
+    def count_customer_coffees(self, customer):
+        """Return how many distinct coffees customer ordered"""
+        return self._query("SELECT COUNT(DISTINCT coffee_id) FROM orders WHERE customer_id = ?",
+                           (self._id(customer),))[0][0]
+
+    def count_coffee_customers(self, coffee):
+        """Return how many distinct customers ordered coffee"""
+        return self._query("SELECT COUNT(DISTINCT customer_id) FROM orders WHERE coffee_id = ?",
+                           (self._id(coffee),))[0][0]
+
+    def coffee_stats(self, coffee):
+        """Return a PriceStats for coffee computed by one SQL aggregate"""
+        count, total, total_squares, low, high = self._query(
+            "SELECT COUNT(*), SUM(price), SUM(price * price), MIN(price), MAX(price) "
+            "FROM orders WHERE coffee_id = ?", (self._id(coffee),))[0]
+        stats = PriceStats()
+        if count:
+            stats.count, stats.total, stats.total_squares = count, total, total_squares
+            stats.min, stats.max = low, high
+        return stats
+
+    def coffee_recent_totals(self, coffee, since):
+        """Return (count, revenue) of coffee's orders created at or after since"""
+        count, revenue = self._query("SELECT COUNT(*), TOTAL(price) FROM orders "
+                                     "WHERE coffee_id = ? AND created_at >= ?",
+                                     (self._id(coffee), since))[0]
+        return count, revenue
+
+    def _filters(self, coffee, customer, low, high):
+        """Return a WHERE clause and parameters for an OrderQuery on one coffee"""
+        clauses = ["coffee_id = ?"]
+        params = [self._id(coffee)]
+        if customer is not None:
+            clauses.append("customer_id = ?")
+            params.append(self._id(customer))
+        if low is not None:
+            clauses.append("price >= ?")
+            params.append(low)
+        if high is not None:
+            clauses.append("price <= ?")
+            params.append(high)
+        return " AND ".join(clauses), params
+
+    def query_orders(self, coffee, customer=None, low=None, high=None):
+        """Return Order views for coffee's orders matching the filters, in row order"""
+        where, params = self._filters(coffee, customer, low, high)
+        rows = self._query(f"SELECT row FROM orders WHERE {where} ORDER BY row", params)
+        return self.orders(row for row, in rows)
+
+    def query_totals(self, coffee, customer=None, low=None, high=None):
+        """Return {customer: [count, total]} for coffee's matching orders, in first-order order"""
+        where, params = self._filters(coffee, customer, low, high)
+        rows = self._query(f"SELECT customer_id, COUNT(*), TOTAL(price) FROM orders "
+                           f"WHERE {where} GROUP BY customer_id ORDER BY MIN(row)", params)
+        return {self._customers[customer_id]: [count, total]
+                for customer_id, count, total in rows}
+
+    def top_customers(self, coffee, k):
+        """Return up to k (customer, total spent) pairs for coffee, skipping retired customers"""
+        self.flush()
+        top = []
+        if k == 0:
+            return top
+        with self._pool.connection() as connection:
+            cursor = connection.execute(
+                "SELECT customer_id, SUM(price) AS total FROM orders WHERE coffee_id = ? "
+                "GROUP BY customer_id ORDER BY total DESC", (self._id(coffee),))
+            # Database ids follow first orders, so break ties by creation order as Leaderboard does
+            for total, tied in itertools.groupby(cursor, key=itemgetter(1)):
+                customers = sorted((self._customers[customer_id] for customer_id, _ in tied),
+                                   key=attrgetter('id'))
+                top.extend((customer, total) for customer in customers if not customer.retired)
+                if len(top) >= k:
+                    break
+        return top[:k]
+
+    def most_aficionado(self, coffee):
+        """Return the customer who has spent the most on coffee, or None"""
+        top = self.top_customers(coffee, 1)
+        return top[0][0] if top else None
+
+    def close(self):
+        """Flush buffered orders and close every pooled connection (only the first call counts)"""
+        self._finalizer()
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM orders")[0][0]
+
+    def __repr__(self):
+        return f"SQLiteStore(path='{self.path}')"
+
+
+def _write_pending(pool, pending, pending_entities):
+    """Insert buffered customers, coffees and orders in one transaction and empty the buffers"""
+    if not pending and not pending_entities:
+        return
+    with pool.connection() as connection:
+        connection.execute("BEGIN")
+        try:
+            for table, entity_id, name in pending_entities:
+                connection.execute(f"INSERT INTO {table} (id, name) VALUES (?, ?)", (entity_id, name))
+            connection.executemany("INSERT INTO orders (row, customer_id, coffee_id, price, created_at) "
+                                   "VALUES (?, ?, ?, ?, ?)", pending)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+    pending.clear()  # In place: the finalizer holds these same lists
+    pending_entities.clear()
+
+
+def _close(lock, pool, pending, pending_entities):
+    """Write a store's buffered orders and close its pool, at close(), collection or exit"""
+    with lock:
+        _write_pending(pool, pending, pending_entities)
+    pool.close()
+
+
+# Imported at the bottom to avoid circular imports
+from coffee import Coffee  # noqa: E402
+from customer import Customer  # noqa: E402
@@ -0,0 +1,87 @@
+class Store:
+    """Base class for pluggable order storage backends
+
+    Customers and coffees bind to the store passed to their constructor,
+    or else to whichever store is active when they are created, and every
+    order between them is recorded in that store. With neither, orders are
+    plain Order objects in Python lists.
+
+    Backends with indexes_in_memory set keep the models' own in-memory
+    aggregates (price stats, distinct customers, spend rankings) up to date;
+    backends without it answer those queries themselves (see SQLiteStore).
+    """
+
+    # Store that newly created customers and coffees attach to (None = plain lists)
+    active = None
+    indexes_in_memory = True
+    # Registries that customers/coffees created in this store join instead of
+    # Customer.all_customers/Coffee.all_coffees (None = the class-wide ones)
+    customer_registry = None
+    coffee_registry = None
+
+    def activate(self):
+        """Make this the store used by customers and coffees created from now on"""
+        Store.active = self
+        return self
+
+    @classmethod
+    def deactivate(cls):
+        """Go back to keeping orders as plain Order objects"""
+        Store.active = None
+
+    @classmethod
+    def new_order_list(cls, store=None):
+        """Return (store, empty order list) for a new customer or coffee in store (default: active)"""
+        if store is None:
+            store = Store.active
+        if store is None:
+            return None, []
+        return store, store.new_rows()
+
+    def new_rows(self):
+        """Return the per-entity container of row numbers (None if not kept)"""
+        raise NotImplementedError
+
+    def append(self, customer, coffee, price, created_at):
+        """Record an order and return its row number"""
+        raise NotImplementedError
+
+    def extend(self, customers, coffees, prices, created_ats):
+        """Record many orders from parallel columns and return their row range"""
+        raise NotImplementedError
+
+    def customer(self, row):
+        """Return the customer who placed the order at row"""
+        raise NotImplementedError
+
+    def coffee(self, row):
+        """Return the coffee ordered at row"""
+        raise NotImplementedError
+
+    def price(self, row):
+        """Return the price of the order at row"""
+        raise NotImplementedError
+
+    def created_at(self, row):
+        """Return the creation time of the order at row"""
+        raise NotImplementedError
+
+    def cancel(self, row):
+        """Mark the order at row cancelled"""
+        raise NotImplementedError
+
+    def is_cancelled(self, row):
+        """Return whether the order at row has been cancelled"""
+        raise NotImplementedError
+
+    def order(self, row):
+        """Return an Order view over row"""
+        return Order._view(self, row)
+
+    def orders(self, rows):
+        """Return a list of Order views, one per row number in rows"""
+        return [Order._view(self, row) for row in rows]
+
+
+# Imported at the bottom to avoid circular imports
+from order import Order  # noqa: E402
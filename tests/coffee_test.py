@@ -13,8 +13,8 @@ class TestCoffee(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures before each test method."""
-        # Clear the all_customers list before each test
-        Customer.all_customers = []
+        # Clear the customer registry before each test
+        Customer.clear_registry()
     
     def test_coffee_initialization(self):
         """Test Coffee initialization with valid name"""
@@ -44,6 +44,14 @@ class TestCoffee(unittest.TestCase):
         with self.assertRaises(AttributeError):
             coffee.name = "Latte"
     
+    def test_coffee_find(self):
+        """Test looking coffees up by name"""
+        Coffee.clear_registry()
+        espresso = Coffee("Espresso")
+        
+        self.assertIs(Coffee.find("Espresso"), espresso)
+        self.assertIsNone(Coffee.find("Mocha"))
+    
     def test_coffee_orders_empty(self):
         """Test that new coffee has no orders"""
         coffee = Coffee("Espresso")
@@ -101,6 +109,78 @@ class TestCoffee(unittest.TestCase):
         self.assertEqual(len(coffee.customers()), 1)  # Should only have one unique customer
         self.assertIn(customer, coffee.customers())
     
+    def test_coffee_customers_first_seen_order(self):
+        """Test that customers() keeps first-order ordering and num_customers counts them"""
+        coffee = Coffee("Espresso")
+        alice = Customer("Alice")
+        bob = Customer("Bob")
+        
+        Order(bob, coffee, 3.0)
+        Order(alice, coffee, 3.0)
+        Order(bob, coffee, 3.0)
+        
+        self.assertEqual(coffee.customers(), [bob, alice])
+        self.assertEqual(coffee.num_customers(), 2)
+    
+    def test_coffee_top_customers(self):
+        """Test top_customers returns the biggest spenders with their totals"""
+        coffee = Coffee("Espresso")
+        alice = Customer("Alice")
+        bob = Customer("Bob")
+        charlie = Customer("Charlie")
+        
+        Order(alice, coffee, 3.0)
+        Order(bob, coffee, 5.0)
+        Order(charlie, coffee, 2.0)
+        Order(alice, coffee, 4.0)
+        
+        self.assertEqual(coffee.top_customers(2), [(alice, 7.0), (bob, 5.0)])
+        self.assertEqual(len(coffee.top_customers(10)), 3)
+        self.assertEqual(coffee.top_customers(0), [])
+        
+        with self.assertRaises(ValueError):
+            coffee.top_customers(-1)
+    
+    def test_top_customers_follow_cancels_and_ties(self):
+        """Test the ranking after the leader loses spend, with ties to the earliest customer"""
+        coffee = Coffee("Espresso")
+        alice = Customer("Alice")
+        bob = Customer("Bob")
+        charlie = Customer("Charlie")
+        
+        Order(charlie, coffee, 5.0)
+        big = Order(alice, coffee, 9.0)
+        Order(bob, coffee, 5.0)
+        self.assertIs(Customer.most_aficionado(coffee), alice)
+        
+        big.cancel()
+        self.assertIs(Customer.most_aficionado(coffee), bob)
+        self.assertEqual(coffee.top_customers(3), [(bob, 5.0), (charlie, 5.0)])
+        Order(charlie, coffee, 1.0)
+        self.assertIs(Customer.most_aficionado(coffee), charlie)
+    
+    def test_top_customers_beyond_the_tracked_spenders(self):
+        """Test the ranking as customers outside the tracked top spenders overtake them"""
+        coffee = Coffee("Espresso")
+        customers = [Customer(f"Customer{i}") for i in range(30)]
+        for i, customer in enumerate(customers):
+            Order(customer, coffee, 1.0 + i % 10)
+        
+        # The three smallest spenders overtake everyone, one order at a time
+        for _ in range(3):
+            for customer in customers[:3]:
+                Order(customer, coffee, 5.0)
+        self.assertEqual(coffee.top_customers(3),
+                         [(customers[2], 18.0), (customers[1], 17.0), (customers[0], 16.0)])
+        
+        customers[2].retire()
+        self.assertEqual(coffee.top_customers(2), [(customers[1], 17.0), (customers[0], 16.0)])
+        ranked = coffee.top_customers(12)
+        self.assertEqual(len(ranked), 12)
+        self.assertEqual(ranked[2:5], [(customers[9], 10.0), (customers[19], 10.0),
+                                       (customers[29], 10.0)])
+        self.assertIs(Customer.most_aficionado(coffee), customers[1])
+    
     def test_coffee_average_price_calculation(self):
         """Test average price calculation with multiple orders"""
         coffee = Coffee("Espresso")
@@ -112,6 +192,66 @@ class TestCoffee(unittest.TestCase):
         
         expected_average = (2.0 + 4.0 + 6.0) / 3
         self.assertEqual(coffee.average_price(), expected_average)
+    
+    def test_coffee_price_range_and_stddev(self):
+        """Test min, max and standard deviation of order prices"""
+        coffee = Coffee("Espresso")
+        customer = Customer("Alice")
+        
+        Order(customer, coffee, 2.0)
+        Order(customer, coffee, 4.0)
+        Order(customer, coffee, 6.0)
+        
+        self.assertEqual(coffee.min_price(), 2.0)
+        self.assertEqual(coffee.max_price(), 6.0)
+        self.assertAlmostEqual(coffee.price_stddev(), (8 / 3) ** 0.5)
+    
+    def test_coffee_price_stats_empty(self):
+        """Test price statistics return 0 for coffee with no orders"""
+        coffee = Coffee("Espresso")
+        self.assertEqual(coffee.min_price(), 0)
+        self.assertEqual(coffee.max_price(), 0)
+        self.assertEqual(coffee.price_stddev(), 0)
+    
+    def test_coffee_recent_sales(self):
+        """Test order counts, revenue and average price over recent windows"""
+        coffee = Coffee("Espresso")
+        customer = Customer("Alice")
+        now = [10000.0]
+        self.addCleanup(setattr, Order, 'clock', Order.clock)
+        Order.clock = lambda: now[0]
+        Order(customer, coffee, 2.0)
+        now[0] += 1800
+        Order(customer, coffee, 4.0)
+        Order(customer, coffee, 6.0)
+        now[0] += 60
+        
+        self.assertEqual(coffee.num_recent_orders(300), 2)
+        self.assertEqual(coffee.recent_revenue(300), 10.0)
+        self.assertEqual(coffee.recent_average_price(300), 5.0)
+        self.assertEqual(coffee.num_recent_orders(3600), 3)
+        self.assertEqual(coffee.recent_average_price(30), 0)
+        with self.assertRaises(ValueError):
+            coffee.num_recent_orders(0)
+        with self.assertRaises(TypeError):
+            coffee.recent_revenue("1h")
+    
+    def test_coffee_sketches(self):
+        """Test approximate distinct customers and price quantiles, caught up as orders arrive"""
+        coffee = Coffee("Espresso")
+        customers = [Customer(f"Customer{i}") for i in range(10)]
+        self.assertEqual(coffee.approx_num_customers(), 0)
+        self.assertEqual(coffee.price_quantile(0.5), 0)
+        for i in range(100):
+            Order(customers[i % 10], coffee, 1 + i % 10)
+        
+        self.assertEqual(coffee.approx_num_customers(), 10)
+        self.assertEqual(coffee.price_quantiles([0, 0.5, 1]), [1, 5, 10])
+        Order(Customer("Zoe"), coffee, 10.0)
+        self.assertEqual(coffee.approx_num_customers(), 11)
+        self.assertEqual(coffee.sketches().prices.count, 101)
+        with self.assertRaises(ValueError):
+            coffee.price_quantile(1.5)
 
 if __name__ == '__main__':
     unittest.main()
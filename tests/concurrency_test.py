@@ -0,0 +1,147 @@
+import unittest
+import sys
+import os
+import random
+import threading
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from order_store import OrderStore
+
+THREADS = 32
+ORDERS_PER_THREAD = 500
+
+class TestConcurrency(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the customer registry before each test
+        Customer.clear_registry()
+        self.customers = [Customer(f"Customer{i}") for i in range(10)]
+        self.coffees = [Coffee(f"Coffee{i}") for i in range(4)]
+        # Switch threads far more often than usual to shake out races
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+    
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+    
+    def hammer(self, worker):
+        """Run worker(thread index) on THREADS threads and wait for them all"""
+        errors = []
+        start = threading.Barrier(THREADS)
+        
+        def run(index):
+            try:
+                start.wait()
+                worker(index)
+            except Exception as error:  # Surface failures from worker threads
+                errors.append(error)
+        
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+    
+    def place_orders(self, index):
+        """Place orders from one thread while reading derived results"""
+        rng = random.Random(index)
+        for _ in range(ORDERS_PER_THREAD):
+            customer = rng.choice(self.customers)
+            coffee = rng.choice(self.coffees)
+            customer.create_order(coffee, rng.randint(1, 10))
+            coffee.customers()
+            coffee.average_price()
+            customer.coffees()
+            Customer.most_aficionado(coffee)
+    
+    def check_invariants(self):
+        """Check every aggregate against a recount from the order lists"""
+        total_orders = sum(coffee.num_orders() for coffee in self.coffees)
+        self.assertEqual(total_orders, THREADS * ORDERS_PER_THREAD)
+        self.assertEqual(sum(len(c.orders()) for c in self.customers), total_orders)
+        
+        for coffee in self.coffees:
+            orders = coffee.orders()
+            self.assertEqual(len(orders), coffee.num_orders())
+            self.assertAlmostEqual(coffee.average_price(),
+                                   sum(o.price for o in orders) / len(orders))
+            
+            spend = {}
+            for order in orders:
+                spend[order.customer] = spend.get(order.customer, 0) + order.price
+            self.assertEqual(set(coffee.customers()), set(spend))
+            self.assertEqual(len(coffee.customers()), len(spend))
+            top = max(spend.values())
+            self.assertEqual(spend[Customer.most_aficionado(coffee)], top)
+        
+        for customer in self.customers:
+            coffees = {order.coffee for order in customer.orders()}
+            self.assertEqual(set(customer.coffees()), coffees)
+            self.assertEqual(len(customer.coffees()), len(coffees))
+    
+    def test_concurrent_order_creation(self):
+        """Test that 32 threads creating and reading orders keep every invariant"""
+        self.hammer(self.place_orders)
+        self.check_invariants()
+    
+    def test_concurrent_order_creation_with_store(self):
+        """Test the same invariants when orders live in an OrderStore"""
+        store = OrderStore().activate()
+        try:
+            self.customers = [Customer(f"Customer{i}") for i in range(10)]
+            self.coffees = [Coffee(f"Coffee{i}") for i in range(4)]
+            self.hammer(self.place_orders)
+        finally:
+            OrderStore.deactivate()
+        
+        self.assertEqual(len(store), THREADS * ORDERS_PER_THREAD)
+        self.check_invariants()
+    
+    def test_retired_customers_never_rejoin_leaderboards(self):
+        """Test that orders racing a retire() never put the customer back on a leaderboard"""
+        retiring = self.customers[:5]
+        
+        def work(index):
+            rng = random.Random(index)
+            if index == 0:
+                for customer in retiring:
+                    customer.retire()
+                return
+            for _ in range(ORDERS_PER_THREAD // 5):
+                customer = rng.choice(self.customers)
+                coffee = rng.choice(self.coffees)
+                try:
+                    if index % 2:
+                        customer.create_order(coffee, rng.randint(1, 10))
+                    else:
+                        Order.bulk_create([(customer, coffee, rng.randint(1, 10)),
+                                           (rng.choice(self.customers), coffee, 5)])
+                except ValueError:
+                    pass  # The customer was retired first
+        
+        self.hammer(work)
+        for coffee in self.coffees:
+            self.assertNotIn(Customer.most_aficionado(coffee), retiring)
+            ranked = {customer for customer, _ in coffee.top_customers(len(self.customers))}
+            self.assertFalse(ranked & set(retiring))
+    
+    def test_concurrent_customer_registration(self):
+        """Test that concurrent Customer creation registers everyone exactly once"""
+        def register(index):
+            for i in range(50):
+                Customer(f"T{index}-{i}")
+        
+        self.hammer(register)
+        # The ten fixture customers plus 50 per thread
+        self.assertEqual(len(Customer.all_customers), 10 + THREADS * 50)
+        self.assertIsNotNone(Customer.find("T31-49"))
+
+if __name__ == '__main__':
+    unittest.main()
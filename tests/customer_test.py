@@ -1,3 +1,4 @@
+import gc
 import unittest
 import sys
 import os
@@ -13,8 +14,8 @@ class TestCustomer(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures before each test method."""
-        # Clear the all_customers list before each test
-        Customer.all_customers = []
+        # Clear the customer registry before each test
+        Customer.clear_registry()
         
     def test_customer_initialization(self):
         """Test Customer initialization with valid name"""
@@ -48,6 +49,69 @@ class TestCustomer(unittest.TestCase):
         with self.assertRaises(ValueError):
             customer.name = ""
     
+    def test_customer_find(self):
+        """Test looking customers up by name, including after a rename"""
+        john = Customer("John")
+        jane = Customer("Jane")
+        
+        self.assertIs(Customer.find("John"), john)
+        self.assertIs(Customer.find("Jane"), jane)
+        self.assertIsNone(Customer.find("Nobody"))
+        
+        john.name = "Johnny"
+        self.assertIsNone(Customer.find("John"))
+        self.assertIs(Customer.find("Johnny"), john)
+    
+    def test_customer_find_after_manual_reset(self):
+        """Test that replacing all_customers by hand keeps find working"""
+        Customer("John")
+        Customer.all_customers = []
+        
+        self.assertIsNone(Customer.find("John"))
+        john = Customer("John")
+        self.assertIs(Customer.find("John"), john)
+        self.assertEqual(list(Customer.all_customers), [john])
+    
+    def test_weak_registry_reclaims_unreferenced_customers(self):
+        """Test that weak registry mode lets transient customers be collected"""
+        Customer.use_weak_registry()
+        try:
+            kept = Customer("Kept")
+            Customer("Transient")
+            gc.collect()
+            
+            self.assertEqual(list(Customer.all_customers), [kept])
+            self.assertIsNone(Customer.find("Transient"))
+            self.assertIs(Customer.find("Kept"), kept)
+        finally:
+            Customer.use_weak_registry(False)
+    
+    def test_customer_retire(self):
+        """Test that retired customers leave the registry and aficionado rankings"""
+        alice = Customer("Alice")
+        bob = Customer("Bob")
+        coffee = Coffee("Espresso")
+        alice.create_order(coffee, 9.0)
+        bob.create_order(coffee, 3.0)
+        
+        alice.retire()
+        
+        self.assertTrue(alice.retired)
+        self.assertNotIn(alice, Customer.all_customers)
+        self.assertIsNone(Customer.find("Alice"))
+        self.assertEqual(Customer.most_aficionado(coffee), bob)
+        self.assertEqual(coffee.num_orders(), 2)  # History is kept
+        with self.assertRaises(ValueError):
+            alice.create_order(coffee, 3.0)
+    
+    def test_clear_registry(self):
+        """Test that clear_registry forgets every customer"""
+        Customer("John")
+        Customer.clear_registry()
+        
+        self.assertEqual(len(Customer.all_customers), 0)
+        self.assertIsNone(Customer.find("John"))
+    
     def test_customer_orders_empty(self):
         """Test that new customer has no orders"""
         customer = Customer("John")
@@ -73,6 +137,17 @@ class TestCustomer(unittest.TestCase):
         self.assertEqual(len(customer.orders()), 1)
         self.assertIn(order, customer.orders())
     
+    def test_customer_create_orders(self):
+        """Test creating several orders at once through customer"""
+        customer = Customer("John")
+        coffee1 = Coffee("Espresso")
+        coffee2 = Coffee("Latte")
+        
+        orders = customer.create_orders([(coffee1, 3.50), (coffee2, 4.25)])
+        
+        self.assertEqual(customer.orders(), orders)
+        self.assertEqual(customer.coffees(), [coffee1, coffee2])
+    
     def test_customer_multiple_orders(self):
         """Test customer with multiple orders"""
         customer = Customer("John")
@@ -98,6 +173,7 @@ class TestCustomer(unittest.TestCase):
         
         self.assertEqual(len(customer.orders()), 2)
         self.assertEqual(len(customer.coffees()), 1)  # Should only have one unique coffee
+        self.assertEqual(customer.num_coffees(), 1)
     
     def test_most_aficionado_class_method(self):
         """Test the most_aficionado class method"""
@@ -113,6 +189,21 @@ class TestCustomer(unittest.TestCase):
         aficionado = Customer.most_aficionado(coffee)
         self.assertEqual(aficionado, customer1)
     
+    def test_most_aficionado_tie_goes_to_earliest_customer(self):
+        """Test most_aficionado breaks spend ties by customer creation order"""
+        customer1 = Customer("Alice")
+        customer2 = Customer("Bob")
+        coffee = Coffee("Espresso")
+        
+        customer2.create_order(coffee, 4.0)
+        customer1.create_order(coffee, 4.0)
+        
+        self.assertEqual(Customer.most_aficionado(coffee), customer1)
+        
+        # Bob pulls ahead with another order
+        customer2.create_order(coffee, 1.0)
+        self.assertEqual(Customer.most_aficionado(coffee), customer2)
+    
     def test_most_aficionado_no_orders(self):
         """Test most_aficionado returns None when no orders exist"""
         customer = Customer("John")
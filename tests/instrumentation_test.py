@@ -0,0 +1,78 @@
+import io
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrumentation
+from coffee import Coffee
+from customer import Customer
+from order import Order
+
+class TestInstrumentation(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the customer registry before each test
+        Customer.clear_registry()
+        instrumentation.reset()
+        self.addCleanup(instrumentation.disable)
+        self.alice = Customer("Alice")
+        self.bob = Customer("Bob")
+        self.coffee = Coffee("Espresso")
+    
+    def test_disabled_leaves_methods_untouched(self):
+        """Test that nothing is wrapped or recorded while disabled"""
+        init = Order.__dict__['__init__']
+        instrumentation.enable()
+        self.assertIsNot(Order.__dict__['__init__'], init)
+        instrumentation.disable()
+        
+        self.assertIs(Order.__dict__['__init__'], init)
+        self.assertIsInstance(Customer.__dict__['most_aficionado'], classmethod)
+        Order(self.alice, self.coffee, 3.0)
+        self.assertEqual(instrumentation.stats()['Order.__init__']['calls'], 0)
+    
+    def test_counts_latencies_and_items(self):
+        """Test call counts, latency percentiles and items scanned"""
+        instrumentation.enable()
+        self.alice.create_order(self.coffee, 3.0)
+        self.bob.create_order(self.coffee, 5.0)
+        self.assertEqual(self.coffee.customers(), [self.alice, self.bob])
+        self.assertEqual(self.coffee.average_price(), 4.0)
+        self.assertIs(Customer.most_aficionado(self.coffee), self.bob)
+        
+        stats = instrumentation.stats()
+        self.assertEqual(stats['Customer.create_order']['calls'], 2)
+        self.assertEqual(stats['Order.__init__']['calls'], 2)
+        self.assertEqual(stats['Coffee.customers']['items'], 2)
+        self.assertEqual(stats['Customer.most_aficionado']['calls'], 1)
+        row = stats['Order.__init__']
+        self.assertGreater(row['total_us'], 0)
+        self.assertLessEqual(row['p50_us'], row['p99_us'])
+        self.assertLessEqual(row['p99_us'], row['max_us'])
+    
+    def test_errors_still_propagate(self):
+        """Test that wrapped methods raise exactly as before"""
+        instrumentation.enable()
+        with self.assertRaises(ValueError):
+            Order(self.alice, self.coffee, 100.0)
+    
+    def test_profile_context_manager(self):
+        """Test that profile() records a block and dumps a table"""
+        output = io.StringIO()
+        with instrumentation.profile(output) as run:
+            Order(self.alice, self.coffee, 3.0)
+            self.coffee.average_price()
+        
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertEqual(run.stats['Order.__init__']['calls'], 1)
+        self.assertEqual(run.stats['Coffee.average_price']['calls'], 1)
+        table = output.getvalue()
+        self.assertTrue(table.startswith("operation"))
+        self.assertIn("Coffee.average_price", table)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from order_intake import OrderIntake
+
+class TestOrderIntake(unittest.IsolatedAsyncioTestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the customer registry before each test
+        Customer.clear_registry()
+        self.customer = Customer("Alice")
+        self.coffee = Coffee("Espresso")
+    
+    async def test_submit_order_returns_order(self):
+        """Test that a submitted order is created and returned"""
+        async with OrderIntake() as intake:
+            order = await intake.submit_order(self.customer, self.coffee, 3.50)
+        
+        self.assertIsInstance(order, Order)
+        self.assertEqual(order.price, 3.50)
+        self.assertEqual(self.coffee.orders(), [order])
+    
+    async def test_concurrent_submissions_are_batched(self):
+        """Test many concurrent callers each get their own order"""
+        async with OrderIntake(max_pending=10, batch_size=25) as intake:
+            orders = await asyncio.gather(*(
+                intake.submit_order(self.customer, self.coffee, 1 + i % 9) for i in range(200)))
+        
+        self.assertEqual(len(set(map(id, orders))), 200)
+        self.assertEqual(self.coffee.num_orders(), 200)
+        self.assertEqual([order.price for order in orders], [1.0 + i % 9 for i in range(200)])
+    
+    async def test_invalid_order_only_fails_its_caller(self):
+        """Test that a validation error goes to the caller that caused it"""
+        async with OrderIntake() as intake:
+            results = await asyncio.gather(
+                intake.submit_order(self.customer, self.coffee, 3.0),
+                intake.submit_order(self.customer, self.coffee, 15.0),
+                intake.submit_order(self.customer, "not_a_coffee", 3.0),
+                intake.submit_order(self.customer, self.coffee, 4.0),
+                return_exceptions=True)
+        
+        self.assertIsInstance(results[0], Order)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertIsInstance(results[2], TypeError)
+        self.assertIsInstance(results[3], Order)
+        self.assertEqual(self.coffee.num_orders(), 2)
+    
+    async def test_backpressure_blocks_when_queue_full(self):
+        """Test that producers wait while the bounded queue is full"""
+        intake = OrderIntake(max_pending=1)
+        await intake.start()
+        first = asyncio.ensure_future(intake.submit_order(self.customer, self.coffee, 3.0))
+        second = asyncio.ensure_future(intake.submit_order(self.customer, self.coffee, 4.0))
+        await asyncio.sleep(0)
+        
+        # The first order fills the queue before the worker gets to run again
+        self.assertTrue(intake._queue.full())
+        self.assertFalse(second.done())
+        
+        await intake.stop()
+        self.assertEqual([(await first).price, (await second).price], [3.0, 4.0])
+    
+    async def test_submit_after_stop_is_rejected(self):
+        """Test that orders submitted once stop() has begun are refused"""
+        intake = OrderIntake()
+        await intake.start()
+        stopping = asyncio.ensure_future(intake.stop())
+        await asyncio.sleep(0)
+        with self.assertRaises(RuntimeError):
+            await intake.submit_order(self.customer, self.coffee, 3.0)
+        await stopping
+        self.assertEqual(self.coffee.num_orders(), 0)
+    
+    async def test_orders_left_after_worker_exits_fail(self):
+        """Test that an order queued once the worker is gone fails instead of hanging"""
+        intake = OrderIntake()
+        await intake.start()
+        intake._worker.cancel()  # As if the worker had died
+        await asyncio.sleep(0)
+        with self.assertRaises(RuntimeError):
+            await asyncio.wait_for(intake.submit_order(self.customer, self.coffee, 3.0), 1)
+        self.assertEqual(self.coffee.num_orders(), 0)
+    
+    async def test_submit_requires_running_intake(self):
+        """Test that submitting before start raises"""
+        with self.assertRaises(RuntimeError):
+            await OrderIntake().submit_order(self.customer, self.coffee, 3.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import io
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import BulkOrderError
+from order_io import export_orders, import_orders, iter_records, read_records
+from order_store import OrderStore
+from sqlite_store import SQLiteStore
+
+class TestOrderIO(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the registries before each test
+        Customer.clear_registry()
+        Coffee.clear_registry()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+    
+    def tearDown(self):
+        """Go back to plain order lists after each test."""
+        OrderStore.deactivate()
+    
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+    
+    def test_import_csv_resolves_and_creates_entities(self):
+        """Test that names are matched to existing entities or created"""
+        alice = Customer("Alice")
+        source = io.StringIO("customer,coffee,price\nAlice,Espresso,3.5\nBob,Espresso,4\n"
+                             "Alice,Latte,4.25\n")
+        
+        self.assertEqual(import_orders(source, chunk_size=2), 3)
+        espresso = Coffee.find("Espresso")
+        self.assertEqual(espresso.customers(), [alice, Customer.find("Bob")])
+        self.assertEqual(espresso.average_price(), 3.75)
+        self.assertEqual(len(alice.orders()), 2)
+    
+    def test_csv_header_is_optional_and_reorderable(self):
+        """Test positional rows and header-named columns"""
+        self.assertEqual(list(read_records(io.StringIO("Alice,Mocha,3.0\n"))),
+                         [(1, "Alice", "Mocha", "3.0")])
+        source = io.StringIO("price,store,Coffee,customer\n3.0,north,Mocha,Alice\n")
+        self.assertEqual(list(read_records(source)), [(2, "Alice", "Mocha", "3.0")])
+    
+    def test_import_jsonl(self):
+        """Test JSONL import, picked by file extension"""
+        path = self.path("orders.jsonl")
+        with open(path, "w") as f:
+            f.write('{"customer": "Alice", "coffee": "Mocha", "price": 5.0}\n\n'
+                    '{"customer": "Bob", "coffee": "Mocha", "price": "3"}\n')
+        
+        self.assertEqual(import_orders(path), 2)
+        self.assertEqual(Coffee.find("Mocha").num_orders(), 2)
+    
+    def test_bad_rows_report_line_numbers(self):
+        """Test that a chunk with bad rows is rejected with its line numbers"""
+        source = io.StringIO("Alice,Mocha,3.0\nBob,Mocha,cheap\nCarol,Mocha,99\nDan\n")
+        
+        with self.assertRaises(BulkOrderError) as context:
+            import_orders(source)
+        self.assertEqual([line for line, _ in context.exception.errors], [2, 3, 4])
+        self.assertEqual(Coffee.find("Mocha").num_orders(), 0)
+        
+        source = io.StringIO("Alice,Mocha,3.0\nBob,Mocha,99\n")
+        with self.assertRaises(BulkOrderError) as context:
+            import_orders(source)
+        self.assertEqual([line for line, _ in context.exception.errors], [2])
+        self.assertEqual(Coffee.find("Mocha").num_orders(), 0)
+    
+    def test_earlier_chunks_stay_imported(self):
+        """Test that chunks before a bad one are kept"""
+        source = io.StringIO("Alice,Mocha,3.0\nBob,Mocha,4.0\nCarol,Mocha,oops\n")
+        with self.assertRaises(BulkOrderError):
+            import_orders(source, chunk_size=2)
+        self.assertEqual(Coffee.find("Mocha").num_orders(), 2)
+    
+    def test_export_round_trip(self):
+        """Test that exported CSV and JSONL files import back to the same orders"""
+        import_orders(io.StringIO("Alice,Mocha,3.5\nBob,Latte,4.0\nAlice,Latte,2.25\n"))
+        records = list(iter_records())
+        self.assertEqual(records, [("Alice", "Mocha", 3.5), ("Bob", "Latte", 4.0),
+                                   ("Alice", "Latte", 2.25)])
+        
+        for name in ("orders.csv", "orders.jsonl"):
+            path = self.path(name)
+            self.assertEqual(export_orders(path), 3)
+            self.assertEqual([record[1:] for record in read_records(path)],
+                             [(customer, coffee, str(price) if name.endswith(".csv") else price)
+                              for customer, coffee, price in records])
+    
+    def test_export_from_stores(self):
+        """Test exporting orders kept in an OrderStore and in SQLite"""
+        for store in (OrderStore(), SQLiteStore()):
+            Customer.clear_registry()
+            Coffee.clear_registry()
+            store.activate()
+            import_orders(io.StringIO("Alice,Mocha,3.5\nBob,Mocha,4.0\n"))
+            out = io.StringIO()
+            self.assertEqual(export_orders(out, format="csv"), 2)
+            self.assertEqual(out.getvalue(), "customer,coffee,price\nAlice,Mocha,3.5\nBob,Mocha,4.0\n")
+            store.deactivate()
+            if isinstance(store, SQLiteStore):
+                store.close()
+    
+    def test_unknown_format(self):
+        """Test that only csv and jsonl are accepted"""
+        with self.assertRaises(ValueError):
+            list(read_records(io.StringIO(""), format="xml"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+import order_log
+from order import Order
+from order_log import (COVERED, OLD_SNAPSHOT_HEADER, OLD_SNAPSHOT_MAGIC, OrderLog, RECORD,
+                       SNAPSHOT_HEADER)
+from order_store import OrderStore
+
+class TestOrderLog(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the customer registry before each test
+        Customer.clear_registry()
+        Coffee.clear_registry()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'orders.log')
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def place_orders(self):
+        """Log a few orders and close the log, like a service shutting down"""
+        with OrderLog(self.path).attach():
+            alice = Customer("Alice")
+            bob = Customer("Bob")
+            espresso = Coffee("Espresso")
+            latte = Coffee("Latte")
+            alice.create_order(espresso, 3.50)
+            bob.create_order(latte, 4.25)
+            alice.create_orders([(latte, 4.50), (espresso, 5.0)])
+        Customer.clear_registry()
+        Coffee.clear_registry()
+    
+    def assert_restored(self, customers, coffees):
+        alice, bob = customers
+        espresso, latte = coffees
+        self.assertEqual([c.name for c in customers], ["Alice", "Bob"])
+        self.assertEqual([c.name for c in coffees], ["Espresso", "Latte"])
+        self.assertEqual(espresso.num_orders(), 2)
+        self.assertEqual(espresso.average_price(), 4.25)
+        self.assertEqual(latte.customers(), [bob, alice])
+        self.assertEqual(alice.coffees(), [espresso, latte])
+        self.assertEqual(Customer.most_aficionado(latte), alice)
+        self.assertIs(Customer.find("Bob"), bob)
+    
+    def test_restore_from_log(self):
+        """Test that orders written to the log are rebuilt on restore"""
+        self.place_orders()
+        
+        log = OrderLog(self.path)
+        self.assertEqual(len(log), 4)
+        self.assert_restored(*log.restore())
+        log.close()
+    
+    def test_restore_from_snapshot_and_log_tail(self):
+        """Test that checkpoint moves orders into the snapshot and restore merges both"""
+        self.place_orders()
+        with OrderLog(self.path) as log:
+            log.checkpoint()
+            self.assertEqual(os.path.getsize(self.path), 0)
+            self.assertEqual(len(log), 4)
+        
+        # Restart, restore, then keep logging on top of the snapshot
+        with OrderLog(self.path) as log:
+            customers, coffees = log.restore()
+            log.attach()
+            customers[1].create_order(coffees[0], 9.0)
+        Customer.clear_registry()
+        Coffee.clear_registry()
+        
+        with OrderLog(self.path) as log:
+            customers, coffees = log.restore()
+        self.assertEqual(coffees[0].num_orders(), 3)
+        self.assertEqual(Customer.most_aficionado(coffees[0]), customers[1])
+    
+    def test_restore_into_order_store(self):
+        """Test that restoring with an OrderStore active bulk-loads the orders into it"""
+        self.place_orders()
+        store = OrderStore().activate()
+        chunk = order_log.RESTORE_CHUNK
+        order_log.RESTORE_CHUNK = 3  # Load in two chunks, so the second adds to the first
+        try:
+            with OrderLog(self.path) as log:
+                customers, coffees = log.restore()
+        finally:
+            order_log.RESTORE_CHUNK = chunk
+            OrderStore.deactivate()
+        self.assertEqual(len(store), 4)
+        self.assert_restored(customers, coffees)
+        self.assertEqual([o.price for o in customers[0].orders()], [3.5, 4.5, 5.0])
+        self.assertEqual(coffees[0].top_customers(2), [(customers[0], 8.5)])
+    
+    def test_crash_before_truncating_the_log(self):
+        """Test that a snapshot installed before the log is truncated doesn't count orders twice"""
+        self.place_orders()
+        with OrderLog(self.path) as log:
+            customers, coffees = log.restore()
+            log.attach()
+            customers[1].orders()[0].cancel()
+        Customer.clear_registry()
+        Coffee.clear_registry()
+        
+        with open(self.path, 'rb') as f:
+            logged = f.read()
+        with open(self.path + '.cancels', 'rb') as f:
+            cancelled = f.read()
+        with OrderLog(self.path) as log:
+            log.checkpoint()
+        # Crash straight after installing the snapshot: both files keep their
+        # records, and the header still says the snapshot covers them
+        with open(self.path, 'wb') as f:
+            f.write(logged)
+        with open(self.path + '.cancels', 'wb') as f:
+            f.write(cancelled)
+        with open(self.path + '.snapshot', 'r+b') as f:
+            f.seek(SNAPSHOT_HEADER.size - COVERED.size)
+            f.write(COVERED.pack(len(logged), len(cancelled)))
+        
+        with OrderLog(self.path) as log:
+            self.assertEqual(len(log), 3)
+            customers, coffees = log.restore()
+        self.assertEqual(sum(c.num_orders() for c in coffees), 3)
+        self.assertEqual(customers[1].orders(), [])
+        self.assertEqual(coffees[0].num_orders(), 2)
+    
+    def test_crash_after_truncating_the_log(self):
+        """Test that records logged after a checkpoint interrupted by a crash are kept"""
+        self.place_orders()
+        covered = (os.path.getsize(self.path), os.path.getsize(self.path + '.cancels'))
+        with OrderLog(self.path) as log:
+            log.checkpoint()
+        # Crash after truncating, before the snapshot header was reset
+        with open(self.path + '.snapshot', 'r+b') as f:
+            f.seek(SNAPSHOT_HEADER.size - COVERED.size)
+            f.write(COVERED.pack(*covered))
+        
+        with OrderLog(self.path) as log:
+            self.assertEqual(len(log), 4)
+            customers, coffees = log.restore()
+            log.attach()
+            for price in range(1, 6):
+                customers[1].create_order(coffees[0], price)
+        Customer.clear_registry()
+        Coffee.clear_registry()
+        
+        with OrderLog(self.path) as log:
+            self.assertEqual(len(log), 9)
+            customers, coffees = log.restore()
+        self.assertEqual(coffees[0].num_orders(), 7)
+        self.assertEqual(len(customers[1].orders()), 6)
+    
+    def test_restore_from_old_snapshot(self):
+        """Test that snapshots written before the covered byte counts still load"""
+        self.place_orders()
+        with OrderLog(self.path) as log:
+            log.checkpoint()
+        with open(self.path + '.snapshot', 'rb') as f:
+            columns = f.read()[SNAPSHOT_HEADER.size:]
+        with open(self.path + '.snapshot', 'wb') as f:
+            f.write(OLD_SNAPSHOT_HEADER.pack(OLD_SNAPSHOT_MAGIC, 4) + columns)
+        
+        with OrderLog(self.path) as log:
+            self.assertEqual(len(log), 4)
+            self.assert_restored(*log.restore())
+    
+    def test_cancellations_are_logged(self):
+        """Test that cancelled orders stay cancelled through restore and checkpoint"""
+        self.place_orders()
+        with OrderLog(self.path) as log:
+            customers, coffees = log.restore()
+            log.attach()
+            alice, bob = customers
+            espresso, latte = coffees
+            espresso.orders()[1].cancel()  # Alice's 5.0 espresso
+            bob.orders()[0].cancel()
+            self.assertEqual(len(log), 2)
+        Customer.clear_registry()
+        Coffee.clear_registry()
+        
+        with OrderLog(self.path) as log:
+            customers, coffees = log.restore()
+            log.checkpoint()
+        self.assertEqual(coffees[0].num_orders(), 1)
+        self.assertEqual(coffees[0].average_price(), 3.5)
+        self.assertEqual(coffees[1].customers(), [customers[0]])
+        Customer.clear_registry()
+        Coffee.clear_registry()
+        
+        with OrderLog(self.path) as log:
+            self.assertEqual(len(log), 2)
+            customers, coffees = log.restore()
+        self.assertEqual(sum(c.num_orders() for c in coffees), 2)
+        self.assertEqual(customers[1].orders(), [])
+    
+    def test_torn_record_is_ignored(self):
+        """Test that a partial record at the end of the log is skipped"""
+        self.place_orders()
+        with open(self.path, 'ab') as f:
+            f.write(b'\x00' * (RECORD.size // 2))
+        
+        with OrderLog(self.path) as log:
+            customers, coffees = log.restore()
+        self.assertEqual(sum(c.num_orders() for c in coffees), 4)
+    
+    def test_records_without_names_are_skipped(self):
+        """Test restore skips records whose ids never reached the names file"""
+        self.place_orders()
+        with open(self.path, 'ab') as f:
+            f.write(RECORD.pack(99, 3, 4.0, 0.0))
+        with open(self.path + '.names', 'a', encoding='utf-8') as f:
+            f.write('{"id": 5, "kind": "cus')  # Torn by a crash
+        
+        with OrderLog(self.path) as log:
+            customers, coffees = log.restore()
+            log.attach()
+            Order(Customer("Carol"), coffees[0], 2.0)
+        self.assertEqual(sum(c.num_orders() for c in coffees), 5)
+        Customer.clear_registry()
+        Coffee.clear_registry()
+        
+        with OrderLog(self.path) as log:
+            customers, coffees = log.restore()
+        self.assertEqual([c.name for c in customers], ["Alice", "Bob", "Carol"])
+        self.assertEqual(coffees[0].num_orders(), 3)
+    
+    def test_names_reach_disk_before_records(self):
+        """Test a new name is flushed before the first record using it"""
+        with OrderLog(self.path).attach() as log:
+            Order(Customer("Alice"), Coffee("Espresso"), 3.0)
+            with open(self.path + '.names', encoding='utf-8') as f:
+                self.assertEqual(len(f.readlines()), 2)
+    
+    def test_restore_after_logging_rejected(self):
+        """Test that restore refuses to run once new orders have been logged"""
+        with OrderLog(self.path).attach() as log:
+            Order(Customer("Alice"), Coffee("Espresso"), 3.0)
+            with self.assertRaises(RuntimeError):
+                log.restore()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from order_query import GroupStats, OrderQuery
+from order_store import OrderStore
+from price_index import PriceIndex
+from sqlite_store import SQLiteStore
+
+class TestOrderQuery(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the registries before each test
+        Customer.clear_registry()
+        Coffee.clear_registry()
+    
+    def tearDown(self):
+        """Go back to plain order lists after each test."""
+        OrderStore.deactivate()
+    
+    def place_orders(self):
+        self.alice = Customer("Alice")
+        self.bob = Customer("Bob")
+        self.latte = Coffee("Latte")
+        self.espresso = Coffee("Espresso")
+        self.orders = [Order(customer, coffee, price) for customer, coffee, price in (
+            (self.alice, self.latte, 3.0),
+            (self.bob, self.latte, 4.5),
+            (self.alice, self.espresso, 3.5),
+            (self.alice, self.latte, 6.0),
+            (self.bob, self.espresso, 2.0),
+            (self.bob, self.espresso, 4.0),
+        )]
+    
+    def check_queries(self):
+        orders = self.orders
+        self.assertEqual(OrderQuery().orders(), [orders[0], orders[1], orders[3],
+                                                 orders[2], orders[4], orders[5]])
+        self.assertEqual(OrderQuery(coffee=self.espresso, min_price=3, max_price=4).orders(),
+                         [orders[2], orders[5]])
+        self.assertEqual(OrderQuery(customer=self.alice, coffee=self.latte).orders(),
+                         [orders[0], orders[3]])
+        self.assertEqual(OrderQuery(customer=self.bob, max_price=4).orders(),
+                         [orders[4], orders[5]])
+        
+        self.assertEqual(OrderQuery(coffee=self.latte).group_by('customer'),
+                         {self.alice: (2, 9.0), self.bob: (1, 4.5)})
+        self.assertEqual(list(OrderQuery(min_price=4).group_by('coffee').items()),
+                         [(self.latte, (2, 10.5)), (self.espresso, (1, 4.0))])
+        self.assertEqual(OrderQuery(customer=self.bob).group_by('coffee'),
+                         {self.espresso: (2, 6.0), self.latte: (1, 4.5)})
+        self.assertEqual(OrderQuery().count(), 6)
+        self.assertEqual(OrderQuery(customer=self.alice).total(), 12.5)
+        self.assertEqual(OrderQuery(coffee=self.espresso).average(), 9.5 / 3)
+        self.assertEqual(OrderQuery(min_price=100).stats(), (0, 0))
+    
+    def test_queries_over_plain_orders(self):
+        """Test filtering and grouping over plain order lists"""
+        self.place_orders()
+        self.check_queries()
+    
+    def test_queries_over_order_store(self):
+        """Test the same queries when orders live in an OrderStore"""
+        OrderStore().activate()
+        self.place_orders()
+        self.check_queries()
+    
+    def test_queries_run_in_sqlite(self):
+        """Test the same queries pushed down to SQLite"""
+        store = SQLiteStore().activate()
+        self.addCleanup(store.close)
+        self.place_orders()
+        self.check_queries()
+    
+    def test_price_index_catches_up(self):
+        """Test that orders created after a price query are found by the next one"""
+        self.place_orders()
+        query = OrderQuery(coffee=self.latte, min_price=5)
+        self.assertEqual(query.count(), 1)
+        extra = Order(self.bob, self.latte, 5.5)
+        self.assertEqual(query.orders(), [self.orders[3], extra])
+    
+    def test_retired_customers_still_counted(self):
+        """Test that retiring a customer does not hide their orders from queries"""
+        self.place_orders()
+        self.bob.retire()
+        self.assertEqual(OrderQuery(coffee=self.espresso).group_by('customer')[self.bob],
+                         (2, 6.0))
+    
+    def test_where_and_validation(self):
+        """Test deriving queries and rejecting bad filters"""
+        self.place_orders()
+        query = OrderQuery(coffee=self.latte).where(customer=self.bob)
+        self.assertEqual(query.count(), 1)
+        self.assertEqual(GroupStats(0, 0).average, 0)
+        with self.assertRaises(TypeError):
+            OrderQuery(coffee="Latte")
+        with self.assertRaises(TypeError):
+            OrderQuery(min_price="3")
+        with self.assertRaises(ValueError):
+            OrderQuery(min_price=5, max_price=4)
+        with self.assertRaises(TypeError):
+            query.where(size="large")
+        with self.assertRaises(ValueError):
+            query.group_by('price')
+
+class TestPriceIndex(unittest.TestCase):
+    
+    def test_between_returns_history_positions(self):
+        """Test range lookups after bulk and in-place extensions"""
+        index = PriceIndex()
+        index.extend([5.0, 1.0, 3.0, 3.0] + [9.0] * 32)  # Sorted in one go
+        self.assertEqual(index.between(2, 4), [2, 3])
+        index.extend([2.5, 3.0])  # Few enough to insert in place
+        self.assertEqual(len(index), 38)
+        self.assertEqual(index.between(2.5, 3), [2, 3, 36, 37])
+        self.assertEqual(index.between(high=1), [1])
+        self.assertEqual(index.between(low=5, high=6), [0])
+        self.assertEqual(index.between(low=9), list(range(4, 36)))
+
+if __name__ == '__main__':
+    unittest.main()
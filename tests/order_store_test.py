@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from order_store import OrderStore
+
+class TestOrderStore(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the customer registry before each test
+        Customer.clear_registry()
+        self.store = OrderStore().activate()
+        self.customer = Customer("Alice")
+        self.coffee = Coffee("Espresso")
+    
+    def tearDown(self):
+        """Go back to plain order lists after each test."""
+        OrderStore.deactivate()
+    
+    def test_order_is_view_over_store(self):
+        """Test that an order's data lives in the store columns"""
+        order = Order(self.customer, self.coffee, 3.50)
+        
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.prices[0], 3.50)
+        self.assertEqual(order.customer, self.customer)
+        self.assertEqual(order.coffee, self.coffee)
+        self.assertEqual(order.price, 3.50)
+        self.assertEqual(self.store.nbytes(), 32)
+    
+    def test_orders_return_views(self):
+        """Test that orders() builds equal Order views lazily"""
+        order1 = self.customer.create_order(self.coffee, 3.50)
+        order2 = Order(Customer("Bob"), self.coffee, 4.50)
+        
+        self.assertEqual(self.coffee.orders(), [order1, order2])
+        self.assertEqual(self.customer.orders(), [order1])
+        self.assertNotEqual(order1, order2)
+        self.assertEqual(len({order1, self.coffee.orders()[0]}), 1)
+    
+    def test_derived_methods_work_with_store(self):
+        """Test that aggregates behave the same in columnar mode"""
+        bob = Customer("Bob")
+        Order(self.customer, self.coffee, 2.0)
+        Order(bob, self.coffee, 6.0)
+        
+        self.assertEqual(self.coffee.num_orders(), 2)
+        self.assertEqual(self.coffee.average_price(), 4.0)
+        self.assertEqual(self.coffee.customers(), [self.customer, bob])
+        self.assertEqual(Customer.most_aficionado(self.coffee), bob)
+    
+    def test_mixing_stores_rejected(self):
+        """Test that customer and coffee must share an order store"""
+        OrderStore.deactivate()
+        plain_coffee = Coffee("Latte")
+        
+        with self.assertRaises(ValueError):
+            Order(self.customer, plain_coffee, 3.50)
+        self.assertEqual(len(self.store), 0)
+    
+    def test_explicit_store_overrides_active(self):
+        """Test that entities given a store bind to it, whatever store is active"""
+        other = OrderStore()
+        bob = Customer("Bob", other)
+        latte = Coffee("Latte", store=other)
+        Order(bob, latte, 4.0)
+        
+        self.assertIs(bob._store, other)
+        self.assertIs(self.customer._store, self.store)
+        self.assertEqual(len(other), 1)
+        self.assertEqual(len(self.store), 0)
+    
+    def test_cancel_marks_row(self):
+        """Test that cancelled rows are remembered by the store and skipped by queries"""
+        order = Order(self.customer, self.coffee, 3.0)
+        other = Order(self.customer, self.coffee, 5.0)
+        order.cancel()
+        
+        self.assertTrue(self.store.is_cancelled(order._row))
+        self.assertEqual(self.coffee.orders(), [other])
+        self.assertEqual(self.coffee.min_price(), 5.0)
+        self.assertEqual(len(self.store), 2)  # Columns keep the row for existing views
+        self.assertEqual(order.price, 3.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@ import os
 # Add the parent directory to the path so we can import our modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from order import Order
+from order import BulkOrderError, Order
 from customer import Customer
 from coffee import Coffee
 
@@ -13,8 +13,8 @@ class TestOrder(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures before each test method."""
-        # Clear the all_customers list before each test
-        Customer.all_customers = []
+        # Clear the customer registry before each test
+        Customer.clear_registry()
         self.customer = Customer("Alice")
         self.coffee = Coffee("Espresso")
     
@@ -80,6 +80,15 @@ class TestOrder(unittest.TestCase):
         with self.assertRaises(AttributeError):
             order.price = 5.0
     
+    def test_models_are_slotted(self):
+        """Test that model objects have no per-instance __dict__"""
+        order = Order(self.customer, self.coffee, 3.50)
+        
+        for obj in (order, self.customer, self.coffee):
+            self.assertFalse(hasattr(obj, '__dict__'))
+            with self.assertRaises(AttributeError):
+                obj.unexpected = True
+    
     def test_order_relationships(self):
         """Test that order creates proper relationships"""
         order = Order(self.customer, self.coffee, 3.50)
@@ -96,6 +105,36 @@ class TestOrder(unittest.TestCase):
         # Check that coffee appears in customer's coffees
         self.assertIn(self.coffee, self.customer.coffees())
     
+    def test_bulk_create(self):
+        """Test creating a batch of orders in one call"""
+        bob = Customer("Bob")
+        orders = Order.bulk_create([
+            (self.customer, self.coffee, 3.50),
+            (bob, self.coffee, 4),
+        ])
+        
+        self.assertEqual(len(orders), 2)
+        self.assertEqual(self.coffee.orders(), orders)
+        self.assertEqual(orders[1].price, 4.0)
+        self.assertEqual(self.coffee.customers(), [self.customer, bob])
+    
+    def test_bulk_create_all_or_nothing(self):
+        """Test that a bad batch reports every invalid record and creates nothing"""
+        records = [
+            (self.customer, self.coffee, 3.50),
+            (self.customer, self.coffee, 15.0),
+            (self.customer, "not_a_coffee", 3.50),
+            ("too", "short"),
+        ]
+        with self.assertRaises(BulkOrderError) as context:
+            Order.bulk_create(records)
+        
+        self.assertEqual([index for index, _ in context.exception.errors], [1, 2, 3])
+        self.assertIsInstance(context.exception.errors[0][1], ValueError)
+        self.assertIsInstance(context.exception.errors[1][1], TypeError)
+        self.assertEqual(self.coffee.num_orders(), 0)
+        self.assertEqual(len(self.customer.orders()), 0)
+    
     def test_order_repr(self):
         """Test order string representation"""
         order = Order(self.customer, self.coffee, 3.50)
@@ -114,6 +153,92 @@ class TestOrder(unittest.TestCase):
         # But still only 1 unique customer and 1 unique coffee
         self.assertEqual(len(self.coffee.customers()), 1)
         self.assertEqual(len(self.customer.coffees()), 1)
+    
+    def test_order_created_at(self):
+        """Test that orders are timestamped with Order.clock"""
+        self.addCleanup(setattr, Order, 'clock', Order.clock)
+        Order.clock = lambda: 1000.0
+        order = Order(self.customer, self.coffee, 3.50)
+        self.assertEqual(order.created_at, 1000.0)
+    
+    def test_cancel_updates_derived_results(self):
+        """Test that cancelling an order takes it out of every aggregate"""
+        bob = Customer("Bob")
+        latte = Coffee("Latte")
+        first = Order(self.customer, self.coffee, 3.0)
+        second = Order(bob, self.coffee, 5.0)
+        third = Order(bob, latte, 4.0)
+        
+        second.cancel()
+        self.assertTrue(second.cancelled)
+        self.assertFalse(first.cancelled)
+        self.assertEqual(self.coffee.num_orders(), 1)
+        self.assertEqual(self.coffee.average_price(), 3.0)
+        self.assertEqual(self.coffee.max_price(), 3.0)
+        self.assertEqual(self.coffee.customers(), [self.customer])
+        self.assertEqual(bob.coffees(), [latte])
+        self.assertEqual(list(bob.orders()), [third])
+        self.assertEqual(Customer.most_aficionado(self.coffee), self.customer)
+        
+        first.cancel()
+        self.assertEqual(self.coffee.num_orders(), 0)
+        self.assertEqual(self.coffee.average_price(), 0)
+        self.assertEqual(self.coffee.min_price(), 0)
+        self.assertEqual(self.coffee.customers(), [])
+        self.assertIsNone(Customer.most_aficionado(self.coffee))
+        with self.assertRaises(ValueError):
+            first.cancel()
+    
+    def test_cancel_reranks_spend(self):
+        """Test that a refund can hand the top spot to another customer"""
+        bob = Customer("Bob")
+        Order(self.customer, self.coffee, 4.0)
+        big = Order(self.customer, self.coffee, 4.0)
+        Order(bob, self.coffee, 6.0)
+        self.assertEqual(Customer.most_aficionado(self.coffee), self.customer)
+        
+        big.cancel()
+        self.assertEqual(Customer.most_aficionado(self.coffee), bob)
+        self.assertEqual(self.coffee.top_customers(2), [(bob, 6.0), (self.customer, 4.0)])
+    
+    def test_cancel_compacts_history(self):
+        """Test that tombstones are dropped once enough of a history is cancelled"""
+        orders = [Order(self.customer, self.coffee, 1 + i % 10) for i in range(40)]
+        for order in orders[:5]:
+            order.cancel()
+        self.assertEqual(self.coffee._tombstones, 5)
+        self.assertEqual(len(self.coffee._orders), 40)
+        self.assertEqual(len(self.coffee.orders()), 35)
+        
+        for order in orders[5:11]:
+            order.cancel()
+        self.assertEqual(self.coffee._tombstones, 11)  # Cancelling never compacts
+        latest = Order(self.customer, self.coffee, 2.0)
+        self.assertEqual(self.coffee._tombstones, 0)  # Over a quarter cancelled
+        self.assertEqual(list(self.coffee._orders), orders[11:] + [latest])
+    
+    def test_cancel_while_iterating(self):
+        """Test that every order can be cancelled from inside a loop over orders()"""
+        orders = [Order(self.customer, self.coffee, 1 + i % 10) for i in range(40)]
+        for order in self.customer.orders():
+            order.cancel()
+        self.assertTrue(all(order.cancelled for order in orders))
+        self.assertEqual(len(self.customer.orders()), 0)
+        self.assertEqual(self.coffee.num_orders(), 0)
+        Order(self.customer, self.coffee, 2.0)  # Compacts both histories
+        self.assertEqual(len(self.coffee._orders), 1)
+    
+    def test_cancel_retired_customer_order(self):
+        """Test that refunding a retired customer keeps them off the leaderboard"""
+        bob = Customer("Bob")
+        Order(bob, self.coffee, 3.0)
+        first = Order(self.customer, self.coffee, 9.0)
+        Order(self.customer, self.coffee, 2.0)
+        self.customer.retire()
+        
+        first.cancel()
+        self.assertEqual(Customer.most_aficionado(self.coffee), bob)
+        self.assertEqual(self.coffee.num_orders(), 2)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from order_store import OrderStore
+from order_view import OrderView
+
+class TestOrderView(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the customer registry before each test
+        Customer.clear_registry()
+        self.customer = Customer("Alice")
+        self.coffee = Coffee("Espresso")
+        self.orders = [Order(self.customer, self.coffee, price) for price in (2.0, 3.0, 4.0, 5.0)]
+    
+    def test_orders_are_a_read_only_view(self):
+        """Test that orders() wraps the history without exposing mutation"""
+        view = self.coffee.orders()
+        
+        self.assertIsInstance(view, OrderView)
+        self.assertIs(view._orders, self.coffee._orders)  # No copy
+        with self.assertRaises(TypeError):
+            view[0] = self.orders[1]
+        with self.assertRaises(AttributeError):
+            view.append(self.orders[0])
+    
+    def test_len_indexing_and_slicing(self):
+        """Test sequence behaviour of views"""
+        view = self.customer.orders()
+        
+        self.assertEqual(len(view), 4)
+        self.assertEqual(view[0], self.orders[0])
+        self.assertEqual(view[-1], self.orders[-1])
+        self.assertEqual(view[1:3], self.orders[1:3])
+        self.assertEqual(view[::-2], self.orders[::-2])
+        self.assertEqual(view[1:][1:], self.orders[2:])
+        self.assertEqual(view.index(self.orders[2]), 2)
+        self.assertIn(self.orders[3], view)
+        with self.assertRaises(IndexError):
+            view[4]
+    
+    def test_view_is_live(self):
+        """Test that later orders show up, but not in a running iteration or a slice"""
+        view = self.coffee.orders()
+        head = view[:2]
+        iterator = iter(view)
+        order = Order(self.customer, self.coffee, 6.0)
+        
+        self.assertEqual(len(view), 5)
+        self.assertEqual(view[-1], order)
+        self.assertEqual(len(head), 2)
+        self.assertEqual(list(iterator), self.orders)
+    
+    def test_equality(self):
+        """Test that views compare equal to lists and other views of the same orders"""
+        self.assertEqual(self.coffee.orders(), self.customer.orders())
+        self.assertEqual(self.orders, self.coffee.orders())
+        self.assertNotEqual(self.coffee.orders(), self.orders[:3])
+        self.assertNotEqual(self.coffee.orders(), "orders")
+    
+    def test_store_rows_become_orders_on_read(self):
+        """Test views over OrderStore row numbers"""
+        OrderStore().activate()
+        self.addCleanup(OrderStore.deactivate)
+        customer = Customer("Bob")
+        coffee = Coffee("Latte")
+        order = Order(customer, coffee, 4.0)
+        
+        view = coffee.orders()
+        self.assertEqual(view[0], order)
+        self.assertEqual(view[0].price, 4.0)
+        self.assertEqual(list(view[:1]), [order])
+        self.assertIn(order, customer.orders())
+    
+    def test_cancelled_orders_drop_out(self):
+        """Test that views skip cancelled orders, before and after compaction"""
+        view = self.coffee.orders()
+        tail = view[2:]
+        self.orders[1].cancel()
+        
+        self.assertEqual(len(view), 3)
+        self.assertEqual(list(view), [self.orders[0], self.orders[2], self.orders[3]])
+        self.assertNotIn(self.orders[1], view)
+        self.assertEqual(view[1], self.orders[2])  # Indexing compacts the history
+        self.assertEqual(self.coffee._tombstones, 0)
+        self.assertEqual(list(tail), [self.orders[3]])  # Its positions now start later
+    
+    def test_cancelled_store_rows_drop_out(self):
+        """Test views over OrderStore rows skip cancelled rows"""
+        OrderStore().activate()
+        self.addCleanup(OrderStore.deactivate)
+        customer = Customer("Bob")
+        coffee = Coffee("Latte")
+        orders = [Order(customer, coffee, price) for price in (2.0, 3.0, 4.0, 5.0, 6.0)]
+        orders[0].cancel()
+        
+        self.assertEqual(customer.orders(), orders[1:])
+        self.assertEqual(coffee.orders()[::-2], [orders[4], orders[2]])
+        self.assertTrue(coffee.orders()[0] == orders[1])
+    
+    def test_cancel_store_rows_while_iterating(self):
+        """Test cancelling every stored order from inside a loop over the view"""
+        OrderStore().activate()
+        self.addCleanup(OrderStore.deactivate)
+        customer = Customer("Bob")
+        coffee = Coffee("Latte")
+        for i in range(20):
+            Order(customer, coffee, 1 + i % 10)
+        view = coffee.orders()
+        for order in view:
+            view[0]  # Positional reads compact mid-loop without disturbing it
+            order.cancel()
+        self.assertEqual(len(view), 0)
+        self.assertEqual(list(customer.orders()), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from query_cache import QueryCache, cache
+from sqlite_store import SQLiteStore
+
+class TestQueryCache(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the customer registry before each test
+        Customer.clear_registry()
+        cache.enable()
+        self.addCleanup(cache.disable)
+        self.alice = Customer("Alice")
+        self.bob = Customer("Bob")
+        self.coffee = Coffee("Espresso")
+        Order(self.alice, self.coffee, 3.0)
+        cache.clear()
+    
+    def test_repeated_reads_hit(self):
+        """Test that a repeated read is served from the cache"""
+        self.assertEqual(self.coffee.customers(), [self.alice])
+        self.assertEqual(self.coffee.customers(), [self.alice])
+        self.assertIs(Customer.most_aficionado(self.coffee), self.alice)
+        self.assertIs(Customer.most_aficionado(self.coffee), self.alice)
+        
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 2)
+    
+    def test_new_order_invalidates_its_entities_only(self):
+        """Test that attaching an order makes that customer's and coffee's results stale"""
+        latte = Coffee("Latte")
+        latte.average_price()
+        self.coffee.average_price()
+        self.alice.coffees()
+        Order(self.alice, self.coffee, 5.0)
+        
+        self.assertEqual(self.coffee.average_price(), 4.0)
+        self.assertEqual(self.alice.num_coffees(), 1)
+        latte.average_price()
+        self.assertEqual(cache.stats()['hits'], 1)  # Only the latte result was still fresh
+    
+    def test_bulk_create_rename_and_retire_invalidate(self):
+        """Test the other writes that change derived results"""
+        self.assertIs(Customer.most_aficionado(self.coffee), self.alice)
+        Order.bulk_create([(self.bob, self.coffee, 9.0)])
+        self.assertIs(Customer.most_aficionado(self.coffee), self.bob)
+        
+        self.bob.retire()
+        self.assertIs(Customer.most_aficionado(self.coffee), self.alice)
+        
+        self.alice.coffees()
+        version = self.alice._version
+        self.alice.name = "Alicia"
+        self.assertGreater(self.alice._version, version)
+        self.assertEqual(cache.stats()['hits'], 0)
+    
+    def test_cached_lists_are_copies(self):
+        """Test that callers can't modify a cached list"""
+        self.coffee.customers().append(self.bob)
+        self.assertEqual(self.coffee.customers(), [self.alice])
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used result is evicted first"""
+        small = QueryCache(maxsize=2)
+        small.put('a', 0, 1)
+        small.put('b', 0, 2)
+        small.get('a', 0)
+        small.put('c', 0, 3)
+        
+        self.assertEqual(small.get('b', 0), (False, None))
+        self.assertEqual(small.get('a', 0), (True, 1))
+        self.assertEqual(small.stats()['evictions'], 1)
+        with self.assertRaises(ValueError):
+            small.resize(0)
+    
+    def test_keyword_and_unhashable_arguments_bypass_cache(self):
+        """Test calls the cache can't key still reach the method"""
+        self.assertIs(Customer.most_aficionado(coffee=self.coffee), self.alice)
+        self.assertEqual(self.coffee.top_customers(k=3), [(self.alice, 3.0)])
+        with self.assertRaises(TypeError):
+            self.coffee.top_customers([1])
+        self.assertEqual(cache.stats()['misses'], 0)
+        self.assertEqual(len(cache), 0)
+        
+        cache.disable()
+        self.assertEqual(self.coffee.top_customers(k=1), [(self.alice, 3.0)])
+    
+    def test_disabled_cache_is_bypassed(self):
+        """Test that nothing is cached or counted while disabled"""
+        cache.disable()
+        self.coffee.customers()
+        self.coffee.customers()
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 0, 'evictions': 0,
+                                         'size': 0, 'maxsize': cache.maxsize})
+    
+    def test_sql_results_cached_until_next_order(self):
+        """Test caching SQL-backed queries, which is where it pays off"""
+        store = SQLiteStore().activate()
+        self.addCleanup(store.close)
+        self.addCleanup(SQLiteStore.deactivate)
+        carol = Customer("Carol")
+        mocha = Coffee("Mocha")
+        Order(carol, mocha, 4.0)
+        
+        self.assertEqual(mocha.num_orders(), 1)
+        self.assertEqual(mocha.num_orders(), 1)
+        Order(carol, mocha, 4.0)
+        self.assertEqual(mocha.num_orders(), 2)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import gc
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from registry import Registry, WeakRegistry
+
+class Named:
+    def __init__(self, name):
+        self.name = name
+
+class TestRegistry(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.first = Named("Alice")
+        self.second = Named("Alice")
+        self.other = Named("Bob")
+        self.registry = Registry([self.first, self.second, self.other])
+    
+    def test_list_like_behaviour(self):
+        """Test iteration, len, membership and indexing"""
+        self.assertEqual(list(self.registry), [self.first, self.second, self.other])
+        self.assertEqual(len(self.registry), 3)
+        self.assertIn(self.other, self.registry)
+        self.assertIs(self.registry[-1], self.other)
+        
+        # Registering twice is a no-op
+        self.registry.append(self.first)
+        self.assertEqual(len(self.registry), 3)
+    
+    def test_find_returns_first_with_name(self):
+        """Test that find returns the earliest item with a name"""
+        self.assertIs(self.registry.find("Alice"), self.first)
+        self.assertEqual(self.registry.find_all("Alice"), [self.first, self.second])
+        self.assertIsNone(self.registry.find("Carol"))
+    
+    def test_remove_and_rename(self):
+        """Test that removal and renames keep the name index consistent"""
+        self.registry.remove(self.first)
+        self.assertIs(self.registry.find("Alice"), self.second)
+        with self.assertRaises(ValueError):
+            self.registry.remove(self.first)
+        
+        self.second.name = "Carol"
+        self.registry.rename(self.second, "Alice")
+        self.assertIsNone(self.registry.find("Alice"))
+        self.assertIs(self.registry.find("Carol"), self.second)
+    
+    def test_indexing_after_removals(self):
+        """Test that indexing skips removed items, including ones registered again"""
+        self.registry.remove(self.first)
+        self.assertEqual(self.registry[0:2], [self.second, self.other])
+        self.registry.append(self.first)
+        self.assertIs(self.registry[-1], self.first)
+        self.assertIs(self.registry[0], self.second)
+        with self.assertRaises(IndexError):
+            self.registry[3]
+        
+        for _ in range(50):
+            self.registry.remove(self.first)
+            self.registry.append(self.first)
+        self.assertLess(len(self.registry._order), 20)  # Stale entries don't pile up
+    
+    def test_clear(self):
+        """Test that clear empties both the items and the index"""
+        self.registry.clear()
+        self.assertEqual(len(self.registry), 0)
+        self.assertIsNone(self.registry.find("Bob"))
+
+    def test_weak_registry_drops_collected_items(self):
+        """Test that a weak registry forgets items once they are collected"""
+        registry = WeakRegistry([self.first, Named("Temp")])
+        gc.collect()
+        
+        self.assertEqual(list(registry), [self.first])
+        self.assertIsNone(registry.find("Temp"))
+        self.assertIs(registry.find("Alice"), self.first)
+        self.assertIs(registry[0], self.first)
+        self.assertEqual(registry[:], [self.first])
+
+if __name__ == '__main__':
+    unittest.main()
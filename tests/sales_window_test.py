@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sales_window import RollingWindow, SalesWindows
+
+class TestRollingWindow(unittest.TestCase):
+    
+    def test_totals_within_window(self):
+        """Test that buckets inside the window are summed"""
+        window = RollingWindow(10, 6)
+        window.add(1000, 2.0)
+        window.add(1005, 3.0)
+        window.add(1021, 4.0)
+        
+        self.assertEqual(window.totals(1025, 10), (1, 4.0))
+        self.assertEqual(window.totals(1025, 30), (3, 9.0))
+    
+    def test_stale_slots_are_reset(self):
+        """Test that wrapping round the ring drops the old bucket"""
+        window = RollingWindow(10, 6)
+        window.add(1000, 2.0)
+        evicted = window.add(1060, 5.0)
+        
+        self.assertEqual(evicted, (1000, 1, 2.0))
+        self.assertEqual(window.totals(1060, 60), (1, 5.0))
+    
+    def test_too_old_is_rejected(self):
+        """Test that an order older than the slot's bucket is not recorded"""
+        window = RollingWindow(10, 6)
+        window.add(1060, 5.0)
+        
+        self.assertIs(window.add(1000, 2.0), False)
+        self.assertEqual(window.totals(1060, 60), (1, 5.0))
+
+class TestSalesWindows(unittest.TestCase):
+    
+    def test_short_window_uses_fine_buckets(self):
+        """Test windows up to an hour at 10-second resolution"""
+        windows = SalesWindows()
+        windows.add(10000, 3.0)
+        windows.add(10050, 4.0)
+        
+        self.assertEqual(windows.totals(10055, 10), (1, 4.0))
+        self.assertEqual(windows.totals(10055, 60), (2, 7.0))
+    
+    def test_long_window_folds_into_coarse_buckets(self):
+        """Test that orders evicted from the hour ring still count for the day"""
+        windows = SalesWindows()
+        windows.add(0, 3.0)
+        windows.add(3600, 4.0)  # Evicts the first order into the coarse ring
+        windows.add(7200, 5.0)
+        
+        self.assertEqual(windows.totals(7200, 3600), (2, 9.0))
+        self.assertEqual(windows.totals(7200, 86400), (3, 12.0))
+        self.assertEqual(windows.totals(7200, 6800), (2, 9.0))
+    
+    def test_long_window_without_eviction(self):
+        """Test that quiet periods do not lose orders still in the hour ring"""
+        windows = SalesWindows()
+        windows.add(1000, 3.0)
+        
+        self.assertEqual(windows.totals(9000, 3600), (0, 0.0))
+        self.assertEqual(windows.totals(9000, 86400), (1, 3.0))
+    
+    def test_window_validation(self):
+        """Test that windows must be positive and at most a day"""
+        windows = SalesWindows()
+        with self.assertRaises(ValueError):
+            windows.totals(1000, 0)
+        with self.assertRaises(ValueError):
+            windows.totals(1000, windows.max_seconds + 1)
+    
+    def test_remove_from_either_ring(self):
+        """Test that cancelled orders come back out of whichever ring holds them"""
+        windows = SalesWindows()
+        windows.add(0, 3.0)
+        windows.add(3600, 4.0)  # Evicts the first order into the coarse ring
+        windows.remove(0, 3.0)
+        windows.remove(3600, 4.0)
+        windows.remove(-100000, 5.0)  # Aged out of both rings: nothing to undo
+        
+        self.assertEqual(windows.totals(3600, 86400), (0, 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
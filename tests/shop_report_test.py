@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from order_store import OrderStore
+from shop_report import ShopReport
+from sqlite_store import SQLiteStore
+
+class TestShopReport(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the registries before each test
+        Customer.clear_registry()
+        Coffee.clear_registry()
+    
+    def tearDown(self):
+        """Go back to plain order lists after each test."""
+        OrderStore.deactivate()
+    
+    def place_orders(self):
+        customers = [Customer(f"Customer{i}") for i in range(7)]
+        coffees = [Coffee(f"Coffee{i}") for i in range(3)]
+        for i in range(200):
+            Order(customers[(i * 5) % 7], coffees[i % 3], 1.0 + (i * 37) % 11 / 2)
+        return customers, coffees
+    
+    def assert_matches_serial(self, summaries, coffees):
+        for coffee in coffees:
+            summary = summaries[coffee]
+            self.assertEqual(summary.num_orders, coffee.num_orders())
+            self.assertAlmostEqual(summary.average_price, coffee.average_price())
+            self.assertEqual(summary.customers, coffee.customers())
+            self.assertIs(summary.most_aficionado, Customer.most_aficionado(coffee))
+    
+    def test_aggregates_match_serial(self):
+        """Test that the default report reads the same answers as the serial methods"""
+        _, coffees = self.place_orders()
+        coffees[1].orders()[0].cancel()
+        summaries = ShopReport().run()
+        self.assertEqual(set(summaries), set(coffees))
+        self.assert_matches_serial(summaries, coffees)
+    
+    def test_plain_orders_match_serial(self):
+        """Test that the merged recomputed report matches the serial methods"""
+        _, coffees = self.place_orders()
+        summaries = ShopReport(processes=1, chunk_size=16, recompute=True).run()
+        self.assertEqual(set(summaries), set(coffees))
+        self.assert_matches_serial(summaries, coffees)
+    
+    def test_order_store_in_process_pool(self):
+        """Test sharding an OrderStore's columns across worker processes"""
+        OrderStore().activate()
+        _, coffees = self.place_orders()
+        summaries = ShopReport(processes=2, chunk_size=32, recompute=True).run()
+        self.assert_matches_serial(summaries, coffees)
+    
+    def test_subset_of_coffees(self):
+        """Test reporting on some coffees of a store filters the others out"""
+        OrderStore().activate()
+        _, coffees = self.place_orders()
+        for recompute in (False, True):
+            summaries = ShopReport(coffees[:1], processes=1, chunk_size=10,
+                                   recompute=recompute).run()
+            self.assertEqual(list(summaries), coffees[:1])
+            self.assert_matches_serial(summaries, coffees[:1])
+    
+    def test_empty_coffee_and_retired_customer(self):
+        """Test defaults for no orders and that retired customers are not aficionados"""
+        customers, coffees = self.place_orders()
+        empty = Coffee("Empty")
+        Customer.most_aficionado(coffees[0]).retire()
+        for recompute in (False, True):
+            summaries = ShopReport(processes=1, recompute=recompute).run()
+            self.assertEqual(summaries[empty], (0, 0, [], None))
+            self.assert_matches_serial(summaries, coffees)
+    
+    def test_sqlite_coffees_use_database_aggregates(self):
+        """Test that coffees in a SQLite store are summarized by the database"""
+        store = SQLiteStore().activate()
+        self.addCleanup(store.close)
+        _, coffees = self.place_orders()
+        summaries = ShopReport(processes=1).run()
+        self.assert_matches_serial(summaries, coffees)
+    
+    def test_validation(self):
+        """Test that processes and chunk_size must be positive"""
+        with self.assertRaises(ValueError):
+            ShopReport(processes=0)
+        with self.assertRaises(ValueError):
+            ShopReport(chunk_size=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order_store import OrderStore
+from store import Store
+from shop import CustomerRef, Shop
+
+class TestShop(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the registries before each test
+        Customer.clear_registry()
+        Coffee.clear_registry()
+        self.shop = Shop(num_shards=3)
+
+    def place_orders(self, shop):
+        customers = [shop.add_customer(f"Customer{i}") for i in range(7)]
+        for name in ("Latte", "Mocha"):
+            shop.add_coffee(name)
+        # Mirror every order in plain models to compare against
+        plain = [Customer(f"Customer{i}") for i in range(7)]
+        coffees = {name: Coffee(name) for name in ("Latte", "Mocha")}
+        for i in range(100):
+            which = (i * 5) % 7
+            name = "Latte" if i % 3 else "Mocha"
+            price = 2 + (i * 7) % 5
+            shop.create_order(customers[which], name, price)
+            plain[which].create_order(coffees[name], price)
+        return customers, plain, coffees
+
+    def assert_matches_models(self, shop):
+        customers, plain, coffees = self.place_orders(shop)
+        for name, coffee in coffees.items():
+            self.assertEqual(shop.num_orders(name), coffee.num_orders())
+            self.assertAlmostEqual(shop.average_price(name), coffee.average_price())
+            self.assertEqual(shop.customers(name),
+                             [customers[plain.index(c)] for c in coffee.customers()])
+            leader = Customer.most_aficionado(coffee)
+            self.assertEqual(shop.most_aficionado(name), customers[plain.index(leader)])
+
+    def test_matches_models(self):
+        """Test scatter-gather queries agree with the unsharded models."""
+        self.assert_matches_models(self.shop)
+
+    def test_process_shards_match_models(self):
+        """Test shards in worker processes give the same answers."""
+        with Shop(num_shards=2, processes=True) as shop:
+            self.assert_matches_models(shop)
+
+    def test_entities_stay_out_of_global_registries(self):
+        """Test shop customers and coffees don't join the class-wide registries."""
+        self.shop.add_customer("Alice")
+        self.shop.add_coffee("Espresso")
+        self.assertEqual(len(Customer.all_customers), 0)
+        self.assertEqual(len(Coffee.all_coffees), 0)
+        self.assertIsNone(Store.active)
+
+    def test_shards_ignore_active_store(self):
+        """Test shop entities use their shard's store while another store is active"""
+        store = OrderStore().activate()
+        self.addCleanup(OrderStore.deactivate)
+        alice = self.shop.add_customer("Alice")
+        self.shop.add_coffee("Latte")
+        self.shop.create_order(alice, "Latte", 3.0)
+        self.assertEqual(len(store), 0)
+        self.assertIs(Store.active, store)
+        self.assertIs(Customer("Bob")._store, store)
+        self.assertEqual(self.shop.num_orders("Latte"), 1)
+    
+    def test_customers_are_sharded_by_id(self):
+        """Test each customer's orders go to shard id % num_shards."""
+        self.shop.add_coffee("Latte")
+        alice = self.shop.add_customer("Alice")
+        self.assertEqual(alice, CustomerRef(1, "Alice"))
+        self.shop.create_order(alice, "Latte", 3.0)
+        counts = [shard.coffee_totals("Latte")[0] for shard in self.shop._shards]
+        self.assertEqual(counts, [0, 1, 0])
+
+    def test_tie_goes_to_earliest_customer(self):
+        """Test equal spenders on different shards resolve to the first created."""
+        self.shop.add_coffee("Latte")
+        alice = self.shop.add_customer("Alice")
+        bob = self.shop.add_customer("Bob")
+        self.shop.create_order(bob, "Latte", 4.0)
+        self.shop.create_order(alice, "Latte", 4.0)
+        self.assertEqual(self.shop.most_aficionado("Latte"), alice)
+        self.assertEqual(self.shop.customers("Latte"), [bob, alice])
+
+    def test_sketches_merge_across_shards(self):
+        """Test approximate counts and quantiles combine every shard's sketches."""
+        customers, plain, coffees = self.place_orders(self.shop)
+        latte = coffees["Latte"]
+        self.assertEqual(self.shop.approx_num_customers("Latte"), latte.num_customers())
+        self.assertEqual(self.shop.price_quantiles("Latte", [0, 0.5, 1]),
+                         latte.price_quantiles([0, 0.5, 1]))
+
+    def test_empty_coffee(self):
+        """Test queries on a coffee nobody ordered."""
+        self.shop.add_coffee("Latte")
+        self.assertEqual(self.shop.num_orders("Latte"), 0)
+        self.assertEqual(self.shop.average_price("Latte"), 0)
+        self.assertEqual(self.shop.customers("Latte"), [])
+        self.assertIsNone(self.shop.most_aficionado("Latte"))
+        self.assertEqual(self.shop.price_quantile("Latte", 0.5), 0)
+
+    def test_validation(self):
+        """Test bad shards, coffees, customers and prices are rejected."""
+        with self.assertRaises(ValueError):
+            Shop(num_shards=0)
+        with self.assertRaises(ValueError):
+            self.shop.add_customer("")
+        self.shop.add_coffee("Latte")
+        with self.assertRaises(ValueError):
+            self.shop.add_coffee("Latte")
+        alice = self.shop.add_customer("Alice")
+        with self.assertRaises(ValueError):
+            self.shop.create_order(alice, "Mocha", 3.0)
+        with self.assertRaises(TypeError):
+            self.shop.create_order("Alice", "Latte", 3.0)
+        with self.assertRaises(ValueError):
+            self.shop.create_order(alice, "Latte", -1)
+        self.assertEqual(self.shop.num_orders("Latte"), 0)
+
+    def test_process_shard_errors_propagate(self):
+        """Test errors raised in a worker process reach the caller."""
+        with Shop(num_shards=2, processes=True) as shop:
+            shop.add_coffee("Latte")
+            alice = shop.add_customer("Alice")
+            with self.assertRaises(ValueError):
+                shop.create_order(alice, "Latte", -1)
+            with self.assertRaises(ValueError):
+                shop.add_coffee("No")
+            shop.create_order(alice, "Latte", 3.0)
+            self.assertEqual(shop.num_orders("Latte"), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+import random
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sketches import HyperLogLog, QuantileSketch, Sketches
+
+class TestHyperLogLog(unittest.TestCase):
+    
+    def test_small_counts_are_exact(self):
+        """Test linear counting gets small distinct counts right"""
+        sketch = HyperLogLog()
+        self.assertEqual(sketch.count(), 0)
+        sketch.add_many([1, 2, 3, 2, 1])
+        sketch.add(4)
+        self.assertEqual(sketch.count(), 4)
+    
+    def test_colliding_keys_counted_exactly(self):
+        """Test keys sharing a register still count separately while few"""
+        sketch = HyperLogLog()
+        sketch.add_many([1901, 1902])  # Both hash to the same register
+        self.assertEqual(sketch.count(), 2)
+        other = HyperLogLog()
+        other.add(1)
+        self.assertEqual(sketch.copy().merge(other).count(), 3)
+        other.add_many(range(2, 1000))
+        self.assertAlmostEqual(sketch.merge(other).count(), 1001, delta=1001 * 0.05)
+    
+    def test_large_counts_within_error_bound(self):
+        """Test the estimate stays within three standard errors"""
+        sketch = HyperLogLog()
+        sketch.add_many(range(1, 200_001))
+        error = abs(sketch.count() - 200_000) / 200_000
+        self.assertLess(error, 3 * sketch.standard_error)
+    
+    def test_merge_counts_union(self):
+        """Test merged sketches count keys seen by both once"""
+        first, second = HyperLogLog(), HyperLogLog()
+        first.add_many(range(0, 3000))
+        second.add_many(range(2000, 5000))
+        copy = first.copy()
+        self.assertAlmostEqual(first.merge(second).count(), 5000, delta=5000 * 0.05)
+        self.assertAlmostEqual(copy.count(), 3000, delta=3000 * 0.05)
+    
+    def test_validation(self):
+        """Test bad precisions and mismatched merges are rejected"""
+        with self.assertRaises(ValueError):
+            HyperLogLog(precision=3)
+        with self.assertRaises(TypeError):
+            HyperLogLog(precision=12.0)
+        with self.assertRaises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+class TestQuantileSketch(unittest.TestCase):
+    
+    def setUp(self):
+        """Make the random compaction choices repeatable."""
+        random.seed(1234)
+    
+    def test_small_streams_are_exact(self):
+        """Test quantiles are exact until the sketch first compacts"""
+        sketch = QuantileSketch()
+        self.assertEqual(sketch.quantile(0.5), 0)
+        for value in [5, 1, 4, 2, 3]:
+            sketch.add(value)
+        self.assertEqual(sketch.quantiles([0, 0.2, 0.5, 1]), [1, 1, 3, 5])
+    
+    def test_rank_error_bound_and_memory(self):
+        """Test quantile ranks stay within the documented error in bounded memory"""
+        sketch = QuantileSketch()
+        values = list(range(100_000))
+        random.shuffle(values)
+        for value in values:
+            sketch.add(value)
+        self.assertEqual(sketch.count, 100_000)
+        self.assertLess(len(sketch), 3 * sketch.k + 100)
+        for q in (0.01, 0.25, 0.5, 0.95, 0.99):
+            self.assertLess(abs(sketch.quantile(q) - q * 100_000), 0.017 * 100_000)
+        self.assertEqual(sketch.quantiles([0, 1]), [0, 99_999])
+    
+    def test_merge(self):
+        """Test merged sketches answer for both streams"""
+        low, high = QuantileSketch(), QuantileSketch()
+        low.add_many(range(0, 50_000))
+        high.add_many(range(50_000, 100_000))
+        merged = Sketches.merge([Sketches(HyperLogLog(), low), Sketches(HyperLogLog(), high)])
+        self.assertEqual(merged.prices.count, 100_000)
+        self.assertLess(abs(merged.prices.quantile(0.5) - 50_000), 0.017 * 100_000)
+        self.assertEqual(low.count, 50_000)  # Sketches.merge leaves its inputs alone
+        with self.assertRaises(ValueError):
+            low.merge(QuantileSketch(k=100))
+    
+    def test_validation(self):
+        """Test bad k values and fractions are rejected"""
+        with self.assertRaises(ValueError):
+            QuantileSketch(k=4)
+        with self.assertRaises(ValueError):
+            QuantileSketch().quantile(-0.1)
+        with self.assertRaises(TypeError):
+            QuantileSketch().quantile("median")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+import unittest
+import sys
+import os
+import sqlite3
+import subprocess
+import tempfile
+import threading
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coffee import Coffee
+from customer import Customer
+from order import Order
+from sqlite_store import SQLiteStore
+
+class TestSQLiteStore(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # Clear the customer registry before each test
+        Customer.clear_registry()
+        self.store = SQLiteStore(batch_size=2).activate()
+        self.alice = Customer("Alice")
+        self.bob = Customer("Bob")
+        self.espresso = Coffee("Espresso")
+        self.latte = Coffee("Latte")
+    
+    def tearDown(self):
+        """Go back to plain order lists after each test."""
+        SQLiteStore.deactivate()
+        self.store.close()
+    
+    def place_orders(self):
+        Order(self.bob, self.espresso, 3.0)
+        Order(self.alice, self.espresso, 5.0)
+        Order(self.bob, self.espresso, 4.0)
+        Order(self.alice, self.latte, 4.5)
+    
+    def test_orders_are_written_to_sqlite(self):
+        """Test that orders land in the database and come back as views"""
+        order = self.alice.create_order(self.espresso, 3.50)
+        
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(order.price, 3.50)
+        self.assertEqual(order.customer, self.alice)
+        self.assertEqual(self.espresso.orders(), [order])
+        self.assertEqual(self.alice.orders(), [order])
+    
+    def test_coffee_queries_run_in_sql(self):
+        """Test coffee aggregates computed by the database"""
+        self.place_orders()
+        
+        self.assertEqual(self.espresso.num_orders(), 3)
+        self.assertEqual(self.espresso.average_price(), 4.0)
+        self.assertEqual(self.espresso.min_price(), 3.0)
+        self.assertEqual(self.espresso.max_price(), 5.0)
+        self.assertAlmostEqual(self.espresso.price_stddev(), (2 / 3) ** 0.5)
+        self.assertEqual(self.espresso.customers(), [self.bob, self.alice])
+        self.assertEqual(self.espresso.num_customers(), 2)
+        self.assertEqual(self.espresso.top_customers(5), [(self.bob, 7.0), (self.alice, 5.0)])
+    
+    def test_empty_coffee(self):
+        """Test that a coffee with no orders behaves like the in-memory default"""
+        self.assertEqual(self.espresso.num_orders(), 0)
+        self.assertEqual(self.espresso.average_price(), 0)
+        self.assertEqual(self.espresso.min_price(), 0)
+        self.assertEqual(self.espresso.customers(), [])
+        self.assertIsNone(Customer.most_aficionado(self.espresso))
+    
+    def test_customer_queries_run_in_sql(self):
+        """Test customer queries and most_aficionado computed by the database"""
+        self.place_orders()
+        
+        self.assertEqual(self.alice.coffees(), [self.espresso, self.latte])
+        self.assertEqual(self.alice.num_coffees(), 2)
+        self.assertEqual(Customer.most_aficionado(self.espresso), self.bob)
+        
+        self.bob.retire()
+        self.assertEqual(Customer.most_aficionado(self.espresso), self.alice)
+    
+    def test_bulk_create_single_transaction(self):
+        """Test that bulk orders are inserted together"""
+        orders = self.alice.create_orders([(self.espresso, 3.0), (self.latte, 4.0),
+                                           (self.espresso, 5.0)])
+        
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.alice.orders(), orders)
+        self.assertEqual(self.espresso.average_price(), 4.0)
+    
+    def test_concurrent_writers(self):
+        """Test that orders from several threads all reach the database"""
+        def place(customer):
+            for _ in range(100):
+                customer.create_order(self.espresso, 2.0)
+                self.espresso.average_price()
+        
+        threads = [threading.Thread(target=place, args=(customer,))
+                   for customer in (self.alice, self.bob) * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.espresso.num_orders(), 800)
+    
+    def test_file_database_persists(self):
+        """Test that a reopened file-backed store attributes its orders to the right entities"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "shop.db")
+            store = SQLiteStore(path)
+            carol, dave = Customer("Carol", store), Customer("Dave", store)
+            mocha, latte = Coffee("Mocha", store), Coffee("Latte", store)
+            Order(dave, latte, 4.0)
+            Order(carol, mocha, 6.0)
+            Order(carol, latte, 5.0)
+            Order(carol, latte, 5.0)
+            store.close()
+            
+            # Entities created since take the ids the first ones had
+            Customer.clear_registry()
+            Coffee.clear_registry()
+            Customer("Erin")
+            Coffee("Chai")
+            reopened = SQLiteStore(path)
+            dave, carol = reopened.customers()  # In the order they first ordered
+            latte, mocha = reopened.coffees()
+            self.assertEqual((dave.name, carol.name, latte.name, mocha.name),
+                             ("Dave", "Carol", "Latte", "Mocha"))
+            self.assertIs(Customer.find("Carol"), carol)
+            self.assertEqual(len(reopened), 4)
+            self.assertEqual(latte.num_orders(), 3)
+            self.assertAlmostEqual(latte.average_price(), 14 / 3)
+            self.assertEqual(latte.customers(), [dave, carol])
+            self.assertEqual(Customer.most_aficionado(latte), carol)
+            self.assertEqual(mocha.customers(), [carol])
+            self.assertEqual(carol.coffees(), [mocha, latte])
+            self.assertEqual(dave.orders()[0].coffee, latte)
+            
+            # New orders and entities get ids of their own
+            Order(dave, latte, 7.0)
+            Order(Customer("Finn", reopened), Coffee("Chai", reopened), 3.0)
+            reopened.close()
+            again = SQLiteStore(path)
+            dave, carol, finn = again.customers()
+            latte, mocha, chai = again.coffees()
+            self.assertEqual(latte.top_customers(2), [(dave, 11.0), (carol, 10.0)])
+            self.assertEqual(chai.customers(), [finn])
+            again.close()
+    
+    def test_unattributed_file_refused(self):
+        """Test that a file with orders but no recorded customers won't open"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "shop.db")
+            connection = sqlite3.connect(path)
+            connection.execute("CREATE TABLE orders (row INTEGER PRIMARY KEY, customer_id INTEGER "
+                               "NOT NULL, coffee_id INTEGER NOT NULL, price REAL NOT NULL)")
+            connection.execute("INSERT INTO orders VALUES (0, 1, 1, 6.0)")
+            connection.commit()
+            connection.close()
+            
+            with self.assertRaises(ValueError):
+                SQLiteStore(path)
+    
+    def test_buffered_orders_written_at_exit(self):
+        """Test that a store nobody closed still writes its buffer when Python exits"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "shop.db")
+            script = ("from sqlite_store import SQLiteStore\n"
+                      "from customer import Customer\n"
+                      "from coffee import Coffee\n"
+                      "from order import Order\n"
+                      f"SQLiteStore({path!r}).activate()\n"
+                      "Order(Customer('Carol'), Coffee('Mocha'), 6.0)\n")
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            subprocess.run([sys.executable, "-c", script], cwd=root, check=True)
+            
+            reopened = SQLiteStore(path)
+            self.assertEqual(len(reopened), 1)
+            carol, = reopened.customers()
+            self.assertEqual(carol.name, "Carol")
+            self.assertEqual(carol.coffees()[0].average_price(), 6.0)
+            reopened.close()
+    
+    def test_close_is_idempotent(self):
+        """Test that closing twice is harmless"""
+        store = SQLiteStore()
+        store.close()
+        store.close()
+    
+    def test_recent_sales_run_in_sql(self):
+        """Test time-windowed coffee queries computed by the database"""
+        now = [10000.0]
+        self.addCleanup(setattr, Order, 'clock', Order.clock)
+        Order.clock = lambda: now[0]
+        Order(self.alice, self.espresso, 2.0)
+        now[0] += 1800
+        Order(self.bob, self.espresso, 4.0)
+        Order(self.alice, self.latte, 6.0)
+        now[0] += 60
+        
+        self.assertEqual(self.espresso.num_recent_orders(300), 1)
+        self.assertEqual(self.espresso.recent_revenue(3600), 6.0)
+        self.assertEqual(self.espresso.recent_average_price(3600), 3.0)
+        self.assertEqual(self.espresso.recent_average_price(30), 0)
+    
+    def test_sketches_read_from_sql(self):
+        """Test coffee sketches are caught up from the database page by page"""
+        self.place_orders()
+        self.assertEqual(self.espresso.approx_num_customers(), 2)
+        self.assertEqual(self.espresso.price_quantiles([0.5, 1]), [4.0, 5.0])
+        Order(Customer("Carol"), self.espresso, 6.0)
+        self.assertEqual(self.espresso.approx_num_customers(), 3)
+        self.assertEqual(self.espresso.sketches().prices.count, 4)
+    
+    def test_cancel_moves_row_out_of_queries(self):
+        """Test cancelled orders leave every SQL aggregate but can still be read"""
+        self.place_orders()
+        order = Order(self.alice, self.espresso, 9.0)
+        order.cancel()
+        
+        self.assertTrue(order.cancelled)
+        self.assertEqual(order.price, 9.0)
+        self.assertEqual(self.espresso.num_orders(), 3)
+        self.assertEqual(self.espresso.max_price(), 5.0)
+        self.assertEqual(Customer.most_aficionado(self.espresso), self.bob)
+        self.assertNotIn(order, self.espresso.orders())
+        with self.assertRaises(ValueError):
+            order.cancel()
+
+if __name__ == '__main__':
+    unittest.main()